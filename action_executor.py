@@ -0,0 +1,208 @@
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from events import ActionResult
+
+
+class ActionHandle:
+    """Tracks a submitted action so it can be cancelled or waited on."""
+
+    def __init__(self, action_id: int, kind: str, on_done: Optional[Callable[[ActionResult], None]]):
+        self.action_id = action_id
+        self.kind = kind
+        self.submitted = time.perf_counter()
+        self.future: Optional[Future] = None
+        self.timer: Optional[threading.Timer] = None
+        # True while a worker is inside the action's function, even after the action has settled.
+        self.running = False
+        self.call: Optional[Tuple[Callable[..., str], tuple]] = None
+        self._on_done = on_done
+        self._lock = threading.Lock()
+        self._result: Optional[ActionResult] = None
+        self._finished = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[ActionResult]:
+        """Block until the action settles; returns None if `timeout` elapses first."""
+        self._finished.wait(timeout)
+        return self._result
+
+    def _settle(self, status: str, result: str) -> Optional[ActionResult]:
+        """Record the first outcome only; later ones (e.g. a result after a timeout) are dropped."""
+        with self._lock:
+            if self._result is not None:
+                return None
+            self._result = ActionResult(self.action_id, self.kind, status, result,
+                                        time.perf_counter() - self.submitted)
+        if self.timer is not None:
+            self.timer.cancel()
+        self._finished.set()
+        if self._on_done is not None:
+            try:
+                self._on_done(self._result)
+            except Exception as e:
+                logging.error(f"Action callback failed: {e}")
+        return self._result
+
+
+class ActionExecutor:
+    """Worker pool for automation actions with timeouts, cancellation and a bounded queue.
+
+    A thread cannot be interrupted, so an action that times out (or is cancelled) while running keeps its
+    worker. The executor detaches it: new and queued actions move to a fresh pool and the stuck thread ends
+    whenever its call returns. At most `max_stuck` workers are written off this way. Past that, no more
+    replacement pools are started, and actions queue behind the remaining workers. stuck() lists the
+    detached actions.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8, default_timeout: float = 10.0,
+                 timeouts: Optional[Dict[str, float]] = None, history: int = 200, max_stuck: int = 4):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.max_stuck = max_stuck
+        self._pool = self._new_pool()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, ActionHandle] = {}
+        self._stuck: Dict[int, ActionHandle] = {}
+        self._lock = threading.Lock()
+        self._history = history
+        self._latencies: Dict[str, deque] = {}
+        self._outcomes: Dict[str, Dict[str, int]] = {}
+
+    def submit(self, kind: str, func: Callable[..., str], *args,
+               on_done: Optional[Callable[[ActionResult], None]] = None,
+               timeout: Optional[float] = None) -> ActionHandle:
+        """Queue `func(*args)`; `on_done` receives exactly one ActionResult."""
+        handle = ActionHandle(next(self._ids), kind, lambda result: self._finish(result, on_done))
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                rejected = True
+            else:
+                rejected = False
+                self._pending[handle.action_id] = handle
+        if rejected:
+            logging.warning(f"Action queue full, rejecting: {kind}")
+            handle._settle("rejected", "Busy: too many actions pending, please try again.")
+            return handle
+        timeout = timeout if timeout is not None else self.timeouts.get(kind, self.default_timeout)
+        handle.timer = threading.Timer(timeout, self._expire, args=(handle, timeout))
+        handle.timer.daemon = True
+        handle.call = (func, args)
+        with self._lock:
+            handle.future = self._pool.submit(self._run, handle, func, args)
+        handle.timer.start()
+        return handle
+
+    def cancel(self, action_id: int) -> bool:
+        """Cancel a queued action, or abandon a running one; returns False if it already finished."""
+        with self._lock:
+            handle = self._pending.get(action_id)
+        if handle is None:
+            return False
+        if handle.future is not None:
+            handle.future.cancel()
+        if handle._settle("cancelled", "Action cancelled.") is None:
+            return False
+        self._detach(handle)
+        return True
+
+    def cancel_all(self):
+        with self._lock:
+            action_ids = list(self._pending)
+        for action_id in action_ids:
+            self.cancel(action_id)
+
+    def shutdown(self, wait: bool = False):
+        """Cancel everything outstanding and stop the workers (stuck ones end when their calls return)."""
+        self.cancel_all()
+        with self._lock:
+            pool = self._pool
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+    def stuck(self) -> List[Dict[str, object]]:
+        """Actions that settled (timed out or were cancelled) but whose call has not returned yet."""
+        now = time.perf_counter()
+        with self._lock:
+            return [{"action_id": handle.action_id, "kind": handle.kind, "running_s": now - handle.submitted}
+                    for handle in self._stuck.values()]
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        """Per action kind: completion count, mean/p95/max latency in ms and outcome counts."""
+        report = {}
+        with self._lock:
+            for kind, samples in self._latencies.items():
+                ordered = sorted(samples)
+                report[kind] = {
+                    "count": len(ordered),
+                    "mean_ms": 1000 * sum(ordered) / len(ordered),
+                    "p95_ms": 1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                    "max_ms": 1000 * ordered[-1],
+                    **self._outcomes.get(kind, {}),
+                }
+        return report
+
+    def _new_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cerp-action")
+
+    def _run(self, handle: ActionHandle, func: Callable[..., str], args: tuple):
+        with self._lock:
+            if handle.done:
+                return
+            handle.running = True
+        try:
+            result = func(*args)
+        except Exception as e:
+            logging.error(f"Action {handle.kind} failed: {e}")
+            handle._settle("error", f"Error: {str(e)}")
+            return
+        finally:
+            with self._lock:
+                handle.running = False
+                detached = self._stuck.pop(handle.action_id, None) is not None
+            if detached:
+                logging.info(f"Stuck action {handle.kind} returned after "
+                             f"{time.perf_counter() - handle.submitted:.1f}s; its worker is free again")
+        handle._settle("done", result)
+
+    def _expire(self, handle: ActionHandle, timeout: float):
+        if handle._settle("timeout", f"{handle.kind} did not finish within {timeout:g}s.") is not None:
+            logging.warning(f"Action {handle.kind} timed out after {timeout:g}s")
+            self._detach(handle)
+
+    def _detach(self, handle: ActionHandle):
+        """Write off the worker of a settled action that is still running, and move queued work to a new pool."""
+        with self._lock:
+            if not handle.running or handle.action_id in self._stuck:
+                return
+            self._stuck[handle.action_id] = handle
+            if len(self._stuck) > self.max_stuck:
+                logging.error(f"{len(self._stuck)} actions are stuck; not replacing the worker running "
+                              f"{handle.kind}")
+                return
+            old, self._pool = self._pool, self._new_pool()
+            # Actions still queued on the old pool would wait behind the stuck worker; requeue them.
+            for queued in self._pending.values():
+                if queued.future is not None and queued.call is not None and queued.future.cancel():
+                    queued.future = self._pool.submit(self._run, queued, *queued.call)
+        # The old pool's idle workers exit; the stuck one exits once its call returns.
+        old.shutdown(wait=False)
+        logging.warning(f"Action {handle.kind} is still running after it settled; replaced its worker")
+
+    def _finish(self, result: ActionResult, on_done: Optional[Callable[[ActionResult], None]]):
+        with self._lock:
+            self._pending.pop(result.action_id, None)
+            self._latencies.setdefault(result.kind, deque(maxlen=self._history)).append(result.latency)
+            outcomes = self._outcomes.setdefault(result.kind, {})
+            outcomes[result.status] = outcomes.get(result.status, 0) + 1
+        logging.info(f"Action {result.kind} {result.status} in {result.latency * 1000:.0f} ms")
+        if on_done is not None:
+            on_done(result)
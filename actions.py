@@ -0,0 +1,275 @@
+import glob
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+from types import ModuleType
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from command_router import CommandSpec, Intent
+
+DEFAULT_PLUGIN_DIR = "plugins"
+
+# Cost classes set an action's timeout; anything that runs other commands is "compound".
+COST_TIMEOUTS = {
+    "instant": 5.0,    # answered from memory
+    "input": 5.0,      # synthetic key presses
+    "device": 10.0,    # audio devices, dictation
+    "process": 8.0,    # stopping a process
+    "launch": 15.0,    # starting an application or browser
+    "compound": 60.0,  # plans and macros
+}
+
+# (automation, intent) -> spoken result; "Error ..." results count as failures.
+Handler = Callable[[object, Intent], str]
+
+
+class ActionSpec(NamedTuple):
+    """One action, declared once: how it is said, what it runs, where it runs and what it costs.
+
+    `handler` is a callable or a "module:function" path that is imported the first time the action runs.
+    `platforms` lists sys.platform prefixes the action is offered on (empty for all). Plan steps that
+    share a `resource` never overlap; None means the step can run alongside anything.
+    """
+    name: str
+    phrases: Tuple[str, ...]
+    handler: Union[str, Handler]
+    slot: Optional[str] = None
+    slot_type: str = "text"
+    priority: int = 0
+    platforms: Tuple[str, ...] = ()
+    cost: str = "instant"
+    resource: Optional[str] = "all"
+
+    @property
+    def command(self) -> CommandSpec:
+        return CommandSpec(self.name, self.phrases, self.slot, self.slot_type, self.priority)
+
+    def supported(self, platform: str = sys.platform) -> bool:
+        return not self.platforms or any(platform.startswith(prefix) for prefix in self.platforms)
+
+
+def _arg(intent: Intent, name: str, default: object = "") -> object:
+    value = intent.args.get(name)
+    return default if value is None else value
+
+
+def _volume_step(auto, intent: Intent, sign: int) -> str:
+    """Change the volume by the spoken amount, 10% when none is given; "by" with no number is rejected."""
+    amount = intent.args.get("amount")
+    if amount is None:
+        rest = intent.utterance.lower().partition(intent.phrase)[2].split()
+        if rest[:1] == ["by"]:
+            return f"Please say the amount as a number, for example '{intent.phrase} by twenty'."
+        amount = 10
+    return auto.adjust_volume(sign * float(amount))
+
+
+BUILTIN_ACTIONS = [
+    ActionSpec("open", ("open", "launch"), lambda auto, intent: auto.open_application(str(_arg(intent, "target"))),
+               slot="target", cost="launch", resource="focus"),
+    ActionSpec("close", ("close", "shut"), lambda auto, intent: auto.close_application(str(_arg(intent, "target"))),
+               slot="target", cost="process", resource="focus"),
+    ActionSpec("switch to", ("switch to", "go to tab"),
+               lambda auto, intent: auto.focus_application(str(_arg(intent, "target"))),
+               slot="target", cost="input", resource="focus"),
+    ActionSpec("increase volume", ("increase volume", "volume up", "turn up the volume"),
+               lambda auto, intent: _volume_step(auto, intent, 1),
+               slot="amount", slot_type="int", cost="device", resource="volume"),
+    ActionSpec("decrease volume", ("decrease volume", "volume down", "turn down the volume"),
+               lambda auto, intent: _volume_step(auto, intent, -1),
+               slot="amount", slot_type="int", cost="device", resource="volume"),
+    ActionSpec("set volume", ("set volume", "set volume to"),
+               lambda auto, intent: auto.set_volume(intent.args.get("level")),
+               slot="level", slot_type="int", cost="device", resource="volume"),
+    ActionSpec("system status", ("system status",), lambda auto, intent: auto.get_system_status(), resource=None),
+    ActionSpec("start voice typing", ("start voice typing", "start dictation"),
+               lambda auto, intent: auto.start_voice_typing(), cost="device", resource="focus"),
+    ActionSpec("stop voice typing", ("stop voice typing", "stop dictation"),
+               lambda auto, intent: auto.stop_voice_typing(), cost="device", resource="focus"),
+    ActionSpec("skip shorts", ("skip shorts", "skip short"), lambda auto, intent: auto.skip_shorts(),
+               cost="input", resource="focus"),
+    ActionSpec("skip next", ("skip next", "next video"), lambda auto, intent: auto.skip_next(),
+               cost="input", resource="focus"),
+    ActionSpec("exit", ("exit",), lambda auto, intent: auto.exit_application()),
+    # The definition holds the macro's own commands, so it outranks any command phrase inside it.
+    ActionSpec("save macro", ("save macro", "define macro"),
+               lambda auto, intent: auto.save_macro(str(_arg(intent, "definition"))), slot="definition", priority=5),
+    ActionSpec("run macro", ("run macro",), lambda auto, intent: auto.run_macro(str(_arg(intent, "name"))),
+               slot="name", cost="compound"),
+]
+
+
+class LazyBackend:
+    """Stands in for a backend module or object and imports it on first attribute access.
+
+    `target` is "module" or "module:attribute"; `setup` runs once on the loaded backend. An import
+    failure surfaces from the first use rather than at startup, so unsupported platforms still start.
+    """
+
+    def __init__(self, target: str, setup: Optional[Callable[[object], None]] = None):
+        self._target = target
+        self._setup = setup
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._backend is not None
+
+    def load(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    backend = resolve(self._target)
+                    if self._setup is not None:
+                        self._setup(backend)
+                    self._backend = backend
+                    logging.info(f"Loaded backend {self._target}")
+        return self._backend
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+def resolve(target: str) -> Union[ModuleType, object]:
+    """Import "module" or "module:attribute.path"."""
+    module_name, _, attribute = target.partition(":")
+    found = importlib.import_module(module_name)
+    for part in filter(None, attribute.split(".")):
+        found = getattr(found, part)
+    return found
+
+
+class ActionRegistry:
+    """Actions by name, with their handlers imported on first use.
+
+    Built-in actions are registered in code; plugins are JSON manifests in a directory (see discover()),
+    so listing hundreds of actions reads a few small files and imports nothing until one of them runs.
+    """
+
+    def __init__(self, specs: Iterable[ActionSpec] = (), platform: str = sys.platform):
+        self.platform = platform
+        self.specs: Dict[str, ActionSpec] = {}
+        self._handlers: Dict[str, Handler] = {}
+        self._lock = threading.Lock()
+        for spec in specs:
+            self.register(spec)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def register(self, spec: ActionSpec) -> bool:
+        """Add (or replace) an action; returns False if it is not offered on this platform."""
+        if spec.cost not in COST_TIMEOUTS:
+            raise ValueError(f"Unknown cost class for {spec.name}: {spec.cost}")
+        if not spec.supported(self.platform):
+            logging.debug(f"Action {spec.name} skipped: not available on {self.platform}")
+            return False
+        with self._lock:
+            self.specs[spec.name] = spec
+            self._handlers.pop(spec.name, None)
+        return True
+
+    def action(self, name: str, phrases: Tuple[str, ...], **metadata) -> Callable[[Handler], Handler]:
+        """Decorator form of register() for plugin code that is imported anyway."""
+        def decorate(handler: Handler) -> Handler:
+            self.register(ActionSpec(name, tuple(phrases), handler, **metadata))
+            return handler
+        return decorate
+
+    def discover(self, directory: Optional[str] = DEFAULT_PLUGIN_DIR) -> int:
+        """Register the actions of every *.json manifest in `directory`; returns how many were added.
+
+        A manifest is {"actions": [{"name": ..., "phrases": [...], "handler": "module:function", ...}]}
+        with the other ActionSpec fields optional. Handler modules are looked up in `directory` too.
+        """
+        if not directory or not os.path.isdir(directory):
+            return 0
+        added = 0
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            try:
+                with open(path, encoding="utf-8") as manifest:
+                    entries = json.load(manifest)["actions"]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logging.warning(f"Plugin manifest {path} not loaded: {e}")
+                continue
+            for entry in entries:
+                try:
+                    spec = ActionSpec(**{**entry, "phrases": tuple(entry["phrases"]),
+                                         "platforms": tuple(entry.get("platforms", ()))})
+                    if not isinstance(spec.handler, str):
+                        raise ValueError("handler must be a 'module:function' string")
+                    added += self.register(spec)
+                except (KeyError, TypeError, ValueError) as e:
+                    logging.warning(f"Plugin action in {path} not registered: {e}")
+        if added:
+            directory = os.path.abspath(directory)
+            if directory not in sys.path:
+                sys.path.append(directory)
+            logging.info(f"Registered {added} plugin actions from {directory}")
+        return added
+
+    def commands(self) -> List[CommandSpec]:
+        return [spec.command for spec in self.specs.values()]
+
+    def resources(self) -> Dict[str, Optional[str]]:
+        return {name: spec.resource for name, spec in self.specs.items()}
+
+    def timeouts(self) -> Dict[str, float]:
+        return {name: COST_TIMEOUTS[spec.cost] for name, spec in self.specs.items()}
+
+    def handler(self, name: str) -> Handler:
+        """The action's handler, importing it on first use."""
+        handler = self._handlers.get(name)
+        if handler is None:
+            spec = self.specs[name]
+            handler = resolve(spec.handler) if isinstance(spec.handler, str) else spec.handler
+            with self._lock:
+                self._handlers[name] = handler
+        return handler
+
+    def loaded(self) -> List[str]:
+        """Names of the actions whose handlers have been resolved so far."""
+        return sorted(self._handlers)
+
+    def run(self, automation, intent: Intent) -> str:
+        try:
+            handler = self.handler(intent.name)
+        except (ImportError, AttributeError) as e:
+            logging.error(f"Action {intent.name} could not be loaded: {e}")
+            return f"Error: {intent.name} is not available ({e})."
+        return handler(automation, intent)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from command_router import CommandRouter
+
+    # Discovery cost for a large plugin profile, and proof that only the action that runs gets imported.
+    count = 200
+    with tempfile.TemporaryDirectory() as directory:
+        for index in range(count):
+            with open(os.path.join(directory, f"bench_plugin_{index}.py"), "w") as module:
+                module.write(f"def run(auto, intent):\n    return 'ran plugin {index}'\n")
+        actions = [{"name": f"plugin {index}", "phrases": [f"plugin {index}"], "handler": f"bench_plugin_{index}:run",
+                    "cost": "instant", "resource": None} for index in range(count)]
+        with open(os.path.join(directory, "bench.json"), "w") as manifest:
+            json.dump({"actions": actions}, manifest)
+        started = time.perf_counter()
+        registry = ActionRegistry(BUILTIN_ACTIONS)
+        registry.discover(directory)
+        router = CommandRouter(registry.commands())
+        elapsed = time.perf_counter() - started
+        imported = sum(name.startswith("bench_plugin_") for name in sys.modules)
+        print(f"{len(registry)} actions registered and routed in {1000 * elapsed:.1f} ms, "
+              f"plugin modules imported: {imported}")
+        print(registry.run(None, router.route("plugin 42")))
+        print(f"plugin modules imported after one run: {sum(name.startswith('bench_plugin_') for name in sys.modules)}")
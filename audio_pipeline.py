@@ -0,0 +1,320 @@
+import logging
+import math
+import struct
+import threading
+import time
+import wave
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional
+import speech_recognition as sr
+
+
+class AudioFrame(NamedTuple):
+    """A single block of 16-bit mono PCM audio captured from a source."""
+    index: int
+    timestamp: float
+    data: bytes
+
+
+class FrameSource:
+    """Base class for anything that produces fixed-size PCM frames."""
+
+    def __init__(self, sample_rate: int = 16000, frame_samples: int = 480, sample_width: int = 2):
+        self.sample_rate = sample_rate
+        self.frame_samples = frame_samples
+        self.sample_width = sample_width
+
+    @property
+    def frame_duration(self) -> float:
+        return self.frame_samples / self.sample_rate
+
+    def open(self):
+        """Acquire the underlying device or file."""
+
+    def read(self) -> Optional[bytes]:
+        """Return the next frame, or None once the source is exhausted."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the underlying device or file."""
+
+
+class MicrophoneSource(FrameSource):
+    """Frames read from the default (or given) system microphone."""
+
+    def __init__(self, device_index: Optional[int] = None, sample_rate: int = 16000, frame_samples: int = 480):
+        super().__init__(sample_rate=sample_rate, frame_samples=frame_samples)
+        self.device_index = device_index
+        self._microphone = None
+
+    def open(self):
+        self._microphone = sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                                         chunk_size=self.frame_samples)
+        self._microphone.__enter__()
+        self.sample_width = self._microphone.SAMPLE_WIDTH
+        logging.info("Microphone opened for shared capture.")
+
+    def read(self) -> Optional[bytes]:
+        return self._microphone.stream.read(self.frame_samples)
+
+    def close(self):
+        if self._microphone is not None:
+            self._microphone.__exit__(None, None, None)
+            self._microphone = None
+            logging.info("Microphone closed.")
+
+
+class WavFileSource(FrameSource):
+    """Frames replayed from a 16-bit mono WAV file, optionally paced in real time."""
+
+    def __init__(self, path: str, frame_samples: int = 480, realtime: bool = False, loop: bool = False):
+        with wave.open(path, "rb") as wav:
+            sample_rate = wav.getframerate()
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                raise ValueError(f"{path} must be 16-bit mono PCM")
+        super().__init__(sample_rate=sample_rate, frame_samples=frame_samples)
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self._wav = None
+        self._next_due = 0.0
+
+    def open(self):
+        self._wav = wave.open(self.path, "rb")
+        self._next_due = time.monotonic()
+
+    def read(self) -> Optional[bytes]:
+        data = self._wav.readframes(self.frame_samples)
+        if len(data) < self.frame_samples * self.sample_width and self.loop:
+            self._wav.rewind()
+            data += self._wav.readframes(self.frame_samples - len(data) // self.sample_width)
+        if not data:
+            return None
+        if self.realtime:
+            self._next_due += self.frame_duration
+            delay = self._next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data.ljust(self.frame_samples * self.sample_width, b"\x00")
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class SyntheticSource(FrameSource):
+    """Frames built from a list of (seconds, amplitude, frequency) tone segments."""
+
+    def __init__(self, segments: List[tuple], sample_rate: int = 16000, frame_samples: int = 480,
+                 realtime: bool = False):
+        super().__init__(sample_rate=sample_rate, frame_samples=frame_samples)
+        self.segments = segments
+        self.realtime = realtime
+        self._samples = None
+        self._position = 0
+        self._next_due = 0.0
+
+    def open(self):
+        samples = []
+        for seconds, amplitude, frequency in self.segments:
+            count = int(seconds * self.sample_rate)
+            step = 2 * math.pi * frequency / self.sample_rate
+            samples.extend(int(amplitude * 32767 * math.sin(step * n)) for n in range(count))
+        self._samples = struct.pack(f"<{len(samples)}h", *samples)
+        self._position = 0
+        self._next_due = time.monotonic()
+
+    def read(self) -> Optional[bytes]:
+        size = self.frame_samples * self.sample_width
+        if self._position >= len(self._samples):
+            return None
+        data = self._samples[self._position:self._position + size]
+        self._position += size
+        if self.realtime:
+            self._next_due += self.frame_duration
+            delay = self._next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data.ljust(size, b"\x00")
+
+
+class _SubscriptionStream:
+    """File-like adapter so speech_recognition can read a subscription like a PyAudio stream."""
+
+    def __init__(self, subscription: "Subscription"):
+        self.subscription = subscription
+        self._pending = b""
+
+    def read(self, size: int) -> bytes:
+        wanted = size * self.subscription.SAMPLE_WIDTH
+        while len(self._pending) < wanted:
+            frame = self.subscription.get(timeout=self.subscription.read_timeout)
+            if frame is None:
+                break
+            self._pending += frame.data
+        data, self._pending = self._pending[:wanted], self._pending[wanted:]
+        return data
+
+
+class Subscription(sr.AudioSource):
+    """One consumer's bounded view of the shared capture stream."""
+
+    def __init__(self, service: "CaptureService", name: str, max_frames: int, read_timeout: float):
+        self.service = service
+        self.name = name
+        self.read_timeout = read_timeout
+        self.SAMPLE_RATE = service.source.sample_rate
+        self.SAMPLE_WIDTH = service.source.sample_width
+        self.CHUNK = service.source.frame_samples
+        self.stream = _SubscriptionStream(self)
+        self.dropped = 0
+        self.closed = False
+        self._frames = deque(maxlen=max_frames)
+        self._ready = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _push(self, frame: AudioFrame):
+        with self._ready:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append(frame)
+            self._ready.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[AudioFrame]:
+        """Return the next frame, or None if the stream ended or timed out."""
+        with self._ready:
+            if not self._frames and not self.closed:
+                self._ready.wait(timeout)
+            return self._frames.popleft() if self._frames else None
+
+    def close(self):
+        """Stop receiving frames; any frames already queued can still be read."""
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+        self.service.unsubscribe(self)
+
+
+class CaptureService:
+    """Long-lived capture loop that fans frames out to any number of subscribers."""
+
+    def __init__(self, source: Optional[FrameSource] = None, ring_seconds: float = 10.0):
+        self.source = source or MicrophoneSource()
+        ring_frames = max(1, int(ring_seconds / self.source.frame_duration))
+        self._ring = deque(maxlen=ring_frames)
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._frame_index = 0
+        self.error: Optional[Exception] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        """Open the source and begin capturing on a background thread."""
+        with self._lock:
+            if self._running:
+                return
+            self.source.open()
+            self._running = True
+            self.error = None
+            self._thread = threading.Thread(target=self._capture_loop, name="cerp-capture", daemon=True)
+            self._thread.start()
+        logging.info("Audio capture service started.")
+
+    def stop(self):
+        """Stop capturing, release the source and end all subscriptions."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        logging.info("Audio capture service stopped.")
+
+    def subscribe(self, name: str, max_frames: int = 500, replay_seconds: float = 0.0,
+                  read_timeout: float = 2.0) -> Subscription:
+        """Register a consumer, starting capture if needed; optionally pre-fill from the ring buffer."""
+        subscription = Subscription(self, name, max_frames, read_timeout)
+        with self._lock:
+            if replay_seconds > 0:
+                count = int(replay_seconds / self.source.frame_duration)
+                for frame in list(self._ring)[-count:]:
+                    subscription._push(frame)
+            self._subscribers.append(subscription)
+        # Subscribe before starting so a faster-than-realtime source cannot emit frames nobody receives.
+        self.start()
+        logging.info(f"Audio subscriber added: {name}")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a consumer; unknown subscriptions are ignored."""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+                logging.info(f"Audio subscriber removed: {subscription.name}")
+
+    def recent(self, seconds: float) -> bytes:
+        """Return the last `seconds` of captured audio from the ring buffer."""
+        count = int(seconds / self.source.frame_duration)
+        with self._lock:
+            frames = list(self._ring)[-count:] if count > 0 else []
+        return b"".join(frame.data for frame in frames)
+
+    def stats(self) -> Dict[str, int]:
+        """Return frame counts and per-subscriber drop counts."""
+        with self._lock:
+            stats = {"frames": self._frame_index, "subscribers": len(self._subscribers)}
+            for subscription in self._subscribers:
+                stats[f"dropped.{subscription.name}"] = subscription.dropped
+        return stats
+
+    def _capture_loop(self):
+        try:
+            while self._running:
+                data = self.source.read()
+                if data is None:
+                    logging.info("Audio source exhausted.")
+                    break
+                frame = AudioFrame(self._frame_index, time.monotonic(), data)
+                self._frame_index += 1
+                with self._lock:
+                    self._ring.append(frame)
+                    subscribers = list(self._subscribers)
+                for subscription in subscribers:
+                    subscription._push(frame)
+        except Exception as e:
+            self.error = e
+            logging.error(f"Audio capture failed: {e}")
+        finally:
+            self._running = False
+            self.source.close()
+            with self._lock:
+                subscribers, self._subscribers = self._subscribers, []
+            for subscription in subscribers:
+                with subscription._ready:
+                    subscription.closed = True
+                    subscription._ready.notify_all()
+
+
+_shared_service: Optional[CaptureService] = None
+_shared_lock = threading.Lock()
+
+
+def get_capture_service(source_factory: Callable[[], FrameSource] = MicrophoneSource) -> CaptureService:
+    """Return the process-wide capture service, creating it on first use."""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = CaptureService(source_factory())
+        return _shared_service
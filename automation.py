@@ -1,83 +1,221 @@
-import os
 import webbrowser
-import pyautogui
+import os
+import shlex
+import shutil
 import subprocess
+import sys
 import psutil
+import time
 import datetime
 import logging
-from typing import Dict, List
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-from comtypes import CLSCTX_ALL
-from logging.handlers import RotatingFileHandler
-import speech_recognition as sr
+from typing import Callable, Dict, List, NamedTuple, Optional
 import threading
-import time
+from audio_pipeline import CaptureService, get_capture_service
+from process_registry import ProcessRegistry
+from volume import VolumeController
+from system_metrics import MetricsSampler
+from browser import BrowserSession, BrowserUnavailable, DevToolsSession
+from catalog import AppCatalog, executable, normalize
+from actions import BUILTIN_ACTIONS, DEFAULT_PLUGIN_DIR, ActionRegistry, ActionSpec, LazyBackend
+from command_router import CommandRouter, Intent, number_phrases
+from dictation import ClipboardPasteSink, DictationEngine
+from grammar import CommandGrammar
+from history import HistoryStore
+from intent_resolver import IntentResolver
+from plans import ActionPlan, MacroStore, Planner, PlanRunner
+from recognizers import SpeechRecognitionBackend
+
+
+def _enable_failsafe(pyautogui):
+    pyautogui.FAILSAFE = True
+
 
-# Ensure the logs directory exists
-log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
+class SystemLauncher:
+    """Starts desktop applications and opens URLs through the operating system."""
+
+    def start(self, target: str) -> Optional[psutil.Process]:
+        """Launch an executable, a command line or (Windows) a shortcut; shortcuts give no process to track."""
+        if sys.platform == "win32" and target.lower().endswith((".lnk", ".url")):
+            os.startfile(target)
+            return None
+        command = target if sys.platform == "win32" or os.path.isfile(target) else shlex.split(target)
+        process = subprocess.Popen(command)
+        return psutil.Process(process.pid)
+
+    def open_url(self, url: str):
+        webbrowser.open(url)
+
+
+class Interpretation(NamedTuple):
+    """What a command resolved to: a plan, one intent, or a reply given without running anything.
+
+    status is "done", or "suggested" when the reply lists the commands the user may have meant.
+    """
+    kind: str
+    plan: Optional[ActionPlan] = None
+    intent: Optional[Intent] = None
+    reply: Optional[str] = None
+    status: str = "done"
 
-# Configure logging with rotation
-handler = RotatingFileHandler('logs/cerp.log', maxBytes=5 * 1024 * 1024, backupCount=2)
-logging.basicConfig(
-    handlers=[handler],
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 
 class Automation:
     """Class to handle computer automation tasks with history and feedback."""
 
-    def __init__(self):
-        pyautogui.FAILSAFE = True
-        self.app_paths = {
-            "notepad": "notepad.exe",
-            "calculator": "calc.exe",
-            "chrome": "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
-            "word": "C:\\Program Files\\Microsoft Office\\root\\Office16\\WINWORD.EXE",
-            "excel": "C:\\Program Files\\Microsoft Office\\root\\Office16\\EXCEL.EXE",
-            "powerpoint": "C:\\Program Files\\Microsoft Office\\root\\Office16\\POWERPNT.EXE"
-        }
+    BROWSER_PROCESSES = ("chrome.exe", "msedge.exe", "firefox.exe", "chrome", "msedge", "firefox")
+    BROWSER_START_TIMEOUT = 5.0
+    # Browsers the DevTools session can drive, most preferred first (catalog names).
+    DEVTOOLS_BROWSERS = ("google chrome", "chrome", "chromium", "microsoft edge", "brave")
+    # An opened application counts as ready once its CPU use stays below this for READY_SAMPLES polls.
+    READY_CPU_PERCENT = 5.0
+    READY_SAMPLES = 2
+    READY_POLL = 0.1
+
+    def __init__(self, capture: Optional[CaptureService] = None, volume: Optional[VolumeController] = None,
+                 process_registry: Optional[ProcessRegistry] = None, metrics: Optional[MetricsSampler] = None,
+                 launcher: Optional[SystemLauncher] = None, keyboard=None, history: Optional[HistoryStore] = None,
+                 macros: Optional[MacroStore] = None, actions: Optional[ActionRegistry] = None,
+                 plugin_dir: Optional[str] = DEFAULT_PLUGIN_DIR, catalog: Optional[AppCatalog] = None,
+                 browser: Optional[BrowserSession] = None):
+        """Backends default to the real system; pass fakes to run headless (see benchmark.py)."""
+        # pyautogui pulls in screenshot and imaging modules (and needs a display); load it on the first key press.
+        self.keyboard = keyboard or LazyBackend("pyautogui", setup=_enable_failsafe)
+        self.launcher = launcher or SystemLauncher()
+        self.capture = capture
+        # Installed applications come from the on-disk index, brought up to date in the background.
+        self.catalog = catalog if catalog is not None else AppCatalog()
         self.web_apps = {
             "gmail": "https://mail.google.com",
             "youtube": "https://www.youtube.com",
             "instagram": "https://www.instagram.com",
             "google": "https://www.google.com"
         }
+        # Web apps are tabs in one controlled browser; the system browser is the fallback.
+        self.browser = browser or DevToolsSession(find_browser=self._devtools_browser,
+                                                  fallback_keyboard=self.keyboard)
+        self.catalog_listeners: List[Callable[[], None]] = []
+        self.catalog.listeners.append(self._notify_catalog_changed)
         self.processes = {}  # Track opened processes for closing
-        self.history = []
-        self.max_history = 10
-        self.voice_typing_active = False
-        self.recognizer = sr.Recognizer()
+        self.process_registry = process_registry or ProcessRegistry()
+        self.volume = volume or VolumeController()
+        self.metrics = metrics or MetricsSampler()
+        self.metrics.start()
+        # Commands are recorded where their outcome is known (SpeechProcessor, the GUI), not by each handler.
+        self.history = history if history is not None else HistoryStore()
+        self.dictation: Optional[DictationEngine] = None
+        self._dictation_starter: Optional[threading.Thread] = None
+        # Every command is an ActionSpec: built-ins plus plugin manifests, whose handlers load on first use.
+        if actions is None:
+            actions = ActionRegistry(BUILTIN_ACTIONS)
+            actions.discover(plugin_dir)
+        self.actions = actions
+        self.router = CommandRouter(self.actions.commands())
+        self.macros = macros if macros is not None else MacroStore()
+        self.planner = Planner(self.router, self.macros, known_target=self.is_known_target,
+                               resources=self.actions.resources())
+        self.plan_runner = PlanRunner(self.execute_intent, self.wait_until_ready)
+        self.rebuild_grammar()
+        self.catalog.start()
         logging.info("Automation module initialized.")
 
+    def register_action(self, spec: ActionSpec) -> bool:
+        """Add a command at runtime; returns False if it is not offered on this platform."""
+        if not self.actions.register(spec):
+            return False
+        self.router.add(spec.command)
+        self.planner.resources[spec.name] = spec.resource
+        logging.info(f"Registered action: {spec.name}")
+        self._notify_catalog_changed()
+        return True
+
+    def register_app(self, app_name: str, path: str):
+        """Make a desktop application available to 'open' and 'close' commands."""
+        self.catalog.add(app_name, path)
+        logging.info(f"Registered application: {app_name}")
+        self._notify_catalog_changed()
+
+    def register_web_app(self, app_name: str, url: str):
+        """Make a web app available to 'open' and 'close' commands."""
+        self.web_apps[normalize(app_name)] = url
+        logging.info(f"Registered web app: {app_name}")
+        self._notify_catalog_changed()
+
+    def is_known_target(self, app_name: str) -> bool:
+        return normalize(app_name) in self.web_apps or app_name in self.catalog
+
+    def _process_key(self, app_name: str) -> str:
+        """Track an application under its catalog name, so "close writer" finds "open libreoffice writer"."""
+        normalized_app_name = normalize(app_name)
+        entry = self.catalog.get(app_name) if normalized_app_name not in self.web_apps else None
+        return normalize(entry.name) if entry is not None else normalized_app_name
+
+    def _devtools_browser(self) -> Optional[str]:
+        for name in self.DEVTOOLS_BROWSERS:
+            entry = self.catalog.get(name)
+            path = executable(entry.target) if entry is not None else None
+            if path and (os.path.isfile(path) or shutil.which(path)):
+                return path
+        return None
+
+    def add_catalog_listener(self, callback: Callable[[], None]):
+        """Call `callback` whenever an action, application, web app or macro is registered."""
+        self.catalog_listeners.append(callback)
+
+    def build_grammar(self) -> CommandGrammar:
+        """Compile the command phrases and known app/web-app names into a phrase grammar."""
+        specs = list(self.router.specs.values())
+        commands = [phrase for spec in specs if spec.slot != "target" for phrase in spec.phrases]
+        target_commands = [phrase for spec in specs if spec.slot == "target" for phrase in spec.phrases]
+        numeric_commands = [phrase for spec in specs if spec.slot_type == "int" for phrase in spec.phrases]
+        targets = self.catalog.names() + list(self.web_apps)
+        commands += [f"run macro {name}" for name in self.macros.names()]
+        return CommandGrammar.from_vocabulary(commands, targets, target_commands, numeric_commands, number_phrases())
+
+    def rebuild_grammar(self):
+        """Recompile the grammar and the fuzzy resolver over its phrases."""
+        grammar = self.build_grammar()
+        self.resolver = IntentResolver(grammar.phrases)
+        self.grammar = grammar
+        logging.info(f"Command grammar rebuilt with {len(grammar)} phrases")
+
+    def _notify_catalog_changed(self):
+        self.rebuild_grammar()
+        for callback in self.catalog_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Catalog listener failed: {e}")
+
     def open_application(self, app_name: str) -> str:
         """Open an application or web app by name and track the process."""
         logging.info(f"Attempting to open: {app_name}")
         try:
-            normalized_app_name = app_name.lower().replace(" ", "")
+            normalized_app_name = normalize(app_name)
             if normalized_app_name in self.web_apps:
+                try:
+                    self.browser.open(normalized_app_name, self.web_apps[normalized_app_name])
+                    message = f"Opening {app_name} in browser..."
+                    logging.info(f"Opened {app_name} in a browser tab")
+                    return message
+                except BrowserUnavailable as e:
+                    logging.info(f"Browser session unavailable ({e}); using the system browser")
                 # Open web app and track the browser process
-                webbrowser.open(self.web_apps[normalized_app_name])
-                time.sleep(1)  # Wait for the browser to open
-                browser_process = None
-                for proc in psutil.process_iter(['name']):
-                    if proc.info['name'].lower() in ["chrome.exe", "msedge.exe", "firefox.exe"]:
-                        browser_process = proc
-                        break
+                self.process_registry.start()
+                browser_process = self.process_registry.find(self.BROWSER_PROCESSES)
+                self.launcher.open_url(self.web_apps[normalized_app_name])
+                if browser_process is None:
+                    # No browser was running: wait for it to start rather than sleeping a fixed time.
+                    browser_process = self.process_registry.wait_for(self.BROWSER_PROCESSES, self.BROWSER_START_TIMEOUT)
                 if browser_process:
                     self.processes[normalized_app_name] = browser_process
                 message = f"Opening {app_name} in browser..."
-                self._add_to_history(message)
                 logging.info(f"Successfully opened: {app_name}")
                 return message
-            app_path = self.app_paths.get(normalized_app_name)
-            if app_path:
-                process = subprocess.Popen(app_path)
-                self.processes[normalized_app_name] = psutil.Process(process.pid)
+            entry = self.catalog.lookup(app_name)
+            if entry is not None:
+                process = self.launcher.start(entry.target)
+                if process is not None:
+                    self.processes[normalize(entry.name)] = process
                 message = f"Opening {app_name}..."
-                self._add_to_history(message)
                 logging.info(f"Successfully opened: {app_name}")
                 return message
             logging.warning(f"Application not found: {app_name}")
@@ -86,11 +224,40 @@ class Automation:
             logging.error(f"Failed to open {app_name}: {e}")
             return f"Error opening {app_name}: {str(e)}"
 
+    def wait_until_ready(self, intent: Intent, timeout: float = 10.0) -> bool:
+        """Wait for an opened application to settle (CPU use drops) so the next step acts on a usable window."""
+        if intent.name != "open":
+            return True
+        key = self._process_key(str(intent.args.get("target") or ""))
+        if key in self.browser.tabs():
+            return True
+        process = self.processes.get(key)
+        if process is None:
+            return False
+        if not hasattr(process, "cpu_percent"):
+            return process.is_running()
+        deadline = time.monotonic() + timeout
+        quiet = 0
+        try:
+            process.cpu_percent(interval=None)
+            while time.monotonic() < deadline:
+                time.sleep(self.READY_POLL)
+                quiet = quiet + 1 if process.cpu_percent(interval=None) < self.READY_CPU_PERCENT else 0
+                if quiet >= self.READY_SAMPLES:
+                    return True
+        except psutil.Error:
+            return False
+        return False
+
     def close_application(self, app_name: str) -> str:
         """Close a specific application or webpage."""
         logging.info(f"Attempting to close: {app_name}")
         try:
-            normalized_app_name = app_name.lower().replace(" ", "")
+            normalized_app_name = self._process_key(app_name)
+            if normalized_app_name in self.web_apps and self.browser.close(normalized_app_name):
+                message = f"Closed {app_name}."
+                logging.info(f"Closed the {app_name} tab")
+                return message
             if normalized_app_name in self.processes:
                 process = self.processes[normalized_app_name]
                 if process.is_running():
@@ -98,7 +265,6 @@ class Automation:
                     process.wait(timeout=5)  # Wait for the process to terminate
                 del self.processes[normalized_app_name]
                 message = f"Closed {app_name}."
-                self._add_to_history(message)
                 logging.info(f"Successfully closed: {app_name}")
                 return message
             logging.warning(f"Application not tracked: {app_name}")
@@ -107,95 +273,108 @@ class Automation:
             logging.error(f"Failed to close {app_name}: {e}")
             return f"Error closing {app_name}: {str(e)}"
 
+    def focus_application(self, app_name: str) -> str:
+        """Bring a web app's tab to the front."""
+        if self.browser.activate(normalize(app_name)):
+            message = f"Switched to {app_name}."
+            logging.info(message)
+            return message
+        return f"{app_name} is not open in the browser."
+
     def adjust_volume(self, change: float) -> str:
         """Adjust system volume by a percentage change."""
         try:
-            devices = AudioUtilities.GetSpeakers()
-            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-            volume = interface.QueryInterface(IAudioEndpointVolume)
-            current_volume = volume.GetMasterVolumeLevelScalar()
-            new_volume = max(0.0, min(1.0, current_volume + (change / 100)))
-            volume.SetMasterVolumeLevelScalar(new_volume, None)
-            message = f"Volume adjusted to {int(new_volume * 100)}%."
+            new_volume = self.volume.step(change / 100)
+            message = f"Volume adjusted to {round(new_volume * 100)}%."
             logging.info(message)
-            self._add_to_history(message)
             return message
         except Exception as e:
             logging.error(f"Volume adjustment failed: {e}")
             return f"Error adjusting volume: {str(e)}"
 
+    def set_volume(self, level: Optional[int], ramp: float = 0.3) -> str:
+        """Set system volume to an absolute percentage, ramping smoothly."""
+        if level is None:
+            return "Please say a volume level, for example 'set volume to fifty'."
+        try:
+            new_volume = self.volume.set(level / 100, ramp=ramp)
+            message = f"Volume set to {round(new_volume * 100)}%."
+            logging.info(message)
+            return message
+        except Exception as e:
+            logging.error(f"Volume change failed: {e}")
+            return f"Error setting volume: {str(e)}"
+
     def get_system_status(self) -> str:
         """Return system status including battery, time, internet, CPU, and memory."""
         try:
-            battery = psutil.sensors_battery()
-            battery_status = f"{battery.percent}%" if battery else "Unknown"
-            internet_status = "Connected" if any(iface.isup for iface in psutil.net_if_stats().values()) else "Disconnected"
-            cpu_usage = f"{psutil.cpu_percent()}%"
-            memory_usage = f"{psutil.virtual_memory().percent}%"
+            snapshot = self.metrics.latest()
+            minute = self.metrics.window(60)
+            battery_status = f"{snapshot.battery}%" if snapshot.battery is not None else "Unknown"
+            internet_status = "Connected" if snapshot.internet else "Disconnected"
+            cpu_usage = f"{snapshot.cpu}%"
+            if minute:
+                cpu_usage += f" (1m avg {minute['cpu_avg']:.0f}%, max {minute['cpu_max']:.0f}%)"
+            memory_usage = f"{snapshot.memory}%"
             status = (
                 f"Battery: {battery_status}, Time: {datetime.datetime.now().strftime('%H:%M:%S')}, "
                 f"Internet: {internet_status}, CPU: {cpu_usage}, Memory: {memory_usage}"
             )
             logging.info("System status retrieved")
-            self._add_to_history(status)
             return status
         except Exception as e:
             logging.error(f"System status failed: {e}")
             return f"Error retrieving status: {str(e)}"
 
     def start_voice_typing(self) -> str:
-        """Start voice typing in a separate thread."""
-        if self.voice_typing_active:
+        """Start the pipelined dictation engine, typing into a maximized Notepad window."""
+        if self.dictation is not None and self.dictation.active:
             return "Voice typing is already active."
-        self.voice_typing_active = True
-        thread = threading.Thread(target=self._voice_typing_loop)
-        thread.start()
+        self.dictation = DictationEngine(self.capture or get_capture_service(),
+                                         SpeechRecognitionBackend("google"),
+                                         ClipboardPasteSink(), on_stop=self.stop_voice_typing)
+        # Opening Notepad takes a while; the caller gets its answer now and shutdown() joins the thread.
+        self._dictation_starter = threading.Thread(target=self._start_dictation, args=(self.dictation,),
+                                                   name="cerp-dictation-start", daemon=True)
+        self._dictation_starter.start()
         message = "Voice typing started. Say 'stop voice typing' to stop."
         logging.info(message)
-        self._add_to_history(message)
         return message
 
-    def _voice_typing_loop(self):
-        """Voice typing loop running in a separate thread."""
+    def _start_dictation(self, engine: DictationEngine):
+        """Open the dictation target window, then start the engine."""
         try:
             self.open_application("notepad")
-            pyautogui.sleep(1)  # Wait for Notepad to open
-            pyautogui.hotkey('win', 'up')  # Maximize Notepad window
-            with sr.Microphone() as source:
-                self.recognizer.adjust_for_ambient_noise(source)
-                while self.voice_typing_active:
-                    logging.info("Listening for voice typing...")
-                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                    try:
-                        text = self.recognizer.recognize_google(audio, language="en-US")
-                        if "stop voice typing" in text.lower():
-                            self.stop_voice_typing()
-                            break
-                        pyautogui.write(text + " ")  # Type the recognized text
-                        logging.info(f"Typed: {text}")
-                    except sr.UnknownValueError:
-                        logging.warning("Could not understand audio.")
-                    except sr.RequestError:
-                        logging.error("Speech recognition request failed.")
+            self.wait_until_ready(self.router.route("open notepad"), timeout=5.0)
+            self.keyboard.hotkey('win', 'up')  # Maximize Notepad window
+            engine.start()
         except Exception as e:
-            logging.error(f"Voice typing thread failed: {e}")
-            self.voice_typing_active = False
+            logging.error(f"Voice typing failed to start: {e}")
+
+    @property
+    def voice_typing_active(self) -> bool:
+        return self.dictation is not None and self.dictation.active
 
     def stop_voice_typing(self) -> str:
         """Stop voice typing."""
-        self.voice_typing_active = False
+        if self.dictation is not None:
+            # The engine calls back here from its own thread when it hears the stop phrase.
+            self.dictation.stop(wait=False)
         message = "Voice typing stopped."
         logging.info(message)
-        self._add_to_history(message)
         return message
 
     def skip_shorts(self) -> str:
         """Skip a YouTube Short by simulating a down arrow key press."""
         try:
-            pyautogui.press("down")  # Simulates pressing the down arrow to skip a Short
+            # Straight to the YouTube tab (or the last one used) when the browser session controls it.
+            if self.browser.send_key("down", "youtube" if "youtube" in self.browser.tabs() else None):
+                message = "Skipped a Short."
+                logging.info(message)
+                return message
+            self.keyboard.press("down")  # Simulates pressing the down arrow to skip a Short
             message = "Skipped a Short."
             logging.info(message)
-            self._add_to_history(message)
             return message
         except Exception as e:
             logging.error(f"Failed to skip Short: {e}")
@@ -204,18 +383,19 @@ class Automation:
     def skip_next(self) -> str:
         """Skip to the next video or content (e.g., on YouTube or Instagram)."""
         try:
+            if self.browser.send_key("right"):
+                message = "Skipped to the next content."
+                logging.info(message)
+                return message
             # Ensure the browser window is in focus
-            browser_names = ["chrome", "msedge", "firefox"]
-            for proc in psutil.process_iter(['name']):
-                if any(browser in proc.info['name'].lower() for browser in browser_names):
-                    pyautogui.hotkey("alt", "tab")  # Switch to the browser
-                    time.sleep(0.5)  # Wait for focus
-                    break
-            pyautogui.press("right")  # Simulates pressing the right arrow to skip to the next video
-            time.sleep(0.5)  # Add a small delay to ensure the key press registers
+            self.process_registry.start()
+            if self.process_registry.pids(self.BROWSER_PROCESSES):
+                self.keyboard.hotkey("alt", "tab")  # Switch to the browser
+                self.keyboard.sleep(0.5)  # Wait for focus
+            self.keyboard.press("right")  # Simulates pressing the right arrow to skip to the next video
+            self.keyboard.sleep(0.5)  # Add a small delay to ensure the key press registers
             message = "Skipped to the next content."
             logging.info(message)
-            self._add_to_history(message)
             return message
         except Exception as e:
             logging.error(f"Failed to skip to next content: {e}")
@@ -225,45 +405,98 @@ class Automation:
         """Signal to exit the application."""
         message = "Exiting application..."
         logging.info(message)
-        self._add_to_history(message)
         return message
 
+    def save_macro(self, definition: str) -> str:
+        """Store "NAME as COMMANDS" so that "run macro NAME" runs COMMANDS."""
+        name, separator, body = definition.partition(" as ")
+        name = name.strip()
+        if not separator or not name or not body.strip():
+            return "Please say 'save macro NAME as COMMANDS'."
+        plan = self.planner.parse(body)
+        if not plan.steps or any(step.intent.name in ("save macro", "exit") for step in plan.steps):
+            return f"Could not understand the commands for macro {name}."
+        self.macros.define(name, body)
+        message = f"Saved macro {name} with {len(plan)} step{'s' if len(plan) != 1 else ''}."
+        logging.info(message)
+        self._notify_catalog_changed()
+        return message
+
+    def run_macro(self, name: str) -> str:
+        body = self.macros.get(name)
+        if body is None:
+            return f"Macro {name} not found."
+        return self.run_plan(self.planner.parse(body))
+
+    def run_plan(self, plan: ActionPlan) -> str:
+        """Run every step of a plan, concurrently where the plan allows, and join their results."""
+        logging.info(f"Running plan of {len(plan)} steps: {plan.utterance}")
+        results = self.plan_runner.run(plan)
+        return " ".join(result.result if result is not None else f"'{step.intent.utterance}' did not finish."
+                        for step, result in zip(plan.steps, results))
+
+    def shutdown(self):
+        """Stop dictation and the background helpers, joining their threads."""
+        if self.dictation is not None:
+            self.dictation.stop(wait=True)
+        if self._dictation_starter is not None:
+            self._dictation_starter.join(timeout=5)
+        self.plan_runner.shutdown()
+        self.catalog.stop()
+        self.browser.stop()
+        self.metrics.stop()
+        self.process_registry.stop()
+
+    def interpret(self, command: str) -> Interpretation:
+        """Plan a command, fuzzy-matching it against the grammar when it does not route to a known command.
+
+        Every caller (the core, SpeechProcessor, execute_task) goes through here, so a misheard "open note
+        bad" or "system" resolves, or gets "Did you mean" suggestions, however the command arrived.
+        """
+        plan = self.planner.parse(command)
+        if len(plan) > 1:
+            return Interpretation("plan", plan=plan)
+        intent = plan.steps[0].intent if plan.steps else None
+        if intent is None or not self._has_known_target(intent):
+            resolution = self.resolver.resolve(command)
+            if resolution.match is not None:
+                logging.info(f"Fuzzy matched '{command}' to '{resolution.match.phrase}' "
+                             f"(confidence {resolution.match.score:.2f})")
+                intent = self.router.route(resolution.match.phrase)
+            elif resolution.suggestions:
+                logging.info(f"No confident match for '{command}', suggesting alternatives")
+                reply = "Did you mean: " + ", ".join(f"'{match.phrase}'" for match in resolution.suggestions) + "?"
+                return Interpretation("unknown", reply=reply, status="suggested")
+        if intent is None or intent.name not in self.actions:
+            return Interpretation("unknown", reply="Invalid task.")
+        return Interpretation(intent.name, intent=intent)
+
+    def _has_known_target(self, intent: Intent) -> bool:
+        """True unless the intent names an application target that is not in the catalog."""
+        target = intent.args.get("target")
+        return target is None or self.grammar.matches(f"{intent.phrase} {target}")
+
+    def perform(self, interpretation: Interpretation) -> str:
+        """Run what interpret() decided."""
+        if interpretation.reply is not None:
+            return interpretation.reply
+        if interpretation.plan is not None:
+            return self.run_plan(interpretation.plan)
+        return self.execute_intent(interpretation.intent)
+
     def execute_task(self, command: str) -> str:
-        """Execute a task based on the command."""
+        """Execute a task based on the command; compound commands and macros run as a plan."""
         logging.info(f"Executing command: {command}")
         try:
-            parts = command.split(maxsplit=2)
-            task = parts[0].lower()
-            args = parts[1] if len(parts) > 1 else ""
-
-            task_mapping = {
-                "open": lambda: self.open_application(args),
-                "close": lambda: self.close_application(args),
-                "increase volume": lambda: self.adjust_volume(10.0),
-                "decrease volume": lambda: self.adjust_volume(-10.0),
-                "system status": lambda: self.get_system_status(),
-                "start voice typing": lambda: self.start_voice_typing(),
-                "stop voice typing": lambda: self.stop_voice_typing(),
-                "skip shorts": lambda: self.skip_shorts(),
-                "skip next": lambda: self.skip_next(),
-                "exit": lambda: self.exit_application(),
-            }
-
-            for key, func in task_mapping.items():
-                if command.startswith(key):
-                    return func()
-
-            return "Invalid task."
+            return self.perform(self.interpret(command))
         except Exception as e:
             logging.error(f"Command execution failed: {command}, Error: {e}")
             return f"Error executing command: {str(e)}"
 
-    def _add_to_history(self, action: str):
-        """Add action to history, limiting to max_history entries."""
-        self.history.append(action)
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
+    def execute_intent(self, intent: Intent) -> str:
+        """Run the handler for an already-routed intent."""
+        return self.actions.run(self, intent)
 
     def get_history(self) -> List[str]:
-        """Return the command history."""
-        return self.history.copy()
\ No newline at end of file
+        """Return the results of the most recent commands, oldest first."""
+        return [entry.result for entry in self.history.recent()]
\ No newline at end of file
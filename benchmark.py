@@ -0,0 +1,280 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import speech_recognition as sr
+import psutil
+from audio_pipeline import CaptureService, FrameSource, SyntheticSource, WavFileSource
+from action_executor import ActionExecutor
+from automation import Automation, SystemLauncher
+from browser import FakeBrowserSession
+from catalog import BUILTIN_APPS, AppCatalog
+from core import CERPCore
+from history import HistoryStore
+from plans import MacroStore
+from process_registry import ProcessRegistry
+from recognizers import RecognizerBackend
+from speech import SpeechProcessor
+from system_metrics import MetricsSampler, MetricsSnapshot
+from tracing import Tracer
+from vad import VAD_PROFILES
+from volume import FakeVolumeBackend, VolumeController
+
+DEFAULT_CORPUS = os.path.join("benchmarks", "corpus.jsonl")
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+# Stage latencies below this many ms are timer noise, not regressions.
+LATENCY_SLACK_MS = 5.0
+
+
+class CorpusEntry(NamedTuple):
+    """One utterance: what was said, what the recognizer hears, and what CERP should do."""
+    transcript: str
+    intent: str
+    heard: Optional[str] = None
+    result: Optional[str] = None
+    audio: Optional[str] = None
+
+
+def load_corpus(path: str) -> List[CorpusEntry]:
+    """Read a JSON-lines corpus; relative audio paths are resolved against the corpus file."""
+    entries = []
+    with open(path, encoding="utf-8") as corpus:
+        for line in corpus:
+            if not line.strip():
+                continue
+            entry = CorpusEntry(**json.loads(line))
+            if entry.audio and not os.path.isabs(entry.audio):
+                entry = entry._replace(audio=os.path.join(os.path.dirname(path), entry.audio))
+            entries.append(entry)
+    return entries
+
+
+def synthesize(transcript: str) -> SyntheticSource:
+    """Tone burst roughly as long as the spoken transcript, padded with silence for endpointing."""
+    words = len(transcript.split())
+    return SyntheticSource([(0.3, 0.0, 0), (0.3 * max(1, words), 0.3, 300), (1.0, 0.0, 0)])
+
+
+class ScriptedRecognizer(RecognizerBackend):
+    """Returns the transcript scripted for the current utterance after an optional simulated decode delay."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.text = ""
+
+    def script(self, text: str):
+        self.text = text
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        if not self.text:
+            raise sr.UnknownValueError()
+        return self.text
+
+
+class FakeProcess:
+    """Stands in for psutil.Process."""
+
+    def __init__(self, pid: int, name: str):
+        self.pid = pid
+        self._name = name
+        self.running = True
+
+    def name(self) -> str:
+        return self._name
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def terminate(self):
+        self.running = False
+
+    def wait(self, timeout: Optional[float] = None):
+        return 0
+
+
+class FakeLauncher(SystemLauncher):
+    """Records launches instead of starting programs or browsers."""
+
+    def __init__(self):
+        self.started: List[str] = []
+        self.urls: List[str] = []
+
+    def start(self, path: str) -> FakeProcess:
+        self.started.append(path)
+        return FakeProcess(10000 + len(self.started), os.path.basename(path))
+
+    def open_url(self, url: str):
+        self.urls.append(url)
+
+
+class FakeProcessRegistry(ProcessRegistry):
+    """A registry in which one browser is always running."""
+
+    def __init__(self):
+        super().__init__()
+        self.browser = FakeProcess(9999, "chrome")
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def pids(self, names: Iterable[str]):
+        return {self.browser.pid} if self.browser.name() in {name.lower() for name in names} else set()
+
+    def find(self, names: Iterable[str]) -> Optional[FakeProcess]:
+        return self.browser if self.pids(names) else None
+
+    def wait_for(self, names: Iterable[str], timeout: float, exclude: Iterable[int] = ()) -> Optional[FakeProcess]:
+        return self.find(names)
+
+
+class FakeKeyboard:
+    """Records key presses; sleeps are skipped so GUI actions cost no wall time."""
+
+    FAILSAFE = True
+
+    def __init__(self):
+        self.keys: List[tuple] = []
+
+    def press(self, key: str):
+        self.keys.append((key,))
+
+    def hotkey(self, *keys: str):
+        self.keys.append(keys)
+
+    def write(self, text: str, interval: float = 0.0):
+        self.keys.append(("write", text))
+
+    def sleep(self, seconds: float):
+        pass
+
+
+class FakeMetricsSampler(MetricsSampler):
+    """Returns one fixed snapshot without starting a sampling thread."""
+
+    def start(self):
+        pass
+
+    def sample(self, cpu_interval: Optional[float] = None) -> MetricsSnapshot:
+        snapshot = MetricsSnapshot(time.monotonic(), 12.5, 40.0, 80.0, True, True)
+        with self._lock:
+            self._samples.append(snapshot)
+        return snapshot
+
+
+def build_fake_automation() -> Automation:
+    """Automation wired to deterministic in-memory backends."""
+    return Automation(volume=VolumeController(FakeVolumeBackend(), coalesce_window=0.0),
+                      process_registry=FakeProcessRegistry(), metrics=FakeMetricsSampler(),
+                      launcher=FakeLauncher(), keyboard=FakeKeyboard(), history=HistoryStore(":memory:"),
+                      macros=MacroStore(None), catalog=AppCatalog(None, roots=(), builtin=BUILTIN_APPS["win32"]),
+                      browser=FakeBrowserSession())
+
+
+def run_benchmark(corpus: List[CorpusEntry], recognizer_delay: float = 0.0, vad_profile: str = "default") -> Dict:
+    """Drive every corpus entry through listen() and CERPCore.run_command, the path the daemon serves.
+
+    Returns throughput, latency and accuracy.
+    """
+    tracer = Tracer(capacity=len(corpus) + 1)
+    backend = ScriptedRecognizer(recognizer_delay)
+    automation = build_fake_automation()
+    processor = None
+    core = None
+    failures = []
+    correct = 0
+    audio_seconds = 0.0
+    cpu_started = psutil.Process().cpu_times()
+    started = time.perf_counter()
+    for entry in corpus:
+        source: FrameSource = WavFileSource(entry.audio) if entry.audio else synthesize(entry.transcript)
+        capture = CaptureService(source)
+        if processor is None:
+            processor = SpeechProcessor(capture=capture, backend=backend, tracer=tracer, automation=automation,
+                                        vad_profile=vad_profile)
+            core = CERPCore(processor, ActionExecutor(timeouts=automation.actions.timeouts()))
+            core.start()
+        processor.capture = capture
+        automation.capture = capture
+        backend.script(entry.heard if entry.heard is not None else entry.transcript)
+        command = processor.listen()
+        trace_id = processor.last_trace_id
+        result = core.submit(command, trace_id).result().result
+        capture.stop()
+        audio_seconds += capture.stats().get("frames", 0) * source.frame_duration
+        trace = next((t for t in reversed(tracer.traces()) if t.trace_id == trace_id), None)
+        kind = trace.kind if trace is not None else "no command"
+        if kind == entry.intent and (entry.result is None or entry.result.lower() in result.lower()):
+            correct += 1
+        else:
+            failures.append({"transcript": entry.transcript, "heard": command, "intent": kind,
+                             "expected": entry.intent, "result": result})
+    elapsed = time.perf_counter() - started
+    cpu_finished = psutil.Process().cpu_times()
+    if core is not None:
+        core.stop()
+    automation.shutdown()
+    cpu_seconds = (cpu_finished.user - cpu_started.user) + (cpu_finished.system - cpu_started.system)
+    return {
+        "utterances": len(corpus),
+        "wall_seconds": round(elapsed, 3),
+        "audio_seconds": round(audio_seconds, 3),
+        "utterances_per_second": round(len(corpus) / elapsed, 2) if elapsed else 0.0,
+        "cpu_ms_per_utterance": round(1000 * cpu_seconds / len(corpus), 2) if corpus else 0.0,
+        "accuracy": round(correct / len(corpus), 4) if corpus else 0.0,
+        "stages": {stage: {key: round(value, 2) for key, value in row.items()}
+                   for stage, row in tracer.summary()["stages"].items()},
+        "endpointing": processor.endpointer.stats() if processor is not None else {},
+        "failures": failures,
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float = 0.3) -> List[str]:
+    """List regressions: any accuracy drop, or throughput/p95 stage latency worse than `tolerance`."""
+    regressions = []
+    if report["accuracy"] < baseline["accuracy"]:
+        regressions.append(f"accuracy {baseline['accuracy']:.2%} -> {report['accuracy']:.2%}")
+    if report["utterances_per_second"] < baseline["utterances_per_second"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['utterances_per_second']} -> "
+                           f"{report['utterances_per_second']} utterances/s")
+    for stage, row in report["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if before is None:
+            continue
+        limit = before["p95_ms"] * (1 + tolerance) + LATENCY_SLACK_MS
+        if row["p95_ms"] > limit:
+            regressions.append(f"{stage} p95 {before['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the speech-to-action pipeline on a replayable corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSON-lines corpus of utterances")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Stored results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--recognizer-delay", type=float, default=0.0, help="Simulated decode time in seconds")
+    parser.add_argument("--vad-profile", default="default", choices=sorted(VAD_PROFILES), help="Endpointing profile")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative slowdown before failing")
+    args = parser.parse_args()
+
+    # Keep recognizer warnings for deliberately garbled entries out of the report.
+    logging.disable(logging.WARNING)
+    report = run_benchmark(load_corpus(args.corpus), args.recognizer_delay, args.vad_profile)
+    print(json.dumps(report, indent=2))
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as output:
+            json.dump({key: value for key, value in report.items() if key != "failures"}, output, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as stored:
+            regressions = compare(report, json.load(stored), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        sys.exit(1 if regressions else 0)
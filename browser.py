@@ -0,0 +1,333 @@
+import http.client
+import itertools
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+DEFAULT_PORT = 9222
+DEFAULT_PROFILE_DIR = os.path.join("data", "browser-profile")
+# Chromium writes its DevTools port and browser endpoint path here, in the profile it runs.
+ACTIVE_PORT_FILE = "DevToolsActivePort"
+
+# DevTools key events: CERP key name -> (DOM key, Windows virtual key code).
+KEYS = {
+    "right": ("ArrowRight", 39), "left": ("ArrowLeft", 37), "up": ("ArrowUp", 38), "down": ("ArrowDown", 40),
+    "space": (" ", 32), "k": ("k", 75), "j": ("j", 74), "l": ("l", 76), "m": ("m", 77),
+}
+
+
+class BrowserUnavailable(RuntimeError):
+    """No controllable browser could be reached or started."""
+
+
+class BrowserTab(NamedTuple):
+    name: str
+    target_id: str
+    url: str
+    websocket_url: Optional[str] = None
+
+
+class BrowserSession:
+    """Opens, closes, focuses and sends keys to browser tabs by web-app name.
+
+    Methods return False (or raise BrowserUnavailable from open()) when the session cannot do the job,
+    so callers can fall back to the system browser.
+    """
+
+    def open(self, name: str, url: str) -> BrowserTab:
+        raise NotImplementedError
+
+    def close(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def activate(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def send_key(self, key: str, name: Optional[str] = None) -> bool:
+        """Press `key` in the named tab, or the most recently opened or focused one."""
+        raise NotImplementedError
+
+    def tabs(self) -> List[str]:
+        raise NotImplementedError
+
+    def stop(self):
+        """Drop connections; the browser and its tabs stay open."""
+
+
+class DevToolsSession(BrowserSession):
+    """One Chromium-family browser driven through its DevTools endpoint on localhost.
+
+    Tabs are opened, closed and activated over the /json HTTP endpoints on one keep-alive connection.
+    Keys are delivered to the tab itself over its DevTools websocket (the optional websocket-client
+    package), so they reach the page whether or not the browser has focus; without the package the tab is
+    activated and `fallback_keyboard` presses the key instead. If no browser answers on `port`, the one
+    `find_browser()` names is started with a dedicated profile on first use. Only a browser running that
+    profile is driven: whatever else listens on `port` is never sent input.
+    """
+
+    START_TIMEOUT = 5.0
+    REQUEST_TIMEOUT = 2.0
+
+    def __init__(self, port: int = DEFAULT_PORT, find_browser: Optional[Callable[[], Optional[str]]] = None,
+                 profile_dir: str = DEFAULT_PROFILE_DIR, fallback_keyboard=None):
+        self.port = port
+        self.find_browser = find_browser
+        self.profile_dir = profile_dir
+        self.fallback_keyboard = fallback_keyboard
+        self.process: Optional[subprocess.Popen] = None
+        self._tabs: Dict[str, BrowserTab] = {}
+        self._current: Optional[str] = None
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._sockets: Dict[str, object] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    # DevTools HTTP endpoints
+
+    def _request(self, method: str, path: str):
+        """One DevTools HTTP call; the connection is reused and rebuilt once if it went stale."""
+        with self._lock:
+            for attempt in (0, 1):
+                if self._connection is None:
+                    self._connection = http.client.HTTPConnection("127.0.0.1", self.port,
+                                                                  timeout=self.REQUEST_TIMEOUT)
+                try:
+                    self._connection.request(method, path)
+                    response = self._connection.getresponse()
+                    body = response.read()
+                except (OSError, http.client.HTTPException) as e:
+                    self._connection.close()
+                    self._connection = None
+                    if attempt:
+                        raise OSError(f"DevTools request {path} failed: {e}") from e
+                    continue
+                if response.status >= 400:
+                    raise OSError(f"DevTools request {path} failed: {response.status} {body[:80]!r}")
+                try:
+                    return json.loads(body)
+                except ValueError:
+                    return body.decode(errors="replace")
+
+    def _owned(self) -> bool:
+        """True if the endpoint on `port` is the browser running our profile (per its DevToolsActivePort file)."""
+        try:
+            with open(os.path.join(self.profile_dir, ACTIVE_PORT_FILE), encoding="utf-8") as active:
+                port, path = active.read().split()[:2]
+            if int(port) != self.port:
+                return False
+            version = self._request("GET", "/json/version")
+        except (OSError, ValueError):
+            return False
+        return isinstance(version, dict) and urlparse(version.get("webSocketDebuggerUrl", "")).path == path
+
+    def _ensure_browser(self):
+        if self._owned():
+            return
+        executable = self.find_browser() if self.find_browser is not None else None
+        if not executable:
+            raise BrowserUnavailable("no Chromium-based browser found")
+        if self.process is None or self.process.poll() is not None:
+            # A file left by an earlier run would vouch for whatever now answers on the port.
+            try:
+                os.remove(os.path.join(self.profile_dir, ACTIVE_PORT_FILE))
+            except OSError:
+                pass
+            logging.info(f"Starting {executable} with DevTools on port {self.port}")
+            self.process = subprocess.Popen([
+                executable, f"--remote-debugging-port={self.port}",
+                f"--user-data-dir={os.path.abspath(self.profile_dir)}",
+                "--no-first-run", "--no-default-browser-check", "about:blank"])
+        deadline = time.monotonic() + self.START_TIMEOUT
+        while time.monotonic() < deadline:
+            if not self._owned():
+                time.sleep(0.05)
+                continue
+            for target in self._pages():
+                if target.get("url") == "about:blank":
+                    self._request("GET", f"/json/close/{target['id']}")
+            return
+        raise BrowserUnavailable(f"no browser with profile {self.profile_dir} answered on port {self.port}")
+
+    def _pages(self) -> List[Dict]:
+        return [target for target in self._request("GET", "/json/list") if target.get("type") == "page"]
+
+    @staticmethod
+    def _tab(name: str, target: Dict) -> BrowserTab:
+        return BrowserTab(name, target["id"], target.get("url", ""), target.get("webSocketDebuggerUrl"))
+
+    def _live_tab(self, name: str) -> Optional[BrowserTab]:
+        """The named tab if it is still open; tabs the user closed by hand are forgotten."""
+        tab = self._tabs.get(name)
+        if tab is None:
+            return None
+        try:
+            pages = self._pages()
+        except OSError:
+            return None
+        if any(target["id"] == tab.target_id for target in pages):
+            return tab
+        self._forget(name)
+        return None
+
+    def _forget(self, name: str):
+        tab = self._tabs.pop(name, None)
+        if tab is not None:
+            socket = self._sockets.pop(tab.target_id, None)
+            if socket is not None:
+                socket.close()
+        if self._current == name:
+            self._current = next(reversed(self._tabs), None)
+
+    # BrowserSession
+
+    def open(self, name: str, url: str) -> BrowserTab:
+        """Focus the app's tab if it is open (also one left from a previous run), otherwise open a new one."""
+        with self._lock:
+            try:
+                self._ensure_browser()
+                tab = self._live_tab(name)
+                if tab is None:
+                    host = urlparse(url).hostname
+                    existing = next((target for target in self._pages()
+                                     if host and urlparse(target.get("url", "")).hostname == host), None)
+                    target = existing or self._request("PUT", f"/json/new?{url}")
+                    tab = self._tab(name, target)
+                    self._tabs[name] = tab
+                self._request("GET", f"/json/activate/{tab.target_id}")
+            except OSError as e:
+                raise BrowserUnavailable(str(e)) from e
+            self._current = name
+            return tab
+
+    def close(self, name: str) -> bool:
+        with self._lock:
+            tab = self._live_tab(name)
+            if tab is None:
+                return False
+            try:
+                self._request("GET", f"/json/close/{tab.target_id}")
+            except OSError as e:
+                logging.warning(f"Could not close tab {name}: {e}")
+                return False
+            self._forget(name)
+            return True
+
+    def activate(self, name: str) -> bool:
+        with self._lock:
+            tab = self._live_tab(name)
+            if tab is None:
+                return False
+            try:
+                self._request("GET", f"/json/activate/{tab.target_id}")
+            except OSError:
+                return False
+            self._current = name
+            return True
+
+    def send_key(self, key: str, name: Optional[str] = None) -> bool:
+        with self._lock:
+            tab = self._live_tab(name or self._current or "")
+            if tab is None or key not in KEYS:
+                return False
+            try:
+                socket = self._socket(tab)
+            except ImportError:
+                socket = None
+            except OSError as e:
+                logging.warning(f"DevTools websocket to {tab.name} failed: {e}")
+                socket = None
+            if socket is None:
+                if self.fallback_keyboard is None or not self.activate(tab.name):
+                    return False
+                self.fallback_keyboard.press(key)
+                return True
+            dom_key, code = KEYS[key]
+            try:
+                for event in ("keyDown", "keyUp"):
+                    self._call(socket, "Input.dispatchKeyEvent", type=event, key=dom_key,
+                               code=dom_key if len(dom_key) > 1 else f"Key{dom_key.upper()}",
+                               windowsVirtualKeyCode=code)
+            except Exception as e:
+                logging.warning(f"Key {key} not delivered to {tab.name}: {e}")
+                self._sockets.pop(tab.target_id, None)
+                socket.close()
+                return False
+            return True
+
+    def _socket(self, tab: BrowserTab):
+        socket = self._sockets.get(tab.target_id)
+        if socket is None:
+            if not tab.websocket_url:
+                return None
+            import websocket
+            # Chrome rejects websocket origins it was not told about; a client without one is allowed.
+            socket = websocket.create_connection(tab.websocket_url, timeout=self.REQUEST_TIMEOUT,
+                                                 suppress_origin=True)
+            self._sockets[tab.target_id] = socket
+        return socket
+
+    def _call(self, socket, method: str, **params) -> Dict:
+        call_id = next(self._ids)
+        socket.send(json.dumps({"id": call_id, "method": method, "params": params}))
+        while True:
+            reply = json.loads(socket.recv())
+            if reply.get("id") == call_id:
+                if "error" in reply:
+                    raise RuntimeError(reply["error"].get("message"))
+                return reply.get("result", {})
+
+    def tabs(self) -> List[str]:
+        return list(self._tabs)
+
+    def stop(self):
+        with self._lock:
+            for socket in self._sockets.values():
+                socket.close()
+            self._sockets.clear()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class FakeBrowserSession(BrowserSession):
+    """In-memory browser for tests and benchmarks: tabs are records and keys are logged."""
+
+    def __init__(self):
+        self.open_tabs: Dict[str, BrowserTab] = {}
+        self.keys: List[tuple] = []
+        self.current: Optional[str] = None
+        self._ids = itertools.count(1)
+
+    def open(self, name: str, url: str) -> BrowserTab:
+        tab = self.open_tabs.get(name) or BrowserTab(name, f"fake-{next(self._ids)}", url)
+        self.open_tabs[name] = tab
+        self.current = name
+        return tab
+
+    def close(self, name: str) -> bool:
+        if self.open_tabs.pop(name, None) is None:
+            return False
+        if self.current == name:
+            self.current = next(reversed(self.open_tabs), None)
+        return True
+
+    def activate(self, name: str) -> bool:
+        if name not in self.open_tabs:
+            return False
+        self.current = name
+        return True
+
+    def send_key(self, key: str, name: Optional[str] = None) -> bool:
+        name = name or self.current
+        if name not in self.open_tabs or key not in KEYS:
+            return False
+        self.keys.append((name, key))
+        return True
+
+    def tabs(self) -> List[str]:
+        return list(self.open_tabs)
@@ -0,0 +1,366 @@
+import configparser
+import json
+import logging
+import os
+import re
+import shlex
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_INDEX_PATH = os.path.join("cache", "apps.json")
+INDEX_VERSION = 1
+
+# Applications CERP has always known, whether or not a scan finds them (calc.exe has no Start-menu shortcut).
+BUILTIN_APPS = {
+    "win32": {
+        "notepad": "notepad.exe",
+        "calculator": "calc.exe",
+        "chrome": "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
+        "word": "C:\\Program Files\\Microsoft Office\\root\\Office16\\WINWORD.EXE",
+        "excel": "C:\\Program Files\\Microsoft Office\\root\\Office16\\EXCEL.EXE",
+        "powerpoint": "C:\\Program Files\\Microsoft Office\\root\\Office16\\POWERPNT.EXE",
+    },
+}
+
+# A lower rank wins when two applications claim the same name.
+SOURCE_RANK = {"registered": 0, "builtin": 1, "start menu": 2, "desktop": 2, "program files": 3, "path": 4}
+# Command-line tools on $PATH are left out of the spoken vocabulary.
+UNSPOKEN_SOURCES = ("path",)
+# $PATH also holds system tools (poweroff, reboot, rm), so a program found there is only opened by name if it
+# is on this list or a .desktop entry launches it.
+PATH_ALLOWLIST = frozenset((
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "microsoft-edge", "brave-browser",
+    "firefox", "code", "gedit", "kate", "vlc", "gimp", "libreoffice", "gnome-calculator", "kcalc",
+))
+VENDORS = ("microsoft", "google", "mozilla", "adobe", "gnu", "gnome", "kde", "libreoffice")
+SKIP_NAMES = re.compile(r"unins|setup|install|update|crash|helper|report|readme|documentation|release notes|"
+                        r"website|manual|license", re.IGNORECASE)
+_FIELD_CODE = re.compile(r"%[fFuUdDnNickvm]")
+
+
+def normalize(name: str) -> str:
+    """Lookup key: "Google Chrome", "google-chrome" and "googlechrome" are the same application."""
+    return re.sub(r"[^a-z0-9]+", "", name.lower())
+
+
+def spoken(name: str) -> str:
+    """How a name is said: lower case words, punctuation dropped ("LibreOffice Writer" -> "libreoffice writer")."""
+    return " ".join(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+def executable(target: str) -> str:
+    """The program a launch target runs: the target itself, or the first word of a command line."""
+    if sys.platform == "win32" or os.path.isfile(target):
+        return target
+    try:
+        words = shlex.split(target)
+    except ValueError:
+        words = target.split()
+    return words[0] if words else target
+
+
+class AppEntry(NamedTuple):
+    """One launchable application: `target` is an executable, a command line or (Windows) a shortcut."""
+    name: str
+    target: str
+    aliases: Tuple[str, ...]
+    source: str
+
+
+class ScanRoot(NamedTuple):
+    """A directory to index, how to read it, and how many levels of subdirectories to descend."""
+    directory: str
+    kind: str
+    depth: int = 0
+
+
+def default_roots(platform: str = sys.platform) -> List[ScanRoot]:
+    if platform == "win32":
+        roots = []
+        for variable in ("ProgramData", "APPDATA"):
+            if os.environ.get(variable):
+                roots.append(ScanRoot(os.path.join(os.environ[variable], "Microsoft", "Windows", "Start Menu",
+                                                   "Programs"), "start menu", 3))
+        for variable in ("ProgramFiles", "ProgramFiles(x86)"):
+            if os.environ.get(variable):
+                roots.append(ScanRoot(os.environ[variable], "program files", 2))
+        if os.environ.get("LOCALAPPDATA"):
+            roots.append(ScanRoot(os.path.join(os.environ["LOCALAPPDATA"], "Programs"), "program files", 2))
+        return roots
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    roots = [ScanRoot(os.path.join(directory, "applications"), "desktop", 1)
+             for directory in dict.fromkeys([data_home] + data_dirs) if directory]
+    roots += [ScanRoot(directory, "path", 0)
+              for directory in dict.fromkeys(os.environ.get("PATH", "").split(os.pathsep)) if directory]
+    return roots
+
+
+def _aliases(*names: str) -> Tuple[str, ...]:
+    """Spoken aliases for an application: each name, and each multi-word name without its vendor."""
+    aliases = []
+    for name in filter(None, names):
+        words = spoken(name).split()
+        if not words:
+            continue
+        aliases.append(" ".join(words))
+        if len(words) > 1 and words[0] in VENDORS:
+            aliases.append(" ".join(words[1:]))
+    return tuple(dict.fromkeys(aliases))
+
+
+def _read_desktop_file(path: str) -> Optional[AppEntry]:
+    parser = configparser.RawConfigParser(strict=False, interpolation=None)
+    parser.optionxform = str
+    try:
+        with open(path, encoding="utf-8", errors="replace") as desktop:
+            parser.read_file(desktop)
+        entry = parser["Desktop Entry"]
+    except (OSError, configparser.Error, KeyError):
+        return None
+    if (entry.get("Type", "Application") != "Application" or entry.get("NoDisplay") == "true"
+            or entry.get("Hidden") == "true" or entry.get("Terminal") == "true"):
+        return None
+    name, command = entry.get("Name"), entry.get("Exec")
+    if not name or not command or SKIP_NAMES.search(name):
+        return None
+    command = _FIELD_CODE.sub("", command).replace("%%", "%").strip()
+    # "gimp-2.10" is said "gimp".
+    program = re.sub(r"[-_.]?[\d.]+$", "", os.path.basename(executable(command)))
+    return AppEntry(name, command, _aliases(name, entry.get("GenericName"), program), "desktop")
+
+
+def _scan_directory(directory: str, kind: str, names: List[str]) -> List[AppEntry]:
+    """Entries for the applications directly inside `directory` (whose listing is `names`)."""
+    entries = []
+    for file_name in names:
+        path = os.path.join(directory, file_name)
+        stem, extension = os.path.splitext(file_name)
+        extension = extension.lower()
+        if kind == "desktop":
+            entry = _read_desktop_file(path) if extension == ".desktop" else None
+        elif kind == "start menu":
+            entry = (AppEntry(stem, path, _aliases(stem), kind)
+                     if extension == ".lnk" and not SKIP_NAMES.search(stem) else None)
+        elif kind == "program files":
+            entry = (AppEntry(stem, path, _aliases(stem), kind)
+                     if extension == ".exe" and not SKIP_NAMES.search(stem) else None)
+        else:
+            entry = (AppEntry(file_name, path, _aliases(file_name), kind)
+                     if os.path.isfile(path) and os.access(path, os.X_OK) else None)
+        if entry is not None:
+            entries.append(entry)
+    return entries
+
+
+class AppCatalog:
+    """Index of installed applications by every name they answer to, kept on disk between runs.
+
+    The index is loaded from `path` at construction; rescan() then walks the scan roots, but only lists
+    directories whose mtime changed since the last scan (installing or removing an app changes its
+    directory), so a rescan with nothing new costs one stat per directory. Lookups are a dict access.
+    """
+
+    RESCAN_INTERVAL = 300.0
+    # A lookup miss (a just-installed app) rescans at most this often.
+    MISS_RESCAN_INTERVAL = 10.0
+
+    def __init__(self, path: Optional[str] = DEFAULT_INDEX_PATH, roots: Optional[Iterable[ScanRoot]] = None,
+                 builtin: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.roots = list(default_roots() if roots is None else roots)
+        builtin = BUILTIN_APPS.get(sys.platform, {}) if builtin is None else builtin
+        self.builtin = [AppEntry(name, target, _aliases(name), "builtin") for name, target in builtin.items()]
+        self.registered: List[AppEntry] = []
+        self.listeners: List[Callable[[], None]] = []
+        self.scans = 0
+        self.directories_listed = 0
+        self.last_scan_seconds = 0.0
+        # directory -> (mtime_ns, subdirectories, entries)
+        self._directories: Dict[str, Tuple[int, List[str], List[AppEntry]]] = {}
+        self._by_name: Dict[str, AppEntry] = {}
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._last_scan = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+        self._rebuild()
+
+    def __contains__(self, name: str) -> bool:
+        return normalize(name) in self._by_name
+
+    def __len__(self) -> int:
+        return len(set(self._by_name.values()))
+
+    def get(self, name: str) -> Optional[AppEntry]:
+        return self._by_name.get(normalize(name))
+
+    def lookup(self, name: str) -> Optional[AppEntry]:
+        """get(), but on a miss pick up applications installed since the last scan first."""
+        entry = self.get(name)
+        if entry is None and time.monotonic() - self._last_scan >= self.MISS_RESCAN_INTERVAL:
+            self.rescan()
+            entry = self.get(name)
+        return entry
+
+    def names(self) -> List[str]:
+        """Spoken names of every application that belongs in the recognizer vocabulary."""
+        with self._lock:
+            entries = set(self._by_name.values())
+        return sorted({alias for entry in entries if entry.source not in UNSPOKEN_SOURCES for alias in entry.aliases})
+
+    def add(self, name: str, target: str):
+        """Register an application by hand; it outranks anything a scan finds under the same name."""
+        with self._lock:
+            self.registered = [entry for entry in self.registered if normalize(entry.name) != normalize(name)]
+            self.registered.append(AppEntry(name, target, _aliases(name), "registered"))
+        self._rebuild()
+
+    def start(self):
+        """Rescan in the background now and every RESCAN_INTERVAL; startup keeps the index loaded from disk."""
+        if not self.roots or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cerp-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.rescan()
+            except Exception as e:
+                logging.error(f"Application scan failed: {e}")
+            self._stop.wait(self.RESCAN_INTERVAL)
+
+    def rescan(self) -> bool:
+        """Bring the index up to date; returns True (and notifies listeners) if any application changed."""
+        with self._scan_lock:
+            started = time.perf_counter()
+            directories: Dict[str, Tuple[int, List[str], List[AppEntry]]] = {}
+            listed = 0
+            for root in self.roots:
+                pending = [(root.directory, root.depth)]
+                while pending and not self._stop.is_set():
+                    directory, depth = pending.pop()
+                    if directory in directories:
+                        continue
+                    try:
+                        mtime = os.stat(directory).st_mtime_ns
+                    except OSError:
+                        continue
+                    record = self._directories.get(directory)
+                    if record is None or record[0] != mtime:
+                        record = self._list(directory, root.kind, mtime)
+                        listed += 1
+                    directories[directory] = record
+                    if depth > 0:
+                        pending.extend((subdirectory, depth - 1) for subdirectory in record[1])
+            if self._stop.is_set():
+                return False
+            changed = listed > 0 or directories.keys() != self._directories.keys()
+            self._directories = directories
+            self._last_scan = time.monotonic()
+            self.scans += 1
+            self.directories_listed += listed
+            self.last_scan_seconds = time.perf_counter() - started
+        if changed:
+            self._rebuild()
+            self._save()
+            logging.info(f"Application index updated: {len(self)} applications, {listed} directories rescanned "
+                         f"in {1000 * self.last_scan_seconds:.0f} ms")
+            for callback in self.listeners:
+                try:
+                    callback()
+                except Exception as e:
+                    logging.error(f"Catalog listener failed: {e}")
+        return changed
+
+    @staticmethod
+    def _list(directory: str, kind: str, mtime: int) -> Tuple[int, List[str], List[AppEntry]]:
+        try:
+            with os.scandir(directory) as scanned:
+                items = list(scanned)
+        except OSError:
+            return mtime, [], []
+        subdirectories = sorted(item.path for item in items if item.is_dir(follow_symlinks=False))
+        files = sorted(item.name for item in items if not item.is_dir())
+        return mtime, subdirectories, _scan_directory(directory, kind, files)
+
+    def _rebuild(self):
+        with self._lock:
+            entries = self.registered + self.builtin + [entry for _, _, found in self._directories.values()
+                                                        for entry in found]
+            launched = {os.path.basename(executable(entry.target)) for entry in entries if entry.source == "desktop"}
+            entries = [entry for entry in entries if entry.source != "path"
+                       or os.path.basename(entry.target) in PATH_ALLOWLIST or entry.name in launched]
+            by_name: Dict[str, AppEntry] = {}
+            for entry in sorted(entries, key=lambda entry: SOURCE_RANK.get(entry.source, len(SOURCE_RANK))):
+                for alias in (entry.name,) + entry.aliases:
+                    by_name.setdefault(normalize(alias), entry)
+            self._by_name = by_name
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as stored:
+                index = json.load(stored)
+            if index.get("version") != INDEX_VERSION or index.get("platform") != sys.platform:
+                return
+            self._directories = {
+                directory: (mtime, subdirectories, [AppEntry(name, target, tuple(aliases), source)
+                                                    for name, target, aliases, source in entries])
+                for directory, (mtime, subdirectories, entries) in index["directories"].items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Application index not loaded from {self.path}: {e}")
+            self._directories = {}
+
+    def _save(self):
+        if not self.path:
+            return
+        index = {"version": INDEX_VERSION, "platform": sys.platform,
+                 "directories": {directory: [mtime, subdirectories, [list(entry) for entry in entries]]
+                                 for directory, (mtime, subdirectories, entries) in self._directories.items()}}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as output:
+                json.dump(index, output)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            logging.warning(f"Application index not saved to {self.path}: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        return {"applications": len(self), "names": len(self._by_name), "directories": len(self._directories),
+                "scans": self.scans, "directories_listed": self.directories_listed,
+                "last_scan_ms": 1000 * self.last_scan_seconds}
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Full scan of this machine, then an incremental rescan with nothing installed in between.
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = AppCatalog(os.path.join(directory, "apps.json"))
+        catalog.rescan()
+        print(f"full scan: {catalog.stats()}")
+        catalog.rescan()
+        print(f"rescan: {catalog.stats()}")
+        started = time.perf_counter()
+        reloaded = AppCatalog(catalog.path)
+        print(f"index reloaded in {1000 * (time.perf_counter() - started):.1f} ms with {len(reloaded)} applications")
+        names = reloaded.names()
+        started = time.perf_counter()
+        for name in names * 10:
+            reloaded.get(name)
+        print(f"{1e6 * (time.perf_counter() - started) / max(1, 10 * len(names)):.2f} us per lookup, "
+              f"{len(names)} spoken names")
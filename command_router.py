@@ -0,0 +1,177 @@
+import random
+import re
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40,
+    "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90, "hundred": 100,
+}
+_UNITS = [word for word, value in NUMBER_WORDS.items() if value < 20]
+_TENS = [word for word, value in NUMBER_WORDS.items() if 20 <= value < 100]
+
+
+def read_number(tokens: List[str]) -> Tuple[Optional[int], int]:
+    """Value of the number at the start of tokens and how many tokens it used ("seventy five" -> (75, 2))."""
+    if tokens and tokens[0].isdigit():
+        return int(tokens[0]), 1
+    value, used = None, 0
+    for token in tokens:
+        number = NUMBER_WORDS.get(token)
+        if number is None:
+            break
+        if value is None:
+            value = number
+        elif number == 100 and 0 < value < 100:
+            value *= 100  # "one hundred"
+        elif value >= 100 and value % 100 == 0 and number < 100:
+            value += number  # "one hundred five", "hundred twenty"
+        elif 20 <= value < 100 and value % 10 == 0 and number < 10:
+            value += number  # "seventy five"
+        else:
+            break
+        used += 1
+    return value, used
+
+
+def number_phrases(limit: int = 100) -> List[str]:
+    """How the numbers 0..limit are said ("seventy five"), for recognizers that need every phrase spelled out."""
+    phrases = list(_UNITS)
+    for tens in _TENS:
+        phrases.append(tens)
+        phrases.extend(f"{tens} {unit}" for unit in _UNITS[1:10])
+    phrases.append("one hundred")
+    return [phrase for phrase in phrases if read_number(phrase.split())[0] <= limit]
+
+
+def _parse_int(tokens: List[str]) -> Optional[int]:
+    """The first number in the slot, digits or words ("by fifteen", "to seventy five percent")."""
+    for start, token in enumerate(tokens):
+        if token.isdigit() or token in NUMBER_WORDS:
+            return read_number(tokens[start:])[0]
+    return None
+
+
+SLOT_TYPES = {
+    "text": lambda tokens: " ".join(tokens),
+    "int": _parse_int,
+}
+
+
+class CommandSpec(NamedTuple):
+    """Declarative description of a spoken command: its phrases, aliases and argument slot."""
+    name: str
+    phrases: Tuple[str, ...]
+    slot: Optional[str] = None
+    slot_type: str = "text"
+    priority: int = 0
+
+
+class Intent(NamedTuple):
+    """The single parsed result of routing an utterance."""
+    name: str
+    args: Dict[str, object]
+    phrase: str
+    utterance: str
+
+
+class _Node:
+    __slots__ = ("children", "spec", "phrase")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.spec: Optional[CommandSpec] = None
+        self.phrase = ""
+
+
+class CommandRouter:
+    """Token trie over command phrases; routes an utterance to one intent in a single pass."""
+
+    def __init__(self, specs: Iterable[CommandSpec] = ()):
+        self._root = _Node()
+        self.specs: Dict[str, CommandSpec] = {}
+        for spec in specs:
+            self.add(spec)
+
+    def add(self, spec: CommandSpec):
+        """Register (or replace) a command; its phrases become trie paths."""
+        if spec.slot_type not in SLOT_TYPES:
+            raise ValueError(f"Unknown slot type: {spec.slot_type}")
+        self.specs[spec.name] = spec
+        for phrase in spec.phrases:
+            node = self._root
+            for token in _TOKEN.findall(phrase.lower()):
+                node = node.children.setdefault(token, _Node())
+            node.spec = spec
+            node.phrase = phrase
+
+    def phrases(self, slotted: Optional[bool] = None) -> List[str]:
+        """All registered phrases, optionally only those with (True) or without (False) a slot."""
+        return [phrase for spec in self.specs.values() for phrase in spec.phrases
+                if slotted is None or (spec.slot is not None) == slotted]
+
+    def route(self, utterance: str) -> Optional[Intent]:
+        """Return the best intent: highest priority, then longest phrase, then earliest position."""
+        tokens = _TOKEN.findall(utterance.lower())
+        best = None
+        for start in range(len(tokens)):
+            node = self._root
+            for end in range(start, len(tokens)):
+                node = node.children.get(tokens[end])
+                if node is None:
+                    break
+                if node.spec is not None:
+                    rank = (node.spec.priority, end - start + 1, -start)
+                    if best is None or rank > best[0]:
+                        best = (rank, end + 1, node)
+        if best is None:
+            return None
+        _, end, node = best
+        spec = node.spec
+        args = {}
+        if spec.slot is not None:
+            args[spec.slot] = SLOT_TYPES[spec.slot_type](tokens[end:])
+        return Intent(spec.name, args, node.phrase, utterance)
+
+
+def benchmark(count: int = 10000, seed: int = 0):
+    """Time trie routing against the old dispatch path over synthetic utterances."""
+    from actions import BUILTIN_ACTIONS
+    rng = random.Random(seed)
+    targets = ["notepad", "calculator", "google chrome", "word", "excel", "powerpoint", "gmail", "youtube"]
+    commands = [action.command for action in BUILTIN_ACTIONS]
+    router = CommandRouter(commands)
+    phrases = router.phrases()
+    utterances = []
+    for _ in range(count):
+        phrase = rng.choice(phrases)
+        spec_name = router.route(phrase).name
+        suffix = f" {rng.choice(targets)}" if router.specs[spec_name].slot else ""
+        filler = rng.choice(["", "please ", "can you ", "hey cerp "])
+        utterances.append(f"{filler}{phrase}{suffix}")
+    keys = ["error", "sorry"] + [spec.name for spec in commands]
+    started = time.perf_counter()
+    for utterance in utterances:
+        # Previous behaviour: substring scan in process_command, then execute_task rebuilt its
+        # lambda table and scanned it again with startswith on every call.
+        lowered = utterance.lower()
+        next((key for key in keys if key in lowered), None)
+        parts = utterance.split(maxsplit=2)
+        args = parts[1] if len(parts) > 1 else ""
+        task_mapping = {key: (lambda: args) for key in keys}
+        next((func for key, func in task_mapping.items() if utterance.startswith(key)), None)
+    legacy = time.perf_counter() - started
+    started = time.perf_counter()
+    for utterance in utterances:
+        router.route(utterance)
+    trie = time.perf_counter() - started
+    print(f"{count} utterances: legacy two-stage scan {1e6 * legacy / count:.2f} us/utt, "
+          f"trie router {1e6 * trie / count:.2f} us/utt")
+
+
+if __name__ == "__main__":
+    benchmark()
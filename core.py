@@ -0,0 +1,262 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Set
+from action_executor import ActionExecutor
+from events import ActionResult, CoreEvent
+from speech import SpeechProcessor
+from wakeword import CLOUD_NOTICE, WakeWordDetector, build_wake_word_detector
+
+
+class CERPCore:
+    """One asyncio loop, on its own thread, that owns wake-word detection, listening and action scheduling.
+
+    Blocking work runs behind dedicated executors: one thread for the wake-word detector, one for listen(),
+    and the ActionExecutor's workers for actions. Events are handled in arrival order on the loop, so a wake
+    word that fires while a command is being heard, or during dictation, is dropped rather than racing it.
+    Listeners are called on the loop thread and must not block.
+    """
+
+    def __init__(self, speech: SpeechProcessor, executor: Optional[ActionExecutor] = None,
+                 detector_factory: Callable[[], WakeWordDetector] = build_wake_word_detector):
+        self.speech = speech
+        self.auto = speech.auto
+        self.tracer = speech.tracer
+        self.executor = executor or ActionExecutor()
+        self.detector_factory = detector_factory
+        self.detector: Optional[WakeWordDetector] = None
+        self.listeners: List[Callable[[CoreEvent], None]] = []
+        self.wake_ignored = 0
+        # Things the user should know about how CERP runs; also sent as "notice" events.
+        self.notices: List[str] = []
+        self.loop = asyncio.new_event_loop()
+        self._listen_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cerp-listen")
+        # Fuzzy resolution over a large catalog takes milliseconds, so routing stays off the loop too.
+        self._route_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cerp-route")
+        self._wake_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cerp-wake")
+        self._wake_stop = threading.Event()
+        self._tasks: Set[asyncio.Task] = set()
+        self._listening = False
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def listening(self) -> bool:
+        return self._listening
+
+    # Thread-safe entry points
+
+    def start(self):
+        """Start the loop thread and return once it is running."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="cerp-core")
+        self._thread.start()
+        self._ready.wait()
+        logging.info("Core event loop started.")
+
+    def request_listen(self, origin: str = "button"):
+        """Listen for one command and run it, unless a listen is already in progress."""
+        self.loop.call_soon_threadsafe(self._spawn, self._listen_and_run(origin))
+
+    def start_wake_word(self):
+        """Start listening for the wake word in the background."""
+        self.loop.call_soon_threadsafe(self._spawn, self._wake_word())
+
+    def submit(self, command: str, trace_id: Optional[str] = None) -> concurrent.futures.Future:
+        """Run a text command as if it had been spoken; the future resolves to its ActionResult."""
+        return asyncio.run_coroutine_threadsafe(self.run_command(command, trace_id), self.loop)
+
+    def stop(self, timeout: float = 5.0):
+        """Cancel listening and pending actions, stop the loop and join every thread the core started."""
+        if self._thread is None:
+            return
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("CERPCore.stop() must not be called from the core thread")
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except (concurrent.futures.TimeoutError, RuntimeError) as e:
+            logging.warning(f"Core shutdown incomplete: {e!r}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+        self._listen_pool.shutdown(wait=True)
+        self._route_pool.shutdown(wait=True)
+        self._wake_pool.shutdown(wait=True)
+        logging.info("Core event loop stopped.")
+
+    # Loop side
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    async def _shutdown(self):
+        self._wake_stop.set()
+        self.speech.cancel_listen()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.executor.shutdown()
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = self.loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Core task failed: {task.exception()!r}")
+
+    def _emit(self, name: str, payload: object = None):
+        event = CoreEvent(name, payload)
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logging.error(f"Core listener failed on {name}: {e}")
+
+    def _notice(self, message: str):
+        if message not in self.notices:
+            self.notices.append(message)
+            self._emit("notice", message)
+
+    async def _wake_word(self):
+        self._wake_stop.clear()
+        try:
+            if self.detector is None:
+                self.detector = await self.loop.run_in_executor(self._wake_pool, self.detector_factory)
+                if self.detector.spotter.cloud:
+                    self._notice(CLOUD_NOTICE)
+            subscription = self.speech.capture.subscribe("wake")
+        except OSError as e:
+            logging.error(f"Wake-word listener could not open microphone: {e}")
+            self._emit("error", f"Error: {e}")
+            return
+        logging.info("Listening for 'hello' wake word...")
+        detected = lambda: self.loop.call_soon_threadsafe(self._on_wake)
+        try:
+            await self.loop.run_in_executor(self._wake_pool, self.detector.run, subscription, detected,
+                                            lambda: not self._wake_stop.is_set())
+        except asyncio.CancelledError:
+            # The detector thread cannot be interrupted; it returns at its next frame once told to stop.
+            self._wake_stop.set()
+            raise
+        finally:
+            subscription.close()
+            logging.info(f"Wake-word metrics: {self.detector.metrics()}")
+
+    def _on_wake(self):
+        self._emit("wake")
+        if self._listening or self.auto.voice_typing_active:
+            # Dictation owns the microphone until its stop phrase; a second listen would only race the first.
+            self.wake_ignored += 1
+            logging.info("Wake word ignored: already listening or dictating.")
+            return
+        self._spawn(self._listen_and_run("wake"))
+
+    async def _listen_and_run(self, origin: str):
+        if self._listening:
+            return
+        self._listening = True
+        self._emit("listening", origin)
+        on_partial = lambda text: self.loop.call_soon_threadsafe(self._emit, "partial", text)
+        try:
+            command = await self.loop.run_in_executor(self._listen_pool, self.speech.listen, on_partial)
+        except asyncio.CancelledError:
+            self.speech.cancel_listen()
+            raise
+        finally:
+            self._listening = False
+            self._emit("idle")
+        trace_id, self.speech.last_trace_id = self.speech.last_trace_id, None
+        await self.run_command(command or "Sorry, no command recognized.", trace_id)
+
+    async def run_command(self, command: str, trace_id: Optional[str] = None) -> ActionResult:
+        """Interpret a command with SpeechProcessor.interpret() and run it on the executor.
+
+        Closes the command's trace and records it in history.
+        """
+        if trace_id is None:
+            trace_id = self.tracer.start_trace()
+        with self.tracer.span(trace_id, "routing"):
+            interpretation = await self.loop.run_in_executor(self._route_pool, self.speech.interpret, command)
+        kind = interpretation.kind
+        self.tracer.set_kind(trace_id, kind)
+        if interpretation.status == "error":
+            self.tracer.finish(trace_id, "error")
+            self.auto.history.record(command, kind, "error", command)
+            self._emit("error", command)
+            return ActionResult(0, kind, "error", command, 0.0)
+        self._emit("recognized", command)
+        if interpretation.reply is not None:
+            result = ActionResult(0, kind, interpretation.status, interpretation.reply, 0.0)
+        else:
+            result = await self._run_action(kind, self.auto.perform, interpretation)
+            finished = time.monotonic()
+            self.tracer.add_span(trace_id, "action", finished - result.latency, finished)
+        # Suggestions are not failures of the command pipeline, so the trace still counts them as done.
+        self.tracer.finish(trace_id, "done" if result.status == "suggested" else result.status)
+        self.auto.history.record(command, result.kind, result.status, result.result, result.latency)
+        self._emit("result", (command, result))
+        return result
+
+    async def _run_action(self, kind: str, func: Callable[..., str], *args) -> ActionResult:
+        """Await an ActionExecutor action; cancelling the await abandons the action."""
+        future = self.loop.create_future()
+
+        def settle(result: ActionResult):
+            if not future.done():
+                future.set_result(result)
+
+        handle = self.executor.submit(kind, func, *args,
+                                      on_done=lambda result: self.loop.call_soon_threadsafe(settle, result))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.executor.cancel(handle.action_id)
+            raise
+
+
+if __name__ == "__main__":
+    from audio_pipeline import CaptureService
+    from benchmark import ScriptedRecognizer, build_fake_automation, synthesize
+    from logging_config import configure_logging
+
+    # Headless check: overlapping wake words and typed commands, then a clean shutdown with no threads left.
+    configure_logging()
+    before = set(threading.enumerate())
+    recognizer = ScriptedRecognizer()
+    recognizer.script("skip next")
+    capture = CaptureService(synthesize("skip next"))
+    processor = SpeechProcessor(capture=capture, backend=recognizer, automation=build_fake_automation())
+    core = CERPCore(processor)
+    events = []
+    core.listeners.append(lambda event: events.append(event.name))
+    core.start()
+    core.request_listen()
+    for _ in range(3):
+        core.loop.call_soon_threadsafe(core._on_wake)
+    started = time.perf_counter()
+    futures = [core.submit(command) for command in ("volume up", "system status", "skip shorts") * 10]
+    results = [future.result(10) for future in futures]
+    elapsed = time.perf_counter() - started
+    time.sleep(1.5)
+    core.stop()
+    processor.auto.shutdown()
+    capture.stop()
+    leaked = [thread.name for thread in set(threading.enumerate()) - before if thread.is_alive()]
+    print(f"{len(results)} typed commands in {1000 * elapsed:.0f} ms, "
+          f"statuses {sorted(set(result.status for result in results))}")
+    print(f"events: {', '.join(dict.fromkeys(events))}; wake words ignored while listening: {core.wake_ignored}")
+    print(f"threads left after stop: {leaked or 'none'}")
@@ -0,0 +1,127 @@
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Dict, Optional
+from action_executor import ActionExecutor
+from actions import COST_TIMEOUTS
+from core import CERPCore
+from ipc import CERPClient, CommandServer, default_address
+from logging_config import configure_logging
+from preload import Preloader
+from recognition_cache import CachingRecognizer
+from speech import SpeechProcessor
+from vad import VAD_PROFILES
+
+
+class CERPDaemon:
+    """Headless CERP: keeps SpeechProcessor and Automation warm and serves them over the local command API.
+
+    The GUI, scripts and other clients connect to `address` (see ipc.py); the daemon owns the microphone,
+    the wake-word listener, the action executor and the command history.
+    """
+
+    def __init__(self, address: Optional[str] = None, vad_profile: str = "default",
+                 preload_budget_mb: float = 256.0, wake_word: bool = True,
+                 speech: Optional[SpeechProcessor] = None):
+        self.speech = speech or SpeechProcessor(vad_profile=vad_profile)
+        self.auto = self.speech.auto
+        self.tracer = self.speech.tracer
+        # Timeouts follow each action's declared cost class; a compound utterance costs as much as a macro.
+        self.executor = ActionExecutor(timeouts={**self.auto.actions.timeouts(), "plan": COST_TIMEOUTS["compound"]})
+        self.core = CERPCore(self.speech, self.executor)
+        self.preloader = Preloader(self.auto, memory_budget_mb=preload_budget_mb) if preload_budget_mb > 0 else None
+        self.wake_word = wake_word
+        self.server = CommandServer(self.core, address, status=self.status,
+                                    handlers={"history_summary": self._history_summary},
+                                    on_shutdown=self.request_stop)
+        self.started: Optional[float] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.core.start()
+        self.server.start()
+        if self.wake_word:
+            self.core.start_wake_word()
+        if self.preloader is not None:
+            self.preloader.start()
+        self.started = time.monotonic()
+        logging.info(f"CERP daemon running (pid {os.getpid()}).")
+
+    def request_stop(self):
+        """Thread-safe (and signal-safe): make serve_forever() return."""
+        self._stop.set()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            # Wake regularly so signal handlers get to run on the main thread.
+            while not self._stop.wait(0.5):
+                pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Close the API, stop the core and the background helpers, and log the session's stats."""
+        self.server.close()
+        self.core.stop()
+        logging.info(f"Action latency report: {self.executor.latency_report()}")
+        logging.info(f"Command latency by stage:\n{self.tracer.format_summary()}")
+        if isinstance(self.speech.backend, CachingRecognizer):
+            logging.info(f"Recognition cache: {self.speech.backend.stats()}")
+            self.speech.backend.cache.close()
+        if self.preloader is not None:
+            self.preloader.stop()
+            logging.info(f"Preloading: {self.preloader.stats()}")
+        self.auto.shutdown()
+        self.auto.history.close()
+        self.speech.capture.stop()
+        logging.info("CERP daemon stopped.")
+
+    def status(self) -> Dict:
+        status = {"pid": os.getpid(), "uptime": time.monotonic() - self.started if self.started else 0.0,
+                  "commands": len(self.auto.history), "latency": self.executor.latency_report(),
+                  "stuck_actions": self.executor.stuck()}
+        if self.preloader is not None:
+            status["preloading"] = self.preloader.stats()
+        return status
+
+    async def _history_summary(self, request: Dict) -> str:
+        return self.auto.history.summary()
+
+
+def is_running(address: str) -> bool:
+    """True if a daemon already answers at `address`."""
+    client = CERPClient(address)
+    try:
+        client.connect(timeout=1.0)
+        return client.request("ping", timeout=1.0) == "pong"
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CERP Voice Automation daemon")
+    parser.add_argument('--address', default=default_address(),
+                        help="Unix socket path (or \\\\.\\pipe\\name on Windows) to serve the command API on")
+    parser.add_argument('--vad-profile', default="default", choices=sorted(VAD_PROFILES),
+                        help="How long to wait for pauses before a command ends (slow suits slower speech)")
+    parser.add_argument('--preload-budget-mb', type=float, default=256.0,
+                        help="File data to pre-warm for likely next applications (0 disables preloading)")
+    parser.add_argument('--no-wake-word', action='store_true', help="Do not listen for the 'hello' wake word")
+    args = parser.parse_args()
+
+    configure_logging()
+    if is_running(args.address):
+        print(f"CERP daemon already running at {args.address}")
+        sys.exit(1)
+    daemon = CERPDaemon(args.address, vad_profile=args.vad_profile, preload_budget_mb=args.preload_budget_mb,
+                        wake_word=not args.no_wake_word)
+    signal.signal(signal.SIGINT, lambda *_: daemon.request_stop())
+    signal.signal(signal.SIGTERM, lambda *_: daemon.request_stop())
+    daemon.serve_forever()
@@ -0,0 +1,254 @@
+import logging
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+import speech_recognition as sr
+from audio_pipeline import CaptureService, SyntheticSource
+from recognizers import RecognizerBackend
+from vad import EnergyGate
+
+
+class TextSink:
+    """Destination for recognized text."""
+
+    def inject(self, text: str):
+        raise NotImplementedError
+
+
+class ClipboardPasteSink(TextSink):
+    """Inserts text with one clipboard paste, restoring the previous clipboard afterwards.
+
+    Without the pyperclip package the text is typed instead, as KeystrokeSink does.
+    """
+
+    def __init__(self, restore_clipboard: bool = True):
+        self.restore_clipboard = restore_clipboard
+        self._warned = False
+
+    def inject(self, text: str):
+        import pyautogui
+        try:
+            import pyperclip
+        except ImportError:
+            if not self._warned:
+                self._warned = True
+                logging.warning("pyperclip is not installed (pip install pyperclip); "
+                                "dictation types text key by key instead of pasting it.")
+            pyautogui.write(text, interval=0)
+            return
+        previous = pyperclip.paste() if self.restore_clipboard else None
+        pyperclip.copy(text)
+        pyautogui.hotkey("command" if sys.platform == "darwin" else "ctrl", "v")
+        if previous is not None:
+            # Give the target application a moment to read the clipboard before restoring it.
+            time.sleep(0.05)
+            pyperclip.copy(previous)
+
+
+class KeystrokeSink(TextSink):
+    """Types text with a single pyautogui call and no per-character delay."""
+
+    def inject(self, text: str):
+        import pyautogui
+        pyautogui.write(text, interval=0)
+
+
+class FakeTextSink(TextSink):
+    """Collects injected text in memory for tests and benchmarks."""
+
+    def __init__(self):
+        self.texts: List[Tuple[float, str]] = []
+
+    def inject(self, text: str):
+        self.texts.append((time.monotonic(), text))
+
+
+class DictationEngine:
+    """Capture, VAD segmentation, recognition and text injection as stages joined by bounded queues."""
+
+    def __init__(self, capture: CaptureService, backend: RecognizerBackend, sink: TextSink,
+                 stop_phrase: str = "stop voice typing", on_stop: Optional[Callable[[], None]] = None,
+                 gate: Optional[EnergyGate] = None, max_utterance: float = 10.0, queue_size: int = 8,
+                 preroll_frames: int = 5):
+        self.capture = capture
+        self.backend = backend
+        self.sink = sink
+        self.stop_phrase = stop_phrase
+        self.on_stop = on_stop
+        self.gate = gate or EnergyGate()
+        self.max_utterance = max_utterance
+        self.preroll_frames = preroll_frames
+        self.utterances: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.texts: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.latencies: List[float] = []
+        self.dropped = 0
+        self.characters = 0
+        self._running = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._subscription = None
+        self._started_at = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self._running.is_set()
+
+    def start(self):
+        """Subscribe to capture and start the segmentation, recognition and injection stages."""
+        if self.active:
+            return
+        self._subscription = self.capture.subscribe("dictation", max_frames=1000)
+        self._running.set()
+        self._started_at = time.monotonic()
+        self._threads = [
+            threading.Thread(target=self._segment_loop, name="cerp-dictation-vad", daemon=True),
+            threading.Thread(target=self._recognize_loop, name="cerp-dictation-asr", daemon=True),
+            threading.Thread(target=self._inject_loop, name="cerp-dictation-inject", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logging.info("Dictation engine started.")
+
+    def stop(self, wait: bool = True):
+        """Stop all stages; queued text that was already recognized is still injected."""
+        if not self.active:
+            return
+        self._running.clear()
+        if self._subscription is not None:
+            self._subscription.close()
+        if wait:
+            for thread in self._threads:
+                if thread is not threading.current_thread():
+                    thread.join(timeout=5)
+        logging.info(f"Dictation engine stopped: {self.metrics()}")
+
+    def metrics(self) -> Dict[str, float]:
+        """Utterance count, mean/max endpoint-to-injection latency, dropped utterances and throughput."""
+        elapsed = max(1e-6, time.monotonic() - self._started_at)
+        return {
+            "utterances": len(self.latencies),
+            "latency_mean_ms": 1000 * sum(self.latencies) / len(self.latencies) if self.latencies else 0.0,
+            "latency_max_ms": 1000 * max(self.latencies) if self.latencies else 0.0,
+            "dropped": self.dropped,
+            "chars_per_second": self.characters / elapsed,
+        }
+
+    def _put(self, stage_queue: "queue.Queue", item) -> bool:
+        while self.active:
+            try:
+                stage_queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _segment_loop(self):
+        source = self._subscription
+        preroll = deque(maxlen=self.preroll_frames)
+        frames = []
+        max_frames = int(self.max_utterance * source.SAMPLE_RATE / source.CHUNK)
+        try:
+            while self.active:
+                frame = source.get(timeout=0.5)
+                if frame is None:
+                    if source.closed:
+                        break
+                    continue
+                speech = self.gate.process(frame.data)
+                if not frames:
+                    preroll.append(frame)
+                    if speech:
+                        frames = list(preroll)
+                        preroll.clear()
+                    continue
+                frames.append(frame)
+                # Endpoint when the gate's hangover runs out, or cut overly long utterances.
+                if not speech or len(frames) >= max_frames:
+                    audio = sr.AudioData(b"".join(f.data for f in frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                    if not self._put(self.utterances, (time.monotonic(), audio)):
+                        self.dropped += 1
+                    frames = []
+        finally:
+            self._put_sentinel(self.utterances)
+
+    def _recognize_loop(self):
+        try:
+            while True:
+                item = self.utterances.get()
+                if item is None:
+                    break
+                endpoint, audio = item
+                try:
+                    text = self.backend.recognize(audio)
+                except sr.UnknownValueError:
+                    logging.warning("Could not understand audio.")
+                    continue
+                except sr.RequestError as e:
+                    logging.error(f"Speech recognition request failed: {e}")
+                    continue
+                if self.stop_phrase in text.lower():
+                    logging.info("Stop phrase heard, ending dictation.")
+                    self._running.clear()
+                    if self._subscription is not None:
+                        self._subscription.close()
+                    if self.on_stop is not None:
+                        self.on_stop()
+                    break
+                self._put(self.texts, (endpoint, text))
+        finally:
+            self._put_sentinel(self.texts)
+
+    def _inject_loop(self):
+        while True:
+            item = self.texts.get()
+            if item is None:
+                break
+            endpoint, text = item
+            try:
+                self.sink.inject(text + " ")
+            except Exception as e:
+                logging.error(f"Text injection failed: {e}")
+                continue
+            self.characters += len(text) + 1
+            self.latencies.append(time.monotonic() - endpoint)
+            logging.info(f"Typed: {text}")
+
+    @staticmethod
+    def _put_sentinel(stage_queue: "queue.Queue"):
+        # The consumer must see the end marker even if the queue is full of abandoned items.
+        while True:
+            try:
+                stage_queue.put_nowait(None)
+                return
+            except queue.Full:
+                try:
+                    stage_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+class _ScriptedRecognizer(RecognizerBackend):
+    """Benchmark backend returning fixed words after a simulated decode delay."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        time.sleep(self.delay)
+        return "lorem ipsum dolor sit amet"
+
+
+if __name__ == "__main__":
+    # Ten one-second utterances separated by short pauses, replayed in real time.
+    segments = [(1.0, 0.0, 0)] + [(1.0, 0.3, 440), (0.4, 0.0, 0)] * 10 + [(1.0, 0.0, 0)]
+    capture = CaptureService(SyntheticSource(segments, realtime=True))
+    sink = FakeTextSink()
+    engine = DictationEngine(capture, _ScriptedRecognizer(delay=0.6), sink)
+    engine.start()
+    while capture.running or not engine.utterances.empty() or not engine.texts.empty():
+        time.sleep(0.1)
+    time.sleep(1.0)
+    engine.stop()
+    print(f"{len(sink.texts)} utterances injected: {engine.metrics()}")
@@ -0,0 +1,23 @@
+from typing import NamedTuple
+
+
+# Plain data shared by the core, the daemon and its clients. This module imports nothing heavy, so the GUI and
+# IPC clients can use these types without loading speech recognition or automation.
+
+
+class ActionResult(NamedTuple):
+    """Outcome of one submitted action; status is done, error, timeout, cancelled or rejected."""
+    action_id: int
+    kind: str
+    status: str
+    result: str
+    latency: float
+
+
+class CoreEvent(NamedTuple):
+    """Something the core reports to its listeners (the GUI, IPC clients).
+
+    name is one of: wake, listening, partial, recognized, result, error, idle, notice.
+    """
+    name: str
+    payload: object = None
@@ -0,0 +1,76 @@
+import json
+import re
+from typing import Iterable, List, Optional, Tuple
+from command_router import read_number
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+class CommandGrammar:
+    """Closed set of command phrases CERP can act on, compiled for recognizer backends.
+
+    Numeric commands ("set volume to") are kept as slot patterns: any number said after them matches, but
+    only the bare command is a phrase, so fuzzy matching is not swamped by every command-number pair.
+    """
+
+    def __init__(self, phrases: Iterable[str], numeric_commands: Iterable[str] = (), numbers: Iterable[str] = ()):
+        self.phrases = sorted({phrase.lower().strip() for phrase in phrases if phrase.strip()})
+        self.numeric_commands = sorted({command.lower().strip() for command in numeric_commands},
+                                       key=lambda command: (-len(command.split()), command))
+        self.numbers = list(numbers)
+        self.words = sorted({word for phrase in self.recognizer_phrases for word in phrase.split()})
+        # Automation matches targets with spaces removed, so "note pad" must still hit "notepad".
+        self._compact = {phrase.replace(" ", ""): phrase for phrase in self.phrases}
+        self._numeric = [tuple(command.split()) for command in self.numeric_commands]
+
+    @classmethod
+    def from_vocabulary(cls, commands: Iterable[str], targets: Iterable[str],
+                        target_commands: Iterable[str] = ("open", "close"),
+                        numeric_commands: Iterable[str] = (), numbers: Iterable[str] = ()) -> "CommandGrammar":
+        """Expand target commands with every known target; numeric commands take a number slot."""
+        target_commands = list(target_commands)
+        targets = list(targets)
+        phrases = [command for command in commands if command not in target_commands]
+        phrases.extend(f"{command} {target}" for command in target_commands for target in targets)
+        return cls(phrases, numeric_commands, numbers)
+
+    @property
+    def recognizer_phrases(self) -> List[str]:
+        """Phrases with every numeric command spelled out with every number, for phrase-list recognizers."""
+        return self.phrases + [f"{command} {number}" for command in self.numeric_commands for number in self.numbers]
+
+    def canonical(self, text: str) -> Optional[str]:
+        """Return the grammar phrase that text spells, or None if it is out of grammar."""
+        phrase = self._compact.get(text.lower().replace(" ", ""))
+        if phrase is not None:
+            return phrase
+        tokens = _TOKEN.findall(text.lower())
+        for command in self._numeric:
+            if tuple(tokens[:len(command)]) != command:
+                continue
+            value, used = read_number(tokens[len(command):])
+            if value is not None and tokens[len(command) + used:] in ([], ["percent"]):
+                return " ".join(tokens)
+        return None
+
+    def matches(self, text: str) -> bool:
+        return self.canonical(text) is not None
+
+    def best_alternative(self, alternatives: Iterable[str]) -> Optional[str]:
+        """Pick the highest-ranked alternative transcript that is in grammar."""
+        for alternative in alternatives:
+            phrase = self.canonical(alternative)
+            if phrase is not None:
+                return phrase
+        return None
+
+    def to_vosk_json(self) -> str:
+        """Phrase list in the format accepted by vosk.KaldiRecognizer."""
+        return json.dumps(self.recognizer_phrases + ["[unk]"])
+
+    def keyword_entries(self, sensitivity: float = 0.8) -> List[Tuple[str, float]]:
+        """Keyword list in the format accepted by recognize_sphinx."""
+        return [(phrase, sensitivity) for phrase in self.recognizer_phrases]
+
+    def __len__(self) -> int:
+        return len(self.phrases)
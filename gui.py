@@ -1,94 +1,175 @@
 import sys
+import os
 import logging
 import argparse
+import subprocess
+import threading
+import time
+from startup import StartupProfiler
+
+# Installed before the heavy imports below so the startup report can attribute their cost.
+STARTUP = StartupProfiler().install()
+
 from PyQt6.QtWidgets import (
-    QPushButton, QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QTextEdit, QScrollArea
-)
-from PyQt6.QtGui import QFont, QTextCursor
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from speech import SpeechProcessor
-from automation import Automation
-from logging.handlers import RotatingFileHandler
-import os
-import speech_recognition as sr
-
-# Ensure the logs directory exists
-log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-# Configure logging with rotation
-handler = RotatingFileHandler('logs/cerp.log', maxBytes=5 * 1024 * 1024, backupCount=2)
-logging.basicConfig(
-    handlers=[handler],
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    QPushButton, QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QTextEdit, QScrollArea, QListView
 )
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QObject, QTimer, QAbstractListModel, QModelIndex, pyqtSignal
+from vad import VAD_PROFILES
+from typing import Callable, List, Optional
+from events import ActionResult, CoreEvent
+from ipc import CERPClient, default_address
+from logging_config import configure_logging
+from history import HistoryEntry, HistoryStore
+
+# The daemon owns logs/cerp.log; two processes rotating one file would lose records.
+LOG_PATH = "logs/cerp-gui.log"
 
-class SpeechThread(QThread):
-    """Thread for running speech recognition without freezing the UI."""
-    result_signal = pyqtSignal(str)
+class CoreBridge(QObject):
+    """Carries daemon events and request replies from the client's connection thread to the UI thread as queued Qt
+    signals, so the UI thread never waits on the daemon."""
+    event = pyqtSignal(object)
+    reply = pyqtSignal(object, object, object)
 
-    def __init__(self, speech_processor):
+    REQUEST_TIMEOUT = 5.0
+
+    def __init__(self):
         super().__init__()
-        self.speech = speech_processor
+        self.reply.connect(self._deliver)
+
+    def post(self, event: CoreEvent):
+        self.event.emit(event)
 
-    def run(self):
+    def call(self, client: CERPClient, op: str, on_reply: Callable[[object, Optional[Exception]], None], **params):
+        """Send a request and return at once; on_reply(result, error) runs later on the UI thread, exactly once."""
         try:
-            logging.info("Speech recognition thread started.")
-            command = self.speech.listen()
-            self.result_signal.emit(command if command else "Sorry, no command recognized.")
-        except Exception as e:
-            logging.error(f"Speech thread failed: {e}")
-            self.result_signal.emit(f"Error: {str(e)}")
+            future = client.send(op, **params)
+        except ConnectionError as e:
+            on_reply(None, e)
+            return
+        pending = [on_reply]
 
-class HelloListenerThread(QThread):
-    """Thread to listen for the 'hello' wake word to trigger voice control."""
-    hello_detected = pyqtSignal()
+        def settle(result, error):
+            # Both the reply and the timeout arrive on the UI thread, so whichever comes first wins.
+            if pending:
+                pending.pop()(result, error)
+        QTimer.singleShot(int(1000 * self.REQUEST_TIMEOUT),
+                          lambda: settle(None, TimeoutError(f"no reply to {op} within {self.REQUEST_TIMEOUT:.0f} s")))
+        # Runs on the client's connection thread; the signal hands the outcome to the UI thread.
+        future.add_done_callback(lambda done: self.reply.emit(settle, *(
+            (None, done.exception()) if done.exception() is not None else (done.result(), None))))
 
-    def __init__(self):
+    def _deliver(self, settle, result, error):
+        settle(result, error)
+
+
+class HistoryModel(QAbstractListModel):
+    """Newest-first view of a HistoryStore that loads rows a page at a time as the list scrolls."""
+
+    PAGE_SIZE = 50
+    MAX_PAGES = 4
+
+    def __init__(self, store: HistoryStore):
         super().__init__()
-        self.recognizer = sr.Recognizer()
-        self.running = True
+        self.store = store
+        self.rows = len(store)
+        self._pages = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entry(index.row())
+        if entry is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            when = time.strftime("%d %b %H:%M", time.localtime(entry.timestamp))
+            return f"{when}  > {entry.command}  -  {entry.result}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{entry.kind}, {entry.status}, {1000 * entry.latency:.0f} ms"
+        return None
+
+    def _entry(self, row: int) -> Optional[HistoryEntry]:
+        number, offset = divmod(row, self.PAGE_SIZE)
+        page = self._pages.get(number)
+        if page is None:
+            # Rows are counted from the newest entry at the time the model last changed.
+            page = self.store.page(len(self.store) - self.rows + number * self.PAGE_SIZE, self.PAGE_SIZE)
+            self._pages[number] = page
+            while len(self._pages) > self.MAX_PAGES:
+                del self._pages[next(iter(self._pages))]
+        return page[offset] if offset < len(page) else None
+
+    def refresh(self):
+        """Show entries the daemon has recorded since the last refresh."""
+        added = len(self.store.refresh())
+        if not added:
+            return
+        self.beginInsertRows(QModelIndex(), 0, added - 1)
+        self.rows += added
+        self._pages.clear()
+        self.endInsertRows()
 
-    def run(self):
-        with sr.Microphone() as source:
-            self.recognizer.adjust_for_ambient_noise(source)
-            while self.running:
-                try:
-                    logging.info("Listening for 'hello' wake word...")
-                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=3)
-                    command = self.recognizer.recognize_google(audio, language="en-US").lower()
-                    if "hello" in command:
-                        logging.info("Detected 'hello' wake word.")
-                        self.hello_detected.emit()
-                except sr.WaitTimeoutError:
-                    continue
-                except sr.UnknownValueError:
-                    continue
-                except sr.RequestError as e:
-                    logging.error(f"Speech recognition request failed: {e}")
-                except Exception as e:
-                    logging.error(f"Hello listener failed: {e}")
-
-    def stop(self):
-        self.running = False
 
 class CERPApp(QMainWindow):
-    """Main GUI for CERP Voice Automation with enhanced accessibility."""
+    """Main GUI for CERP Voice Automation with enhanced accessibility.
 
-    def __init__(self):
+    A thin client of the CERP daemon (daemon.py): commands, listening and latency go over the local command
+    API, and the history list reads the daemon's history database directly. If no daemon is running, the
+    GUI starts one and shuts it down again on exit.
+    """
+
+    # Connect anyway if no paint arrives (e.g. launched with --minimized).
+    DEFERRED_START_FALLBACK_MS = 1000
+    DAEMON_START_TIMEOUT = 30.0
+
+    def __init__(self, startup: Optional[StartupProfiler] = None, print_startup_report: bool = False,
+                 address: Optional[str] = None, daemon_args: Optional[List[str]] = None):
         super().__init__()
         self.setWindowTitle("CERP - Voice & Automation")
         self.setGeometry(100, 100, 800, 600)
+        self.startup = startup or StartupProfiler()
+        self.print_startup_report = print_startup_report
+        self.startup_finished = False
 
-        self.auto = Automation()
-        self.speech = SpeechProcessor()
+        self.address = address or default_address()
+        self.daemon_args = daemon_args or []
+        self.daemon_process: Optional[subprocess.Popen] = None
+        self._connector: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+        # Listening, wake-word detection and actions all run in the daemon; the GUI only renders its events.
+        self.bridge = CoreBridge()
+        self.bridge.event.connect(self.on_core_event)
+        self.client = CERPClient(self.address, on_event=self.bridge.post)
+        self.history = HistoryStore()
 
-        self.initUI()
-        self.start_hello_listener()
+        with self.startup.phase("UI"):
+            self.initUI()
+        QTimer.singleShot(self.DEFERRED_START_FALLBACK_MS, self._finish_startup)
         logging.info("CERP GUI initialized.")
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.startup_finished:
+            # Defer the rest of startup until the first frame is on screen.
+            QTimer.singleShot(0, self._finish_startup)
+
+    def _finish_startup(self):
+        """Connect to the daemon (starting one if needed) and log the startup-time report."""
+        if self.startup_finished:
+            return
+        self.startup_finished = True
+        self.startup.mark("first paint" if self.isVisible() and not self.isMinimized() else "deferred start")
+        with self.startup.phase("daemon connection"):
+            self.connect_daemon()
+        self.startup.uninstall()
+        report = self.startup.report()
+        logging.info(report)
+        if self.print_startup_report:
+            print(report)
+
     def initUI(self):
         """Initialize the UI components with accessibility features."""
         central_widget = QWidget()
@@ -110,11 +191,41 @@ class CERPApp(QMainWindow):
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.status_label)
 
-        self.history_text = QTextEdit(self)
-        self.history_text.setFont(QFont("Arial", 14))
-        self.history_text.setReadOnly(True)
-        self.history_text.setFixedHeight(150)
-        layout.addWidget(self.history_text)
+        # Only the visible rows of the history are ever built, however long it grows.
+        self.history_model = HistoryModel(self.history)
+        self.history_view = QListView(self)
+        self.history_view.setModel(self.history_model)
+        self.history_view.setUniformItemSizes(True)
+        self.history_view.setFont(QFont("Arial", 14))
+        self.history_view.setFixedHeight(150)
+        layout.addWidget(self.history_view)
+
+        self.history_summary = QLabel(self)
+        self.history_summary.setFont(QFont("Arial", 12))
+        self.history_summary.setVisible(False)
+        layout.addWidget(self.history_summary)
+
+        self.history_btn = QPushButton("Show History Summary", self)
+        self.history_btn.setToolTip("Show this week's most used commands and the last hour's failures")
+        self.history_btn.clicked.connect(self.toggle_history_summary)
+        layout.addWidget(self.history_btn)
+
+        self.trace_panel = QTextEdit(self)
+        self.trace_panel.setFont(QFont("Courier New", 11))
+        self.trace_panel.setReadOnly(True)
+        self.trace_panel.setFixedHeight(180)
+        self.trace_panel.setVisible(False)
+        layout.addWidget(self.trace_panel)
+
+        self.trace_btn = QPushButton("Show Latency", self)
+        self.trace_btn.setToolTip("Show per-stage latency percentiles for recent commands")
+        self.trace_btn.clicked.connect(self.toggle_trace_panel)
+        layout.addWidget(self.trace_btn)
+
+        self.export_btn = QPushButton("Export Traces", self)
+        self.export_btn.setToolTip("Write recent command traces to logs/traces.jsonl")
+        self.export_btn.clicked.connect(self.export_traces)
+        layout.addWidget(self.export_btn)
 
         self.voice_btn = QPushButton("Use Voice Control", self)
         self.voice_btn.setStyleSheet("""
@@ -139,63 +250,170 @@ class CERPApp(QMainWindow):
         main_layout = QVBoxLayout(central_widget)
         main_layout.addWidget(scroll)
 
-    def start_hello_listener(self):
-        """Start the thread to listen for the 'hello' wake word."""
-        self.hello_thread = HelloListenerThread()
-        self.hello_thread.hello_detected.connect(self.run_speech_recognition)
-        self.hello_thread.start()
+    def connect_daemon(self):
+        """Connect to a running daemon, or start one and connect in the background once it is up."""
+        try:
+            self.client.connect()
+        except OSError:
+            command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "daemon.py"),
+                       "--address", self.address, *self.daemon_args]
+            logging.info(f"No CERP daemon at {self.address}; starting one.")
+            self.daemon_process = subprocess.Popen(command)
+            self.status_label.setText("Status: Starting CERP...")
+            self._connector = threading.Thread(target=self._wait_for_daemon, name="cerp-connect", daemon=True)
+            self._connector.start()
+            return
+        self._on_connected()
 
-    def run_speech_recognition(self):
-        """Start speech recognition in a separate thread for general commands."""
-        if hasattr(self, 'speech_thread') and self.speech_thread.isRunning():
+    def _wait_for_daemon(self):
+        deadline = time.monotonic() + self.DAEMON_START_TIMEOUT
+        while not self._closing.is_set() and time.monotonic() < deadline:
+            if self.daemon_process.poll() is not None:
+                break
+            try:
+                self.client.connect()
+            except OSError:
+                self._closing.wait(0.2)
+                continue
+            self._on_connected()
             return
-        self.voice_btn.setEnabled(False)
-        self.voice_btn.setText("Listening...")
-        self.status_label.setText("Status: Listening...")
-        self.speech_thread = SpeechThread(self.speech)
-        self.speech_thread.result_signal.connect(self.process_command)
-        self.speech_thread.finished.connect(lambda: self.voice_btn.setEnabled(True))
-        self.speech_thread.finished.connect(lambda: self.voice_btn.setText("Use Voice Control"))
-        self.speech_thread.start()
-
-    def process_command(self, command: str):
-        """Process general commands from speech recognition."""
-        if command.startswith("Error:") or command.lower().startswith("sorry"):
-            self.label.setText(command)
+        if not self._closing.is_set():
+            self.bridge.post(CoreEvent("error", "Error: CERP daemon did not start. See logs/cerp.log."))
+
+    def _on_connected(self):
+        self.client.subscribe()
+        self.bridge.post(CoreEvent("connected", self.address))
+
+    def request(self, op: str, on_reply: Callable[[object], None], **params):
+        """Send an API call without blocking; on_reply(result) runs on the UI thread, or the error is shown."""
+        def deliver(result, error):
+            if error is not None:
+                self.status_label.setText(f"Status: CERP daemon unavailable ({error}).")
+            else:
+                on_reply(result)
+        self.bridge.call(self.client, op, deliver, **params)
+
+    def run_speech_recognition(self):
+        """Listen for one command (ignored while a listen is already in progress)."""
+        if self.client.connected:
+            self.client.send("listen", origin="button")
+
+    def on_core_event(self, event: CoreEvent):
+        """Render a daemon event (runs on the UI thread)."""
+        if event.name == "connected":
+            logging.info(f"Connected to CERP daemon at {event.payload}")
+            self.status_label.setText("Status: Waiting for command... Say 'hello' to start voice control.")
+            self.history_model.refresh()
+            # Notices raised before this window connected (e.g. the wake word going to the cloud).
+            self.request("status", lambda status: self.show_notices(status.get("notices", [])))
+        elif event.name == "notice":
+            self.show_notices([event.payload])
+        elif event.name == "disconnected":
+            if not self._closing.is_set():
+                self.status_label.setText("Status: CERP daemon stopped.")
+                self.voice_btn.setEnabled(False)
+        elif event.name == "listening":
+            self.voice_btn.setEnabled(False)
+            self.voice_btn.setText("Listening...")
+            self.status_label.setText("Status: Listening...")
+        elif event.name == "partial":
+            self.status_label.setText(f"Status: Heard \"{event.payload}\"...")
+        elif event.name == "idle":
+            self.voice_btn.setEnabled(True)
+            self.voice_btn.setText("Use Voice Control")
+        elif event.name == "recognized":
+            self.label.setText(f"Executing: {event.payload}")
+            self.status_label.setText("Status: Executing command...")
+        elif event.name == "error":
+            self.label.setText(event.payload)
             self.status_label.setText("Status: Error occurred.")
-            self.history_text.append(f"> {command}\nResult: Error occurred\n")
-        else:
-            self.label.setText(f"Executing: {command}")
-            result = self.auto.execute_task(command)
-            if "exit" in command.lower():
-                self.status_label.setText("Status: Exiting application...")
-                self.history_text.append(f"> {command}\nResult: {result}\n")
-                cursor = self.history_text.textCursor()
-                cursor.movePosition(QTextCursor.MoveOperation.End)
-                self.history_text.setTextCursor(cursor)
-                QApplication.quit()
-                return
-            self.status_label.setText("Status: Command executed.")
-            self.history_text.append(f"> {command}\nResult: {result}\n")
-        cursor = self.history_text.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.history_text.setTextCursor(cursor)
+            self.history_model.refresh()
+        elif event.name == "result":
+            self.show_action_result(*event.payload)
+
+    def show_notices(self, notices: List[str]):
+        if notices:
+            logging.warning(" ".join(notices))
+            self.label.setText("\n".join(notices))
+
+    def show_action_result(self, command: str, result: ActionResult):
+        """Show the outcome of a finished action (runs on the UI thread)."""
+        self.label.setText(result.result)
+        self.history_model.refresh()
+        self.history_view.scrollToTop()
+        if result.kind == "exit" and result.status == "done":
+            self.status_label.setText("Status: Exiting application...")
+            self.close()
+            return
+        if self.trace_panel.isVisible():
+            self.request("latency", self.show_latency)
+        if self.history_summary.isVisible():
+            self.history_summary.setText(self.history.summary())
+        statuses = {"done": "Command executed.", "timeout": "Command timed out.", "cancelled": "Command cancelled.",
+                    "rejected": "Busy, command skipped.", "error": "Error occurred.",
+                    "suggested": "Not sure what you meant, see the suggestions."}
+        self.status_label.setText(f"Status: {statuses.get(result.status, result.status)}")
+
+    def show_latency(self, report: Optional[str]):
+        self.trace_panel.setPlainText(report or "")
+
+    def toggle_trace_panel(self):
+        """Show or hide the latency percentile panel."""
+        visible = not self.trace_panel.isVisible()
+        if visible:
+            self.request("latency", self.show_latency)
+        self.trace_panel.setVisible(visible)
+        self.trace_btn.setText("Hide Latency" if visible else "Show Latency")
+
+    def export_traces(self):
+        self.request("export_traces", lambda path: self.status_label.setText(f"Status: Traces written to {path}"))
+
+    def toggle_history_summary(self):
+        """Show or hide this week's most used commands and the last hour's failures."""
+        visible = not self.history_summary.isVisible()
+        if visible:
+            self.history_summary.setText(self.history.summary())
+        self.history_summary.setVisible(visible)
+        self.history_btn.setText("Hide History Summary" if visible else "Show History Summary")
 
     def closeEvent(self, event):
-        """Handle application close event to stop the hello listener thread."""
-        if hasattr(self, 'hello_thread'):
-            self.hello_thread.stop()
-            self.hello_thread.wait()
+        """Disconnect, and stop the daemon too if this window started it."""
+        self._closing.set()
+        if self._connector is not None:
+            self._connector.join(timeout=2)
+        if self.daemon_process is not None:
+            if self.client.connected:
+                # The window is closing anyway, so waiting here for the daemon to acknowledge is fine.
+                try:
+                    self.client.request("shutdown", timeout=CoreBridge.REQUEST_TIMEOUT)
+                except (ConnectionError, RuntimeError, TimeoutError) as e:
+                    logging.warning(f"CERP daemon did not acknowledge shutdown: {e}")
+            try:
+                self.daemon_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                logging.warning("CERP daemon did not stop; terminating it.")
+                self.daemon_process.terminate()
+        self.client.close()
+        self.history.close()
         event.accept()
 
 if __name__ == "__main__":
     # Parse command-line arguments to start minimized
     parser = argparse.ArgumentParser(description="CERP Voice Automation")
     parser.add_argument('--minimized', action='store_true', help="Start the application minimized")
+    parser.add_argument('--startup-report', action='store_true', help="Print the startup-time breakdown")
+    parser.add_argument('--address', default=default_address(), help="Command API address of the CERP daemon")
+    parser.add_argument('--vad-profile', default="default", choices=sorted(VAD_PROFILES),
+                        help="How long to wait for pauses before a command ends (used if the GUI starts the daemon)")
+    parser.add_argument('--preload-budget-mb', type=float, default=256.0,
+                        help="File data to pre-warm for likely next applications (used if the GUI starts the daemon)")
     args = parser.parse_args()
 
+    configure_logging(LOG_PATH)
     app = QApplication(sys.argv)
-    window = CERPApp()
+    STARTUP.mark("QApplication")
+    daemon_args = ["--vad-profile", args.vad_profile, "--preload-budget-mb", str(args.preload_budget_mb)]
+    window = CERPApp(STARTUP, print_startup_report=args.startup_report, address=args.address, daemon_args=daemon_args)
     if args.minimized:
         window.showMinimized()
     else:
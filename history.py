@@ -0,0 +1,185 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_PATH = os.path.join("data", "history.db")
+WEEK = 7 * 24 * 3600
+HOUR = 3600
+# Outcomes other than these count as failures.
+SUCCESS_STATUSES = ("done",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    command TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT NOT NULL,
+    latency REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_time ON history (timestamp);
+CREATE INDEX IF NOT EXISTS history_command ON history (command, timestamp);
+CREATE INDEX IF NOT EXISTS history_kind ON history (kind, timestamp);
+CREATE INDEX IF NOT EXISTS history_status ON history (status, timestamp);
+"""
+
+
+class HistoryEntry(NamedTuple):
+    """One executed command; `timestamp` is wall-clock time.time() seconds."""
+    id: int
+    timestamp: float
+    command: str
+    kind: str
+    status: str
+    result: str
+    latency: float
+
+
+def outcome(status: str, result: str) -> str:
+    """Action handlers report most failures as "Error ..." strings rather than exceptions."""
+    if status == "done" and result.lower().startswith("error"):
+        return "error"
+    return status
+
+
+class HistoryStore:
+    """Append-only command history in SQLite (WAL mode) with the most recent entries kept in memory.
+
+    Rows are never updated or deleted, so IDs are contiguous and row N from the newest is simply
+    `last_id - N`, which lets a view page through months of history without OFFSET scans.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, recent: int = 100):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Writes come from executor workers as well as the UI thread; the lock serializes them.
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # A crash may lose the last commits but never corrupts the log; fsync per command is not worth it.
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            rows = self._db.execute("SELECT * FROM history ORDER BY id DESC LIMIT ?", (recent,)).fetchall()
+            self._first_id, self._last_id = self._db.execute("SELECT MIN(id), MAX(id) FROM history").fetchone()
+        self._recent = deque((HistoryEntry(*row) for row in reversed(rows)), maxlen=recent)
+        self.listeners = []
+        logging.info(f"Command history opened at {path} ({len(self)} entries)")
+
+    def __len__(self) -> int:
+        if self._last_id is None:
+            return 0
+        return self._last_id - self._first_id + 1
+
+    def record(self, command: str, kind: str, status: str, result: str, latency: float = 0.0,
+               timestamp: Optional[float] = None) -> HistoryEntry:
+        """Append one command and its outcome, then notify listeners with the new entry."""
+        timestamp = time.time() if timestamp is None else timestamp
+        status = outcome(status, result)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO history (timestamp, command, kind, status, result, latency) VALUES (?, ?, ?, ?, ?, ?)",
+                (timestamp, command, kind, status, result, latency))
+            self._db.commit()
+            entry = HistoryEntry(cursor.lastrowid, timestamp, command, kind, status, result, latency)
+            if self._first_id is None:
+                self._first_id = entry.id
+            self._last_id = entry.id
+            self._recent.append(entry)
+        for callback in self.listeners:
+            try:
+                callback(entry)
+            except Exception as e:
+                logging.error(f"History listener failed: {e}")
+        return entry
+
+    def refresh(self) -> List[HistoryEntry]:
+        """Pick up entries another process (the daemon) has appended since the last look, oldest first."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM history WHERE id > ? ORDER BY id",
+                                    (self._last_id or 0,)).fetchall()
+            entries = [HistoryEntry(*row) for row in rows]
+            if entries:
+                if self._first_id is None:
+                    self._first_id = entries[0].id
+                self._last_id = entries[-1].id
+                self._recent.extend(entries)
+        return entries
+
+    def recent(self, limit: Optional[int] = None) -> List[HistoryEntry]:
+        """Newest entries, oldest first, served from memory."""
+        with self._lock:
+            entries = list(self._recent)
+        return entries[-limit:] if limit else entries
+
+    def page(self, row: int, count: int) -> List[HistoryEntry]:
+        """`count` entries starting `row` entries back from the newest, newest first."""
+        with self._lock:
+            if self._last_id is None:
+                return []
+            rows = self._db.execute("SELECT * FROM history WHERE id <= ? ORDER BY id DESC LIMIT ?",
+                                    (self._last_id - row, count)).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def most_used(self, since: Optional[float] = None, limit: int = 10) -> List[Tuple[str, int]]:
+        """Most frequent commands since `since` (default: the last week)."""
+        since = time.time() - WEEK if since is None else since
+        with self._lock:
+            return self._db.execute(
+                "SELECT command, COUNT(*) AS uses FROM history WHERE timestamp >= ? "
+                "GROUP BY command ORDER BY uses DESC, command LIMIT ?", (since, limit)).fetchall()
+
+    def failures(self, since: Optional[float] = None, limit: int = 50) -> List[HistoryEntry]:
+        """Commands that did not complete since `since` (default: the last hour), newest first."""
+        since = time.time() - HOUR if since is None else since
+        placeholders = ", ".join("?" for _ in SUCCESS_STATUSES)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM history WHERE status NOT IN ({placeholders}) AND timestamp >= ? "
+                "ORDER BY timestamp DESC LIMIT ?", (*SUCCESS_STATUSES, since, limit)).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def since(self, since: float, kind: Optional[str] = None) -> List[HistoryEntry]:
+        """Entries recorded since `since`, oldest first, optionally of one kind."""
+        with self._lock:
+            if kind is None:
+                rows = self._db.execute("SELECT * FROM history WHERE timestamp >= ? ORDER BY id", (since,)).fetchall()
+            else:
+                rows = self._db.execute("SELECT * FROM history WHERE kind = ? AND timestamp >= ? ORDER BY id",
+                                        (kind, since)).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def by_command(self, command: str, limit: int = 50) -> List[HistoryEntry]:
+        """Most recent runs of one command."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM history WHERE command = ? ORDER BY timestamp DESC LIMIT ?",
+                                    (command, limit)).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def outcomes(self, since: Optional[float] = None) -> Dict[str, int]:
+        """Entry count per status since `since` (default: the last week)."""
+        since = time.time() - WEEK if since is None else since
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM history WHERE timestamp >= ? GROUP BY status",
+                                         (since,)).fetchall())
+
+    def summary(self) -> str:
+        """Plain-text digest for the GUI: this week's most-used commands and the last hour's failures."""
+        used = self.most_used(limit=5)
+        failed = sum(count for status, count in self.outcomes(time.time() - HOUR).items()
+                     if status not in SUCCESS_STATUSES)
+        lines = ["Most used this week: " + (", ".join(f"{command} ({uses})" for command, uses in used) or "none")]
+        lines.append(f"Failures in the last hour: {failed}")
+        lines.extend(f"  {time.strftime('%H:%M', time.localtime(entry.timestamp))} {entry.command}: {entry.result}"
+                     for entry in self.failures(limit=5))
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
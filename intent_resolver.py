@@ -0,0 +1,182 @@
+import heapq
+import random
+import re
+import string
+import time
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+_NON_LETTERS = re.compile(r"[^a-z]")
+# Words that carry no meaning in a command; "set the volume" is looked up as "set volume".
+FILLER_WORDS = frozenset(("the", "a", "an", "please", "my"))
+_DIGRAPHS = [("ph", "f"), ("ck", "k"), ("gh", ""), ("kn", "n"), ("wr", "r"), ("sh", "x"), ("ch", "x"),
+             ("th", "0"), ("qu", "kw"), ("wh", "w")]
+_SOUND_CLASSES = {}
+for _letters, _code in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6"),
+                        ("0", "7")):
+    for _letter in _letters:
+        _SOUND_CLASSES[_letter] = _code
+
+
+def phonetic_key(text: str) -> str:
+    """Spelling-independent sound key: digraphs folded, consonants classed, vowel runs marked."""
+    word = _NON_LETTERS.sub("", text.lower())
+    for digraph, replacement in _DIGRAPHS:
+        word = word.replace(digraph, replacement)
+    key = []
+    previous = None
+    for letter in word:
+        code = _SOUND_CLASSES.get(letter, "a" if letter in "aeiouy" else "")
+        if code and code != previous:
+            key.append(code)
+        previous = code or previous
+    return "".join(key)
+
+
+def ngrams(text: str, n: int = 3) -> FrozenSet[str]:
+    """Character n-grams of text padded with spaces so word edges count."""
+    padded = f" {text} "
+    return frozenset(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+
+
+def strip_filler(text: str) -> str:
+    """Text without filler words, or the text itself if nothing else is left."""
+    words = text.lower().split()
+    return " ".join(word for word in words if word not in FILLER_WORDS) or " ".join(words)
+
+
+class Match(NamedTuple):
+    """A catalog phrase and how well it matched, from 0.0 to 1.0."""
+    phrase: str
+    score: float
+
+
+class Resolution(NamedTuple):
+    """Best match above the threshold, or ranked suggestions when nothing is confident."""
+    match: Optional[Match]
+    suggestions: List[Match]
+
+
+class _Entry(NamedTuple):
+    phrase: str
+    text_grams: FrozenSet[str]
+    sound_grams: FrozenSet[str]
+
+
+class IntentResolver:
+    """Fuzzy phrase lookup over a precomputed n-gram and phonetic index."""
+
+    def __init__(self, phrases: Iterable[str] = (), threshold: float = 0.65, margin: float = 0.08,
+                 suggestion_floor: float = 0.35, max_suggestions: int = 3, max_candidates: int = 32,
+                 posting_budget: int = 2000):
+        self.threshold = threshold
+        self.margin = margin
+        self.suggestion_floor = suggestion_floor
+        self.max_suggestions = max_suggestions
+        self.max_candidates = max_candidates
+        self.posting_budget = posting_budget
+        self._entries: List[_Entry] = []
+        self._text_index: Dict[str, List[int]] = {}
+        self._sound_index: Dict[str, List[int]] = {}
+        self._exact: Dict[str, int] = {}
+        for phrase in phrases:
+            self.add(phrase)
+
+    def add(self, phrase: str):
+        """Index a phrase; duplicates are ignored."""
+        phrase = phrase.lower().strip()
+        key = strip_filler(phrase)
+        if key in self._exact:
+            return
+        entry = _Entry(phrase, ngrams(key), ngrams(phonetic_key(key)))
+        entry_id = len(self._entries)
+        self._entries.append(entry)
+        self._exact[key] = entry_id
+        for gram in entry.text_grams:
+            self._text_index.setdefault(gram, []).append(entry_id)
+        for gram in entry.sound_grams:
+            self._sound_index.setdefault("#" + gram, []).append(entry_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def resolve(self, text: str) -> Resolution:
+        """Return the best confident match, or suggestions ranked by score."""
+        query = strip_filler(text)
+        if query in self._exact:
+            return Resolution(Match(self._entries[self._exact[query]].phrase, 1.0), [])
+        text_grams = ngrams(query)
+        sound_grams = ngrams(phonetic_key(query))
+        counts: Dict[int, int] = {}
+        self._count(counts, text_grams, self._text_index, "")
+        self._count(counts, sound_grams, self._sound_index, "#")
+        candidates = heapq.nlargest(self.max_candidates, counts, key=counts.get)
+        scored = sorted((self._score(self._entries[i], text_grams, sound_grams) for i in candidates),
+                        key=lambda match: match.score, reverse=True)
+        if not scored:
+            return Resolution(None, [])
+        best = scored[0]
+        runner_up = scored[1].score if len(scored) > 1 else 0.0
+        if best.score >= self.threshold and best.score - runner_up >= self.margin:
+            return Resolution(best, [])
+        suggestions = [match for match in scored[:self.max_suggestions] if match.score >= self.suggestion_floor]
+        return Resolution(None, suggestions)
+
+    def _count(self, counts: Dict[int, int], grams: FrozenSet[str], index: Dict[str, List[int]], prefix: str):
+        # Visit the rarest grams first and stop once the budget is spent, so very common grams
+        # ("ope", "pen" in thousands of "open ..." entries) never dominate the lookup cost.
+        postings = sorted((index.get(prefix + gram, ()) for gram in grams), key=len)
+        budget = self.posting_budget
+        for posting in postings:
+            if not posting:
+                continue
+            if len(posting) > budget and counts:
+                break
+            for entry_id in posting:
+                counts[entry_id] = counts.get(entry_id, 0) + 1
+            budget -= len(posting)
+
+    @staticmethod
+    def _similarity(query: FrozenSet[str], candidate: FrozenSet[str], containment_weight: float) -> float:
+        if not query or not candidate:
+            return 0.0
+        shared = len(query & candidate)
+        dice = 2 * shared / (len(query) + len(candidate))
+        containment = shared / len(query)
+        return (1 - containment_weight) * dice + containment_weight * containment
+
+    def _score(self, entry: _Entry, text_grams: FrozenSet[str], sound_grams: FrozenSet[str]) -> Match:
+        # Spelling similarity credits partial phrases ("system" -> "system status"); sound keys are
+        # coarse and collide easily, so they only lift spellings that already look alike.
+        text_score = self._similarity(text_grams, entry.text_grams, 0.5)
+        sound_score = self._similarity(sound_grams, entry.sound_grams, 0.0)
+        score = text_score + 0.5 * max(0.0, sound_score - text_score) * text_score
+        return Match(entry.phrase, round(score, 3))
+
+
+def benchmark(size: int = 5000, queries: int = 2000, seed: int = 0):
+    """Time lookups of misspelled phrases against a large synthetic catalog."""
+    rng = random.Random(seed)
+    names = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+    phrases = [f"{verb} {name}" for name in names for verb in ("open", "close")]
+    started = time.perf_counter()
+    resolver = IntentResolver(phrases)
+    built = time.perf_counter() - started
+    samples = []
+    for _ in range(queries):
+        phrase = rng.choice(phrases)
+        typo = list(phrase)
+        typo[rng.randrange(5, len(typo))] = rng.choice(string.ascii_lowercase)
+        samples.append((phrase, "".join(typo)))
+    correct = wrong = 0
+    started = time.perf_counter()
+    for phrase, sample in samples:
+        match = resolver.resolve(sample).match
+        if match is not None:
+            correct += match.phrase == phrase
+            wrong += match.phrase != phrase
+    elapsed = time.perf_counter() - started
+    print(f"{len(resolver)} phrases indexed in {built * 1000:.0f} ms; {1e6 * elapsed / queries:.0f} us per lookup; "
+          f"{correct} correct, {wrong} wrong, {queries - correct - wrong} left as suggestions")
+
+if __name__ == "__main__":
+    benchmark()
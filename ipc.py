@@ -0,0 +1,381 @@
+import asyncio
+import concurrent.futures
+import getpass
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Set
+from events import ActionResult, CoreEvent
+
+if TYPE_CHECKING:
+    from core import CERPCore
+
+# One JSON object per line in each direction:
+#   request  {"id": 7, "op": "command", "text": "open notepad"}
+#   response {"id": 7, "ok": true, "result": {...}}  or  {"id": 7, "ok": false, "error": "..."}
+#   event    {"event": "result", "payload": {...}}  (only after "subscribe")
+# Requests on one connection may be pipelined; responses carry the request's id and can arrive out of order.
+
+MAX_LINE = 1 << 20
+# A subscriber that stops reading loses events once this much output is queued for it.
+MAX_EVENT_BACKLOG = 1 << 20
+
+
+def default_address() -> str:
+    """Per-user endpoint: a named pipe on Windows, a Unix socket elsewhere."""
+    user = getpass.getuser()
+    if sys.platform == "win32":
+        return rf"\\.\pipe\cerp-{user}"
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime, f"cerp-{user}.sock")
+
+
+def encode_event(event: CoreEvent) -> Dict:
+    payload = event.payload
+    if event.name == "result":
+        command, result = payload
+        payload = {"command": command, "result": result._asdict()}
+    return {"event": event.name, "payload": payload}
+
+
+def decode_event(message: Dict) -> CoreEvent:
+    payload = message.get("payload")
+    if message["event"] == "result":
+        payload = (payload["command"], ActionResult(**payload["result"]))
+    return CoreEvent(message["event"], payload)
+
+
+async def _open_connection(address: str):
+    if sys.platform == "win32":
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=MAX_LINE, loop=loop)
+        protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+        transport, _ = await loop.create_pipe_connection(lambda: protocol, address)
+        return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+    return await asyncio.open_unix_connection(address, limit=MAX_LINE)
+
+
+class CommandServer:
+    """Local socket / named-pipe API in front of a running CERPCore.
+
+    Ops: ping, command, listen, status, subscribe, unsubscribe, latency, export_traces, set_vad_profile,
+    shutdown. More can be added through `handlers` (async callables taking the request dict).
+    """
+
+    def __init__(self, core: "CERPCore", address: Optional[str] = None,
+                 status: Optional[Callable[[], Dict]] = None,
+                 handlers: Optional[Dict[str, Callable[[Dict], Awaitable[object]]]] = None,
+                 on_shutdown: Optional[Callable[[], None]] = None):
+        self.core = core
+        self.address = address or default_address()
+        self.status = status
+        self.on_shutdown = on_shutdown
+        self.handlers = {
+            "ping": self._ping,
+            "command": self._command,
+            "listen": self._listen,
+            "status": self._status,
+            "latency": self._latency,
+            "export_traces": self._export_traces,
+            "set_vad_profile": self._set_vad_profile,
+            "shutdown": self._shutdown,
+        }
+        self.handlers.update(handlers or {})
+        self.clients = 0
+        self.requests = 0
+        self.events_dropped = 0
+        self._subscribers: Set[asyncio.StreamWriter] = set()
+        self._server = None
+        # Queue pipelined commands here rather than letting the action executor reject them as busy.
+        self._commands = asyncio.Semaphore(max(1, core.executor.max_pending // 2))
+
+    def start(self):
+        """Start serving on the core's loop; returns once the endpoint accepts connections."""
+        asyncio.run_coroutine_threadsafe(self._start(), self.core.loop).result()
+        self.core.listeners.append(self._broadcast)
+        logging.info(f"Command API listening on {self.address}")
+
+    def close(self):
+        if self._broadcast in self.core.listeners:
+            self.core.listeners.remove(self._broadcast)
+        asyncio.run_coroutine_threadsafe(self._close(), self.core.loop).result()
+
+    async def _start(self):
+        if sys.platform == "win32":
+            loop = asyncio.get_running_loop()
+
+            def factory():
+                reader = asyncio.StreamReader(limit=MAX_LINE, loop=loop)
+                return asyncio.StreamReaderProtocol(reader, self._client, loop=loop)
+            servers = await loop.start_serving_pipe(factory, self.address)
+            self._server = servers[0]
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            self._server = await asyncio.start_unix_server(self._client, self.address, limit=MAX_LINE)
+            os.chmod(self.address, 0o600)
+
+    async def _close(self):
+        for writer in list(self._subscribers):
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            if sys.platform != "win32":
+                await self._server.wait_closed()
+                if os.path.exists(self.address):
+                    os.unlink(self.address)
+            self._server = None
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.clients += 1
+        pending: Set[asyncio.Task] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    self._send(writer, {"id": None, "ok": False, "error": "invalid JSON"})
+                    continue
+                if request.get("op") == "subscribe":
+                    self._subscribers.add(writer)
+                    self._send(writer, {"id": request.get("id"), "ok": True, "result": None})
+                elif request.get("op") == "unsubscribe":
+                    self._subscribers.discard(writer)
+                    self._send(writer, {"id": request.get("id"), "ok": True, "result": None})
+                else:
+                    # Each request runs as its own task so a slow command does not hold up the ones behind it.
+                    task = asyncio.get_running_loop().create_task(self._handle(request, writer))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                if writer.transport.get_write_buffer_size() > MAX_EVENT_BACKLOG:
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            logging.warning(f"Command API client dropped: {e!r}")
+        finally:
+            self._subscribers.discard(writer)
+            self.clients -= 1
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+    async def _handle(self, request: Dict, writer: asyncio.StreamWriter):
+        self.requests += 1
+        handler = self.handlers.get(request.get("op"))
+        if handler is None:
+            response = {"id": request.get("id"), "ok": False, "error": f"unknown op {request.get('op')!r}"}
+        else:
+            try:
+                response = {"id": request.get("id"), "ok": True, "result": await handler(request)}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Command API {request.get('op')} failed: {e}")
+                response = {"id": request.get("id"), "ok": False, "error": str(e)}
+        self._send(writer, response)
+
+    def _send(self, writer: asyncio.StreamWriter, message: Dict):
+        if not writer.is_closing():
+            writer.write(json.dumps(message).encode() + b"\n")
+
+    def _broadcast(self, event: CoreEvent):
+        """Core listener (runs on the loop): forward the event to every subscriber that keeps up."""
+        if not self._subscribers:
+            return
+        line = json.dumps(encode_event(event)).encode() + b"\n"
+        for writer in list(self._subscribers):
+            if writer.is_closing():
+                self._subscribers.discard(writer)
+            elif writer.transport.get_write_buffer_size() > MAX_EVENT_BACKLOG:
+                self.events_dropped += 1
+            else:
+                writer.write(line)
+
+    async def _ping(self, request: Dict):
+        return "pong"
+
+    async def _command(self, request: Dict):
+        text = str(request.get("text") or "").strip()
+        if not text:
+            raise ValueError("command needs a non-empty 'text'")
+        async with self._commands:
+            result = await self.core.run_command(text.lower())
+        return result._asdict()
+
+    async def _listen(self, request: Dict):
+        self.core.request_listen(str(request.get("origin") or "client"))
+        return None
+
+    async def _status(self, request: Dict):
+        status = {"clients": self.clients, "subscribers": len(self._subscribers), "requests": self.requests,
+                  "events_dropped": self.events_dropped, "listening": self.core.listening,
+                  "voice_typing": self.core.auto.voice_typing_active, "wake_ignored": self.core.wake_ignored,
+                  "notices": list(self.core.notices)}
+        if self.status is not None:
+            status.update(self.status())
+        return status
+
+    async def _latency(self, request: Dict):
+        return self.core.tracer.format_summary()
+
+    async def _export_traces(self, request: Dict):
+        return self.core.tracer.dump()
+
+    async def _set_vad_profile(self, request: Dict):
+        self.core.speech.set_vad_profile(str(request.get("name")))
+        return None
+
+    async def _shutdown(self, request: Dict):
+        if self.on_shutdown is None:
+            raise ValueError("shutdown is not allowed on this server")
+        # Answer first; the owner stops the server (and this connection) from its own thread.
+        asyncio.get_running_loop().call_later(0.05, self.on_shutdown)
+        return None
+
+
+class CERPClient:
+    """Blocking client for CommandServer with pipelining and event subscription.
+
+    A private event loop thread owns the connection. request() waits for one response; send() returns a
+    future immediately so many requests can be in flight at once. Events go to `on_event` on that thread.
+    """
+
+    def __init__(self, address: Optional[str] = None, on_event: Optional[Callable[[CoreEvent], None]] = None):
+        self.address = address or default_address()
+        self.on_event = on_event
+        self._ids = itertools.count(1)
+        self._waiting: Dict[int, concurrent.futures.Future] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread: Optional[threading.Thread] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def connect(self, timeout: float = 2.0):
+        """Connect, raising OSError if no server answers within `timeout`."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop.run_forever, name="cerp-client", daemon=True)
+            self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._connect(), self._loop).result(timeout)
+
+    async def _connect(self):
+        reader, self._writer = await _open_connection(self.address)
+        self._reader_task = self._loop.create_task(self._read(reader))
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if "event" in message:
+                    if self.on_event is not None:
+                        try:
+                            self.on_event(decode_event(message))
+                        except Exception as e:
+                            logging.error(f"Event callback failed: {e}")
+                    continue
+                future = self._waiting.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if message.get("ok"):
+                    future.set_result(message.get("result"))
+                else:
+                    future.set_exception(RuntimeError(message.get("error")))
+        except (ConnectionError, ValueError) as e:
+            logging.warning(f"Connection to CERP lost: {e!r}")
+        finally:
+            self._writer = None
+            for future in self._waiting.values():
+                future.set_exception(ConnectionError("connection to CERP closed"))
+            self._waiting.clear()
+            if self.on_event is not None:
+                self.on_event(CoreEvent("disconnected"))
+
+    def send(self, op: str, **params) -> concurrent.futures.Future:
+        """Queue a request without waiting; the future resolves to its result or raises its error."""
+        if not self.connected:
+            raise ConnectionError("not connected to CERP")
+        future = concurrent.futures.Future()
+        request_id = next(self._ids)
+        line = json.dumps({"id": request_id, "op": op, **params}).encode() + b"\n"
+
+        def write():
+            if self._writer is None:
+                future.set_exception(ConnectionError("connection to CERP closed"))
+                return
+            self._waiting[request_id] = future
+            self._writer.write(line)
+        self._loop.call_soon_threadsafe(write)
+        return future
+
+    def request(self, op: str, timeout: Optional[float] = 30.0, **params):
+        return self.send(op, **params).result(timeout)
+
+    def command(self, text: str, timeout: Optional[float] = 60.0) -> ActionResult:
+        return ActionResult(**self.request("command", timeout=timeout, text=text))
+
+    def subscribe(self):
+        self.request("subscribe")
+
+    def close(self):
+        if self._thread is None:
+            return
+
+        async def shutdown():
+            if self._writer is not None:
+                self._writer.close()
+            if self._reader_task is not None:
+                await asyncio.wait([self._reader_task], timeout=1.0)
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(2.0)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+
+if __name__ == "__main__":
+    import time
+    from audio_pipeline import CaptureService
+    from benchmark import ScriptedRecognizer, build_fake_automation, synthesize
+    from core import CERPCore
+    from logging_config import configure_logging
+    from speech import SpeechProcessor
+
+    # Headless check: pipelined pings and commands over the socket against fake automation backends.
+    configure_logging()
+    if sys.platform == "win32":
+        address = rf"\\.\pipe\cerp-selftest-{os.getpid()}"
+    else:
+        address = os.path.join(tempfile.mkdtemp(), "cerp.sock")
+    capture = CaptureService(synthesize(""))
+    processor = SpeechProcessor(capture=capture, backend=ScriptedRecognizer(), automation=build_fake_automation())
+    core = CERPCore(processor)
+    core.start()
+    server = CommandServer(core, address)
+    server.start()
+    events = []
+    client = CERPClient(address, on_event=events.append)
+    client.connect()
+    client.subscribe()
+    for op, count, params in (("ping", 5000, {}), ("command", 1000, {"text": "system status"})):
+        started = time.perf_counter()
+        results = [future.result(30) for future in [client.send(op, **params) for _ in range(count)]]
+        elapsed = time.perf_counter() - started
+        print(f"{count} pipelined {op} requests in {1000 * elapsed:.0f} ms ({count / elapsed:.0f}/s)")
+    print(f"status: {client.request('status')}")
+    print(f"events received: {len(events)}")
+    client.close()
+    server.close()
+    core.stop()
+    processor.auto.shutdown()
+    capture.stop()
@@ -0,0 +1,145 @@
+import atexit
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Third-party loggers that are far too chatty below WARNING (comtypes logs every COM call at DEBUG).
+DEFAULT_LEVELS = {
+    "comtypes": logging.WARNING,
+    "PIL": logging.WARNING,
+    "urllib3": logging.WARNING,
+    "asyncio": logging.WARNING,
+}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, for log shippers and ad-hoc analysis."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueues records without formatting them; the writer thread formats instead."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve arguments and tracebacks now, since they may not survive the trip to another thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Per-module minimum levels; CERP logs through the root logger, so its records match on module name."""
+
+    def __init__(self, levels: Dict[str, int], default: int = logging.INFO):
+        super().__init__()
+        self.levels = levels
+        self.default = default
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        name = record.name if record.name != "root" else record.module
+        while name:
+            level = self.levels.get(name)
+            if level is not None:
+                return record.levelno >= level
+            name = name.rpartition(".")[0]
+        return record.levelno >= self.default
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """Parse "comtypes=DEBUG,speech=WARNING" into a name -> level map; malformed entries are skipped with a warning."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        # getLevelName() maps unknown names to the string "Level X" rather than failing.
+        number = int(level) if level.isdigit() else logging.getLevelName(level)
+        if not name or not isinstance(number, int):
+            logging.warning(f"Ignoring log level override {item!r}: expected NAME=LEVEL with a level such as DEBUG")
+            continue
+        levels[name] = number
+    return levels
+
+
+def configure_logging(path: str = "logs/cerp.log", level: int = logging.INFO,
+                      levels: Optional[Dict[str, int]] = None, json_lines: Optional[bool] = None) -> QueueListener:
+    """Route all logging through a queue to one background writer thread; safe to call more than once.
+
+    CERP_LOG_LEVELS (e.g. "comtypes=DEBUG") overrides per-module levels and CERP_LOG_FORMAT=json
+    switches the file to JSON lines.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    levels = {**DEFAULT_LEVELS, **(levels or {}), **parse_levels(os.environ.get("CERP_LOG_LEVELS", ""))}
+    if json_lines is None:
+        json_lines = os.environ.get("CERP_LOG_FORMAT", "").lower() == "json"
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    file_handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=2, encoding="utf-8")
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+
+    records: "queue.SimpleQueue" = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(records)
+    queue_handler.addFilter(ModuleLevelFilter(levels, level))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    # The root level must admit anything a per-module override asks for; the filter does the rest.
+    root.setLevel(min([level, *levels.values()]))
+    # Loggers named after third-party packages drop records before they are even created.
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(records, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure_logging(os.path.join(directory, "bench.log"))
+        count = 20000
+        started = time.perf_counter()
+        for index in range(count):
+            logging.info(f"Recognized command {index}")
+        elapsed = time.perf_counter() - started
+        shutdown_logging()
+        print(f"{1e6 * elapsed / count:.1f} us per log call on the emitting thread")
@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import re
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from action_executor import ActionExecutor, ActionResult
+from command_router import CommandRouter, Intent
+
+DEFAULT_MACRO_PATH = os.path.join("data", "macros.json")
+
+# "then" waits for everything said before it; "and" and commas only order steps that share a resource.
+_CONNECTOR = re.compile(r"\s*(?:,\s*)?\b(and then|then|after that|and)\b\s*|\s*,\s*")
+SEQUENTIAL = ("and then", "then", "after that")
+
+# Commands that take the rest of the utterance verbatim and must never be split.
+UNSPLIT = ("save macro",)
+MAX_MACRO_DEPTH = 4
+
+
+class PlanStep(NamedTuple):
+    """One command of a plan and the indexes of the steps it has to wait for."""
+    index: int
+    intent: Intent
+    after: Tuple[int, ...]
+
+
+class ActionPlan(NamedTuple):
+    utterance: str
+    steps: Tuple[PlanStep, ...]
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+
+class MacroStore:
+    """Named command sequences, kept as the utterances that define them and optionally saved as JSON."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_MACRO_PATH):
+        self.path = path
+        self.macros: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as stored:
+                    self.macros = dict(json.load(stored))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Macros not loaded from {path}: {e}")
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return " ".join(name.lower().split())
+
+    def get(self, name: str) -> Optional[str]:
+        return self.macros.get(self.normalize(name))
+
+    def names(self) -> List[str]:
+        return sorted(self.macros)
+
+    def define(self, name: str, body: str):
+        with self._lock:
+            self.macros[self.normalize(name)] = body.strip()
+            self._save()
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            removed = self.macros.pop(self.normalize(name), None) is not None
+            if removed:
+                self._save()
+        return removed
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as output:
+            json.dump(self.macros, output, indent=2)
+        os.replace(temporary, self.path)
+
+
+class Planner:
+    """Splits a compound utterance into an ordered ActionPlan, expanding macros along the way.
+
+    If any clause does not route to a command, the whole utterance is planned as a single command, so
+    names that contain "and" ("open pride and prejudice") still reach the handler intact.
+
+    `resources` maps command names to the resource their steps hold (see actions.ActionSpec); steps that
+    need the same resource never overlap, None runs alongside anything, and unlisted commands hold "all".
+    """
+
+    def __init__(self, router: CommandRouter, macros: Optional[MacroStore] = None,
+                 known_target: Optional[Callable[[str], bool]] = None,
+                 resources: Optional[Dict[str, Optional[str]]] = None):
+        self.router = router
+        self.macros = macros or MacroStore(None)
+        self.known_target = known_target
+        self.resources = resources if resources is not None else {}
+
+    def parse(self, utterance: str) -> ActionPlan:
+        whole = self.router.route(utterance)
+        if whole is not None and whole.name in UNSPLIT:
+            return ActionPlan(utterance, (PlanStep(0, whole, ()),))
+        intents = self._clauses(utterance.lower(), None, 0)
+        if intents is None:
+            steps = (PlanStep(0, whole, ()),) if whole is not None else ()
+            return ActionPlan(utterance, steps)
+        steps: List[PlanStep] = []
+        barrier: Tuple[int, ...] = ()
+        for intent, connector in intents:
+            if connector in SEQUENTIAL:
+                barrier = tuple(range(len(steps)))
+            after = set(barrier)
+            resource = self.resources.get(intent.name, "all")
+            for step in steps[len(barrier):]:
+                other = self.resources.get(step.intent.name, "all")
+                if "all" in (resource, other) or (resource is not None and resource == other):
+                    after.add(step.index)
+            steps.append(PlanStep(len(steps), intent, tuple(sorted(after))))
+        return ActionPlan(utterance, tuple(steps))
+
+    def _clauses(self, text: str, first_connector: Optional[str],
+                 depth: int) -> Optional[List[Tuple[Intent, Optional[str]]]]:
+        """Route each clause; macro references are replaced by their own clauses. None if any clause fails."""
+        parts = _CONNECTOR.split(text)
+        # re.split yields text, connector, text, ...; a bare comma leaves the connector as None.
+        clauses = [(parts[0], first_connector)] + [(parts[i + 1], parts[i] or ",") for i in range(1, len(parts), 2)]
+        routed: List[Tuple[Intent, Optional[str]]] = []
+        previous: Optional[Intent] = None
+        for clause, connector in clauses:
+            clause = clause.strip(" ,.")
+            if not clause:
+                continue
+            intent = self.router.route(clause)
+            if intent is None and previous is not None and previous.name == "open" and self._known(clause):
+                # "open word and excel": a bare name reuses the command before it.
+                intent = self.router.route(f"{previous.phrase} {clause}")
+            if intent is None:
+                return None
+            if intent.name == "run macro":
+                body = self.macros.get(str(intent.args.get("name") or ""))
+                if body is None or depth >= MAX_MACRO_DEPTH:
+                    return None
+                expanded = self._clauses(body.lower(), connector, depth + 1)
+                if expanded is None:
+                    return None
+                routed.extend(expanded)
+            elif intent.name == "open" and not self._known(str(intent.args.get("target") or "")):
+                return None
+            else:
+                routed.append((intent, connector))
+            previous = intent
+        return routed or None
+
+    def _known(self, target: str) -> bool:
+        return self.known_target is None or self.known_target(target)
+
+
+class PlanRunner:
+    """Runs a plan's steps on a worker pool as soon as the steps they wait for have finished.
+
+    Before the dependents of a step start, `ready(intent, timeout)` is asked to wait until the step's
+    effect is usable (e.g. the opened window has settled) instead of sleeping a fixed time. If a step
+    fails or times out, the steps that wait for it are skipped.
+    """
+
+    READY_TIMEOUT = 10.0
+
+    def __init__(self, execute: Callable[[Intent], str], ready: Optional[Callable[[Intent, float], bool]] = None,
+                 executor: Optional[ActionExecutor] = None):
+        self.execute = execute
+        self.ready = ready
+        self.executor = executor or ActionExecutor(workers=4, max_pending=16, default_timeout=20.0)
+
+    def run(self, plan: ActionPlan, on_step: Optional[Callable[[PlanStep, ActionResult], None]] = None,
+            timeout: Optional[float] = None) -> List[Optional[ActionResult]]:
+        """Execute the plan and return one result per step (None for steps still unfinished at `timeout`)."""
+        results: List[Optional[ActionResult]] = [None] * len(plan.steps)
+        waiting = {step.index: set(step.after) for step in plan.steps}
+        dependents: Dict[int, List[int]] = {step.index: [] for step in plan.steps}
+        for step in plan.steps:
+            for index in step.after:
+                dependents[index].append(step.index)
+        lock = threading.Lock()
+        finished = threading.Event()
+
+        def settle(step: PlanStep, result: ActionResult):
+            ready = []
+            with lock:
+                if results[step.index] is not None:
+                    return
+                results[step.index] = result
+                failed = result.status != "done" or result.result.lower().startswith("error")
+                for index in dependents[step.index]:
+                    if failed and results[index] is None:
+                        ready.append((plan.steps[index], f"Skipped: '{step.intent.utterance}' did not finish."))
+                        continue
+                    waiting[index].discard(step.index)
+                    if not waiting[index] and results[index] is None:
+                        ready.append((plan.steps[index], None))
+                done = all(result is not None for result in results)
+            if on_step is not None:
+                on_step(step, result)
+            for next_step, skipped in ready:
+                if skipped:
+                    settle(next_step, ActionResult(0, next_step.intent.name, "skipped", skipped, 0.0))
+                else:
+                    start(next_step)
+            if done:
+                finished.set()
+
+        def start(step: PlanStep):
+            self.executor.submit(step.intent.name, self._run_step, step.intent, bool(dependents[step.index]),
+                                 on_done=lambda result: settle(step, result))
+
+        if not plan.steps:
+            return []
+        for step in plan.steps:
+            if not step.after:
+                start(step)
+        finished.wait(timeout)
+        return results
+
+    def _run_step(self, intent: Intent, has_dependents: bool) -> str:
+        result = self.execute(intent)
+        if has_dependents and self.ready is not None and not self.ready(intent, self.READY_TIMEOUT):
+            logging.warning(f"'{intent.utterance}' was not ready after {self.READY_TIMEOUT:g}s, continuing")
+        return result
+
+    def shutdown(self):
+        self.executor.shutdown()
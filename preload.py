@@ -0,0 +1,263 @@
+import glob
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from catalog import executable, normalize
+from history import HistoryEntry
+
+TRAIN_DAYS = 28
+CHUNK = 1 << 20
+
+
+class UsagePredictor:
+    """Scores likely next 'open' targets from the hour of day and the command said just before."""
+
+    # A command only predicts the next one if they were this close together.
+    SEQUENCE_WINDOW = 600.0
+    SEQUENCE_WEIGHT = 0.6
+    NEIGHBOUR_HOUR_WEIGHT = 0.5
+
+    def __init__(self, target_of: Callable[[HistoryEntry], Optional[str]]):
+        self.target_of = target_of
+        self.by_hour: Dict[int, Counter] = {}
+        self.after: Dict[str, Counter] = {}
+        self._previous: Optional[HistoryEntry] = None
+        self._lock = threading.Lock()
+
+    def train(self, entries: Iterable[HistoryEntry]):
+        for entry in entries:
+            self.observe(entry)
+
+    def observe(self, entry: HistoryEntry):
+        """Learn from one executed command (entries must arrive oldest first)."""
+        target = self.target_of(entry) if entry.kind == "open" and entry.status == "done" else None
+        with self._lock:
+            if target:
+                self.by_hour.setdefault(time.localtime(entry.timestamp).tm_hour, Counter())[target] += 1
+                previous = self._previous
+                if previous is not None and entry.timestamp - previous.timestamp <= self.SEQUENCE_WINDOW:
+                    self.after.setdefault(previous.command, Counter())[target] += 1
+            self._previous = entry
+
+    def predict(self, now: Optional[float] = None, previous: Optional[str] = None,
+                limit: int = 3) -> List[Tuple[str, float]]:
+        """Targets with scores in [0, 1]; `previous` defaults to the last observed command if it was recent."""
+        now = time.time() if now is None else now
+        hour = time.localtime(now).tm_hour
+        with self._lock:
+            if previous is None and self._previous is not None and now - self._previous.timestamp <= self.SEQUENCE_WINDOW:
+                previous = self._previous.command
+            hourly = Counter()
+            for offset in (-1, 0, 1):
+                weight = 1.0 if offset == 0 else self.NEIGHBOUR_HOUR_WEIGHT
+                for target, count in self.by_hour.get((hour + offset) % 24, {}).items():
+                    hourly[target] += weight * count
+            following = Counter(self.after.get(previous, {}))
+        scores = Counter()
+        sequence_weight = self.SEQUENCE_WEIGHT if following else 0.0
+        if hourly:
+            total = sum(hourly.values())
+            for target, count in hourly.items():
+                scores[target] += (1 - sequence_weight) * count / total
+        if following:
+            total = sum(following.values())
+            for target, count in following.items():
+                scores[target] += sequence_weight * count / total
+        return scores.most_common(limit)
+
+
+class Preloader:
+    """Warms the most likely next applications in the background so 'open ...' does not start cold.
+
+    Desktop apps have their executable and neighbouring libraries pulled into the OS file cache; web apps
+    get their host name resolved and, if no browser is running, the browser's files warmed. Warming stays
+    within `memory_budget_mb` of file data, reads at most `read_rate_mb` per second, and is skipped while
+    CPU use is above `max_cpu_percent` or the machine runs on battery.
+    """
+
+    def __init__(self, automation, predictor: Optional[UsagePredictor] = None, memory_budget_mb: float = 256.0,
+                 max_cpu_percent: float = 50.0, read_rate_mb: float = 32.0, min_score: float = 0.25,
+                 top: int = 2, warm_ttl: float = 900.0):
+        self.auto = automation
+        self.predictor = predictor or UsagePredictor(self._target_of)
+        self.memory_budget = int(memory_budget_mb * CHUNK)
+        self.max_cpu_percent = max_cpu_percent
+        self.read_rate = read_rate_mb * CHUNK
+        self.min_score = min_score
+        self.top = top
+        self.warm_ttl = warm_ttl
+        self.predictions = 0
+        self.warmed = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.skipped_busy = 0
+        self.bytes_read = 0
+        self.cpu_seconds = 0.0
+        self._warm: Dict[str, Tuple[float, int, bool]] = {}  # target -> (expires, bytes, used)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _target_of(self, entry: HistoryEntry) -> Optional[str]:
+        intent = self.auto.router.route(entry.command)
+        target = intent.args.get("target") if intent is not None else None
+        return normalize(str(target)) if target else None
+
+    def start(self):
+        """Learn from recent history, then warm in the background after every recorded command."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.predictor.train(self.auto.history.since(time.time() - TRAIN_DAYS * 24 * 3600))
+        self.auto.history.listeners.append(self._on_entry)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cerp-preload", daemon=True)
+        self._thread.start()
+        self._wake.set()
+        logging.info(f"Preloader started (budget {self.memory_budget // CHUNK} MB).")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._on_entry in self.auto.history.listeners:
+            self.auto.history.listeners.remove(self._on_entry)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _on_entry(self, entry: HistoryEntry):
+        if entry.kind == "open":
+            target = self._target_of(entry)
+            with self._lock:
+                warm = self._warm.get(target)
+                if warm is not None and warm[0] >= time.monotonic():
+                    self.hits += 1
+                    self._warm[target] = (warm[0], warm[1], True)
+                else:
+                    self.misses += 1
+        self.predictor.observe(entry)
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            started = time.thread_time()
+            try:
+                self._warm_predictions()
+            except Exception as e:
+                logging.error(f"Preloading failed: {e}")
+            self.cpu_seconds += time.thread_time() - started
+
+    def _warm_predictions(self):
+        self._expire()
+        predictions = [(target, score) for target, score in self.predictor.predict(limit=self.top)
+                       if score >= self.min_score]
+        if not predictions:
+            return
+        self.predictions += 1
+        snapshot = self.auto.metrics.latest()
+        if snapshot.cpu > self.max_cpu_percent or snapshot.plugged is False:
+            self.skipped_busy += 1
+            return
+        for target, score in predictions:
+            with self._lock:
+                if target in self._warm:
+                    continue
+                remaining = self.memory_budget - sum(size for _, size, _ in self._warm.values())
+            if remaining <= 0:
+                break
+            size = self._warm_target(target, remaining)
+            with self._lock:
+                self._warm[target] = (time.monotonic() + self.warm_ttl, size, False)
+            self.warmed += 1
+            logging.info(f"Preloaded {target} (score {score:.2f}, {size // 1024} KB)")
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            for target, (expires, _, used) in list(self._warm.items()):
+                if expires < now:
+                    del self._warm[target]
+                    if not used:
+                        self.wasted += 1
+
+    def _warm_target(self, target: str, budget: int) -> int:
+        """Warm one target; returns the bytes of file data brought into cache."""
+        url = self.auto.web_apps.get(target)
+        if url is not None:
+            host = urlparse(url).hostname
+            if host:
+                try:
+                    socket.getaddrinfo(host, 443)
+                except OSError as e:
+                    logging.debug(f"Could not resolve {host}: {e}")
+            if self.auto.process_registry.find(self.auto.BROWSER_PROCESSES) is not None:
+                return 0
+            entry = self.auto.catalog.get("chrome")
+        else:
+            entry = self.auto.catalog.get(target)
+        path = self._resolve(executable(entry.target) if entry is not None else None)
+        if path is None:
+            return 0
+        # The executable first, then the libraries it most likely loads, until the budget runs out.
+        files = [path] + sorted(glob.glob(os.path.join(os.path.dirname(path), "*.dll")))
+        total = 0
+        for name in files:
+            if total >= budget or self._stop.is_set():
+                break
+            total += self._prefetch(name, budget - total)
+        return total
+
+    @staticmethod
+    def _resolve(path: Optional[str]) -> Optional[str]:
+        if not path:
+            return None
+        if os.path.isfile(path):
+            return path
+        return shutil.which(path)
+
+    def _prefetch(self, path: str, limit: int) -> int:
+        """Read up to `limit` bytes of a file (discarding them) at no more than the configured rate."""
+        read = 0
+        try:
+            with open(path, "rb") as data:
+                while read < limit and not self._stop.is_set():
+                    started = time.monotonic()
+                    chunk = data.read(min(CHUNK, limit - read))
+                    if not chunk:
+                        break
+                    read += len(chunk)
+                    spare = len(chunk) / self.read_rate - (time.monotonic() - started)
+                    if spare > 0:
+                        time.sleep(spare)
+        except OSError as e:
+            logging.debug(f"Could not prefetch {path}: {e}")
+        self.bytes_read += read
+        return read
+
+    def stats(self) -> Dict[str, float]:
+        opens = self.hits + self.misses
+        with self._lock:
+            warm = {target: size for target, (_, size, _) in self._warm.items()}
+        return {
+            "predictions": self.predictions,
+            "warmed": self.warmed,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / opens if opens else 0.0,
+            "wasted": self.wasted,
+            "skipped_busy": self.skipped_busy,
+            "warm_mb": sum(warm.values()) / CHUNK,
+            "read_mb": self.bytes_read / CHUNK,
+            "cpu_seconds": self.cpu_seconds,
+        }
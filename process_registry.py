@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+import psutil
+
+
+class ProcessRegistry:
+    """Indexed name -> PID map kept current by diffing the PID list instead of rescanning every process."""
+
+    # A freshly forked child reports its parent's name until it execs, so young PIDs are re-read.
+    SETTLE_SECONDS = 2.0
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self._young: Dict[int, float] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._by_pid: Dict[int, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._thread = None
+        self._running = False
+
+    def refresh(self) -> Tuple[Set[int], Set[int]]:
+        """Index new PIDs and drop dead ones; only new (or just-forked) processes are queried."""
+        current = set(psutil.pids())
+        now = time.monotonic()
+        with self._lock:
+            known = set(self._by_pid)
+            young = [pid for pid, seen in self._young.items() if now - seen < self.SETTLE_SECONDS and pid in current]
+        added, removed = current - known, known - current
+        details = {}
+        for pid in list(added) + young:
+            try:
+                info = psutil.Process(pid).as_dict(["name", "ppid"])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            details[pid] = ((info.get("name") or "").lower(), info.get("ppid") or 0)
+        changed = set()
+        with self._changed:
+            for pid in removed | set(details):
+                if pid in self._by_pid and (pid in removed or self._by_pid[pid] != details[pid]):
+                    self._unindex(pid)
+            for pid, entry in details.items():
+                if pid not in self._by_pid:
+                    self._by_pid[pid] = entry
+                    self._by_name.setdefault(entry[0], set()).add(pid)
+                    changed.add(pid)
+                if pid in added:
+                    self._young[pid] = now
+            self._young = {pid: seen for pid, seen in self._young.items() if now - seen < self.SETTLE_SECONDS}
+            if changed or removed:
+                self._changed.notify_all()
+        return changed, removed
+
+    def _unindex(self, pid: int):
+        name, _ = self._by_pid.pop(pid)
+        pids = self._by_name.get(name)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self._by_name[name]
+
+    def start(self):
+        """Keep the index current from a background watcher thread."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self.refresh()
+        self._thread = threading.Thread(target=self._watch, name="cerp-process-watch", daemon=True)
+        self._thread.start()
+        logging.info("Process registry watcher started.")
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def pids(self, names: Iterable[str]) -> Set[int]:
+        """All PIDs currently running under any of the given executable names."""
+        self._ensure_fresh()
+        with self._lock:
+            return set().union(*(self._by_name.get(name.lower(), ()) for name in names))
+
+    def find(self, names: Iterable[str]) -> Optional[psutil.Process]:
+        """Return the top-level process for any of the names (not one of its same-named children)."""
+        names = [name.lower() for name in names]
+        return self._root_process(self.pids(names), names)
+
+    def wait_for(self, names: Iterable[str], timeout: float, exclude: Iterable[int] = ()) -> Optional[psutil.Process]:
+        """Wait until a process with one of the names, and a PID not in `exclude`, appears."""
+        names = [name.lower() for name in names]
+        exclude = set(exclude)
+        deadline = time.monotonic() + timeout
+        while True:
+            process = self._root_process(self.pids(names) - exclude, names)
+            if process is not None:
+                return process
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if self._running:
+                with self._changed:
+                    self._changed.wait(min(remaining, self.interval))
+            else:
+                time.sleep(min(remaining, 0.05))
+
+    def _root_process(self, pids: Set[int], names: Iterable[str]) -> Optional[psutil.Process]:
+        with self._lock:
+            roots = [pid for pid in pids
+                     if pid in self._by_pid and self._by_pid.get(self._by_pid[pid][1], ("", 0))[0] not in names]
+        for pid in sorted(roots or pids):
+            try:
+                return psutil.Process(pid)
+            except psutil.NoSuchProcess:
+                continue
+        return None
+
+    def _ensure_fresh(self):
+        if not self._running:
+            self.refresh()
+
+    def _watch(self):
+        while self._running:
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Process registry refresh failed: {e}")
+            time.sleep(self.interval)
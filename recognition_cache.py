@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+import speech_recognition as sr
+from grammar import CommandGrammar
+from recognizers import RecognitionResult, RecognizerBackend
+from vad import frame_rms
+from wakeword import BAND_FREQUENCIES, band_energies
+
+SEGMENTS = 8
+FRAMES_PER_SEGMENT = 2
+QUANTIZATION = 4  # steps per unit of log band energy
+BAND_FLOOR = -2.0
+FRAME_SAMPLES = 480
+
+
+class Fingerprint(NamedTuple):
+    """Quantized band-energy summary of an utterance: SEGMENTS x len(BAND_FREQUENCIES) values."""
+    values: Tuple[int, ...]
+    duration: float
+
+
+def fingerprint(data: bytes, sample_rate: int = 16000, sample_width: int = 2) -> Optional[Fingerprint]:
+    """Summarize the voiced part of an utterance; None if it is too short to fingerprint."""
+    if sample_width != 2:
+        return None
+    size = FRAME_SAMPLES * 2
+    frames = [data[i:i + size] for i in range(0, len(data) - size + 1, size)]
+    if len(frames) < SEGMENTS:
+        return None
+    # Trim leading and trailing silence so preroll and hangover length do not change the print.
+    energies = [frame_rms(frame) for frame in frames]
+    floor = max(0.1 * max(energies), 3 * sorted(energies)[len(energies) // 10])
+    voiced = [index for index, energy in enumerate(energies) if energy > floor]
+    if not voiced:
+        # Quiet speech over loud noise, or a steady signal: nothing to anchor the trim on, so do not cache.
+        return None
+    frames = frames[voiced[0]:voiced[-1] + 1]
+    if len(frames) < SEGMENTS:
+        return None
+    values = []
+    for segment in range(SEGMENTS):
+        start = segment * len(frames) // SEGMENTS
+        end = (segment + 1) * len(frames) // SEGMENTS
+        # A few evenly spaced frames per segment bound the cost for long utterances.
+        step = max(1, (end - start) // FRAMES_PER_SEGMENT)
+        picked = [band_energies(frames[index], sample_rate) for index in range(start, end, step)][:FRAMES_PER_SEGMENT]
+        for band in range(len(BAND_FREQUENCIES)):
+            mean = sum(bands[band] for bands in picked) / len(picked)
+            # Bands far below the frame's average hold only noise; clip them so noise cannot dominate.
+            values.append(int(round(max(mean, BAND_FLOOR) * QUANTIZATION)))
+    return Fingerprint(tuple(values), len(frames) * FRAME_SAMPLES / sample_rate)
+
+
+def fingerprint_distance(a: Fingerprint, b: Fingerprint) -> float:
+    """Mean absolute difference in log band energy; infinite if the durations are too different."""
+    longer, shorter = max(a.duration, b.duration), min(a.duration, b.duration)
+    if shorter <= 0 or longer / shorter > 1.5:
+        return float("inf")
+    return sum(abs(x - y) for x, y in zip(a.values, b.values)) / (len(a.values) * QUANTIZATION)
+
+
+class _Entry:
+    def __init__(self, fingerprint: Fingerprint, text: str, confirmations: int = 1, hits: int = 0):
+        self.fingerprint = fingerprint
+        self.text = text
+        self.confirmations = confirmations
+        self.hits = hits
+
+
+class RecognitionCache:
+    """LRU cache from utterance fingerprints to transcripts, optionally persisted as JSON.
+
+    Changes are written SAVE_DELAY seconds after the first unsaved one, on a timer thread, so file I/O never
+    sits on the recognition path; close() writes whatever is still pending.
+    """
+
+    SAVE_DELAY = 5.0
+
+    def __init__(self, capacity: int = 256, threshold: float = 0.8, min_confirmations: int = 2,
+                 path: Optional[str] = None):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.min_confirmations = min_confirmations
+        self.path = path
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, probe: Fingerprint) -> Tuple[Optional[_Entry], float]:
+        """Return the nearest entry and its distance (the entry may be unconfirmed or too far to use)."""
+        with self._lock:
+            self.lookups += 1
+            best, best_key, best_distance = None, None, float("inf")
+            for key, entry in self._entries.items():
+                distance = fingerprint_distance(probe, entry.fingerprint)
+                if distance < best_distance:
+                    best, best_key, best_distance = entry, key, distance
+            if best is not None and best_distance <= self.threshold and best.confirmations >= self.min_confirmations:
+                self._entries.move_to_end(best_key)
+                best.hits += 1
+                self.hits += 1
+            return best, best_distance
+
+    def store(self, probe: Fingerprint, text: str, near: Optional[_Entry] = None, distance: float = float("inf")):
+        """Record what the recognizer heard; a near entry with the same text gains a confirmation instead."""
+        with self._lock:
+            if near is not None and distance <= self.threshold and near.text == text:
+                near.confirmations += 1
+            else:
+                self._entries[self._next_key] = _Entry(probe, text)
+                self._next_key += 1
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            if self.path:
+                self._dirty = True
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            dirty, self._dirty = self._dirty, False
+        if dirty:
+            try:
+                self.save()
+            except OSError as e:
+                logging.warning(f"Recognition cache not saved to {self.path}: {e}")
+
+    def close(self):
+        self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def save(self):
+        """Write entries (oldest first) atomically to `path`."""
+        with self._lock:
+            payload = [{"values": list(e.fingerprint.values), "duration": e.fingerprint.duration, "text": e.text,
+                        "confirmations": e.confirmations, "hits": e.hits} for e in self._entries.values()]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as output:
+            json.dump(payload, output)
+        os.replace(temporary, self.path)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as stored:
+                payload = json.load(stored)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Recognition cache not loaded from {self.path}: {e}")
+            return
+        with self._lock:
+            for item in payload[-self.capacity:]:
+                self._entries[self._next_key] = _Entry(Fingerprint(tuple(item["values"]), item["duration"]),
+                                                       item["text"], item["confirmations"], item["hits"])
+                self._next_key += 1
+        logging.info(f"Loaded {len(self._entries)} cached recognitions from {self.path}")
+
+
+class CachingRecognizer(RecognizerBackend):
+    """Batch backend wrapper answering repeated utterances from a RecognitionCache.
+
+    An entry only answers once the real recognizer has produced the same transcript for it
+    `min_confirmations` times, so one misrecognition is never replayed.
+    """
+
+    def __init__(self, backend: RecognizerBackend, cache: Optional[RecognitionCache] = None):
+        if backend.streaming:
+            raise ValueError("CachingRecognizer wraps batch backends only")
+        self.backend = backend
+        self.cache = cache if cache is not None else RecognitionCache()
+        self.last_result: Optional[RecognitionResult] = None
+        self.fingerprint_seconds = 0.0
+        self.recognizer_seconds = 0.0
+        self.recognizer_calls = 0
+
+    @property
+    def grammar(self) -> Optional[CommandGrammar]:
+        return self.backend.grammar
+
+    def set_grammar(self, grammar: Optional[CommandGrammar]):
+        self.backend.set_grammar(grammar)
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        started = time.perf_counter()
+        probe = fingerprint(audio.get_raw_data(), audio.sample_rate, audio.sample_width)
+        near, distance = self.cache.lookup(probe) if probe is not None else (None, float("inf"))
+        self.fingerprint_seconds += time.perf_counter() - started
+        if (near is not None and distance <= self.cache.threshold
+                and near.confirmations >= self.cache.min_confirmations):
+            self.last_result = RecognitionResult(near.text, 1.0 - distance / (2 * self.cache.threshold), True)
+            logging.info(f"Recognition cache hit: {near.text} (distance {distance:.2f})")
+            return near.text
+        started = time.perf_counter()
+        text = self.backend.recognize(audio)
+        self.recognizer_seconds += time.perf_counter() - started
+        self.recognizer_calls += 1
+        self.last_result = RecognitionResult(text, 1.0, True)
+        # Only cache in-grammar commands; free-form text is unlikely to repeat exactly.
+        grammar = self.backend.grammar
+        if probe is not None and (grammar is None or grammar.matches(text)):
+            self.cache.store(probe, text.lower(), near, distance)
+        return text
+
+    def stats(self) -> Dict[str, float]:
+        """Cache hit rate plus the mean cost of fingerprinting and of a real recognition, in ms."""
+        stats = self.cache.stats()
+        stats["fingerprint_ms"] = 1000 * self.fingerprint_seconds / self.cache.lookups if self.cache.lookups else 0.0
+        stats["recognizer_ms"] = 1000 * self.recognizer_seconds / self.recognizer_calls if self.recognizer_calls else 0.0
+        return stats
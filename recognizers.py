@@ -0,0 +1,145 @@
+import json
+import logging
+from typing import List, NamedTuple, Optional
+import speech_recognition as sr
+from grammar import CommandGrammar
+
+
+class RecognitionResult(NamedTuple):
+    """A transcript hypothesis; partial results have final=False."""
+    text: str
+    confidence: float
+    final: bool
+
+
+class RecognizerBackend:
+    """Base class for speech recognition engines used by SpeechProcessor."""
+
+    streaming = False
+    grammar: Optional[CommandGrammar] = None
+
+    def set_grammar(self, grammar: Optional[CommandGrammar]):
+        """Constrain decoding to a phrase list; None restores open-vocabulary recognition."""
+        self.grammar = grammar
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        """Transcribe a complete utterance; raise sr.UnknownValueError if nothing was understood."""
+        raise NotImplementedError
+
+    def start(self, sample_rate: int):
+        """Begin a new streaming utterance (streaming backends only)."""
+        raise NotImplementedError
+
+    def accept(self, data: bytes) -> Optional[RecognitionResult]:
+        """Feed one PCM frame and return the current partial hypothesis, if it changed."""
+        raise NotImplementedError
+
+    def finish(self) -> RecognitionResult:
+        """End the utterance and return the final hypothesis."""
+        raise NotImplementedError
+
+
+class SpeechRecognitionBackend(RecognizerBackend):
+    """Batch backend delegating to one of speech_recognition's recognize_* methods."""
+
+    def __init__(self, method: str = "google", **options):
+        self.recognizer = sr.Recognizer()
+        self.method = method
+        self.options = options or ({"language": "en-US"} if method == "google" else {})
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        recognize = getattr(self.recognizer, f"recognize_{self.method}")
+        if self.grammar is None:
+            return recognize(audio, **self.options)
+        if self.method == "google":
+            # The free Google endpoint takes no phrase hints, so choose among its n-best instead.
+            response = recognize(audio, show_all=True, **self.options)
+            alternatives = [a["transcript"] for a in response.get("alternative", [])] if response else []
+            if not alternatives:
+                raise sr.UnknownValueError()
+            return self.grammar.best_alternative(alternatives) or alternatives[0]
+        if self.method == "sphinx":
+            return recognize(audio, keyword_entries=self.grammar.keyword_entries(), **self.options)
+        if self.method == "google_cloud":
+            return recognize(audio, preferred_phrases=self.grammar.recognizer_phrases, **self.options)
+        return recognize(audio, **self.options)
+
+
+class VoskRecognizer(RecognizerBackend):
+    """Offline streaming backend returning partial hypotheses as audio arrives (requires `vosk`)."""
+
+    streaming = True
+
+    def __init__(self, model_path: str = "models/vosk"):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+        self._recognizer = None
+        self._segments: List[str] = []
+        self._confidences: List[float] = []
+        self._last_partial = ""
+        self._repeats = 0
+        logging.info(f"Vosk model loaded from {model_path}")
+
+    def _create_recognizer(self, sample_rate: int):
+        from vosk import KaldiRecognizer
+        if self.grammar is not None:
+            return KaldiRecognizer(self.model, sample_rate, self.grammar.to_vosk_json())
+        return KaldiRecognizer(self.model, sample_rate)
+
+    def start(self, sample_rate: int):
+        self._recognizer = self._create_recognizer(sample_rate)
+        self._recognizer.SetWords(True)
+        self._segments = []
+        self._confidences = []
+        self._last_partial = ""
+        self._repeats = 0
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        self.start(audio.sample_rate)
+        self.accept(audio.get_raw_data(convert_width=2))
+        result = self.finish()
+        if not result.text:
+            raise sr.UnknownValueError()
+        return result.text
+
+    def accept(self, data: bytes) -> Optional[RecognitionResult]:
+        if self._recognizer.AcceptWaveform(data):
+            self._add_segment(json.loads(self._recognizer.Result()))
+            partial = ""
+        else:
+            partial = _strip_unknown(json.loads(self._recognizer.PartialResult()).get("partial", ""))
+        text = " ".join(self._segments + ([partial] if partial else []))
+        if not text:
+            return None
+        if text == self._last_partial:
+            self._repeats += 1
+        else:
+            self._last_partial = text
+            self._repeats = 0
+        # Vosk partials carry no scores; treat a hypothesis that stops changing as increasingly certain.
+        return RecognitionResult(text, 1.0 - 0.5 ** (self._repeats + 1), False)
+
+    def finish(self) -> RecognitionResult:
+        self._add_segment(json.loads(self._recognizer.FinalResult()))
+        text = " ".join(self._segments)
+        confidence = sum(self._confidences) / len(self._confidences) if self._confidences else 0.0
+        return RecognitionResult(text, confidence, True)
+
+    def _add_segment(self, result: dict):
+        text = _strip_unknown(result.get("text", ""))
+        if text:
+            self._segments.append(text)
+            self._confidences.extend(word.get("conf", 1.0) for word in result.get("result", []))
+
+
+def _strip_unknown(text: str) -> str:
+    """Drop the out-of-grammar marker Vosk emits when decoding against a phrase list."""
+    return " ".join(word for word in text.split() if word != "[unk]")
+
+
+def build_recognizer(name: str = "google", **options) -> RecognizerBackend:
+    """Create a backend by name: 'vosk' (offline streaming) or any speech_recognition method."""
+    if name == "vosk":
+        return VoskRecognizer(**options)
+    return SpeechRecognitionBackend(name, **options)
@@ -0,0 +1,62 @@
+import argparse
+import json
+import time
+from typing import List
+from audio_pipeline import CaptureService, WavFileSource
+from recognizers import RecognizerBackend, build_recognizer
+from speech import SpeechProcessor
+from vad import VAD_PROFILES
+
+
+def replay(paths: List[str], backend: RecognizerBackend, execute: bool = True,
+           vad_profile: str = "default") -> List[dict]:
+    """Play each recording in real time through SpeechProcessor and time speech end to action."""
+    processor = None
+    reports = []
+    for path in paths:
+        capture = CaptureService(WavFileSource(path, realtime=True))
+        if processor is None:
+            processor = SpeechProcessor(capture=capture, backend=backend, vad_profile=vad_profile)
+        processor.capture = capture
+        processor.auto.capture = capture
+        # Each recording calibrates the gate from its own leading silence.
+        processor.endpointer.gate.recalibrate()
+        command = processor.listen()
+        timing = processor.last_timing
+        trace_id = processor.last_trace_id
+        if execute:
+            result = processor.process_command(command, trace_id)
+        else:
+            result = command
+            processor.tracer.finish(trace_id, "dry-run")
+        done = time.monotonic()
+        capture.stop()
+        speech_end = timing.get("speech_end", done)
+        report = {
+            "file": path,
+            "command": command,
+            "result": result,
+            "early_dispatch": bool(timing.get("early")),
+            "speech_end_to_decision_ms": round(1000 * (timing.get("decided", done) - speech_end), 1),
+            "speech_end_to_action_ms": round(1000 * (done - speech_end), 1),
+        }
+        print(json.dumps(report))
+        reports.append(report)
+    if processor is not None:
+        print(processor.tracer.format_summary())
+        print(json.dumps({"endpointing": processor.endpointer.stats()}))
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded commands through CERP and measure latency")
+    parser.add_argument("recordings", nargs="+", help="16-bit mono WAV files with ~1s of leading silence")
+    parser.add_argument("--backend", default="vosk", help="Recognizer backend: vosk, google, whisper, sphinx...")
+    parser.add_argument("--model", default="models/vosk", help="Vosk model directory")
+    parser.add_argument("--dry-run", action="store_true", help="Recognize only, do not execute actions")
+    parser.add_argument("--vad-profile", default="default", choices=sorted(VAD_PROFILES),
+                        help="Endpointing profile")
+    args = parser.parse_args()
+    options = {"model_path": args.model} if args.backend == "vosk" else {}
+    replay(args.recordings, build_recognizer(args.backend, **options), execute=not args.dry_run,
+           vad_profile=args.vad_profile)
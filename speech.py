@@ -1,27 +1,30 @@
 import speech_recognition as sr
 import logging
-from typing import Optional
-from automation import Automation
-from logging.handlers import RotatingFileHandler
-import os
-
-# Ensure the logs directory exists
-log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-# Configure logging with rotation
-handler = RotatingFileHandler('logs/cerp.log', maxBytes=5 * 1024 * 1024, backupCount=2)
-logging.basicConfig(
-    handlers=[handler],
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+from actions import ActionSpec
+from automation import Automation, Interpretation
+from command_router import Intent
+from audio_pipeline import CaptureService, Subscription, get_capture_service
+from recognition_cache import CachingRecognizer, RecognitionCache
+from recognizers import RecognitionResult, RecognizerBackend, SpeechRecognitionBackend
+from vad import VAD_PROFILES, Endpointer
+from logging_config import configure_logging
+from tracing import Tracer, get_tracer
+
+RECOGNITION_CACHE_PATH = "cache/recognition.json"
+
+
+class ListenCancelled(Exception):
+    """listen() was stopped by cancel_listen() before a phrase ended."""
+
 
 class SpeechProcessor:
     """Handles speech recognition and command processing with improved delegation."""
 
     ERROR_HANDLERS = {
+        ListenCancelled: lambda: (logging.info("Listening cancelled"), "Sorry, listening was cancelled."),
         sr.WaitTimeoutError: lambda: (logging.warning("Listening timed out"), "Sorry, timed out waiting for command."),
         sr.UnknownValueError: lambda: (logging.warning("Could not understand audio"), "Sorry, I couldn't understand."),
         sr.RequestError: lambda: (logging.error("Speech recognition request failed"), "Could not request results, check internet."),
@@ -29,58 +32,184 @@ class SpeechProcessor:
         Exception: lambda e: (logging.error(f"Speech recognition failed: {e}"), f"Error: {str(e)}")
     }
 
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.auto = Automation()
+    EARLY_DISPATCH_CONFIDENCE = 0.75
+    PREROLL_FRAMES = 10
+    RESULT_PREFIXES = ("error", "sorry")
+
+    def __init__(self, capture: Optional[CaptureService] = None, backend: Optional[RecognizerBackend] = None,
+                 constrained: bool = True, tracer: Optional[Tracer] = None,
+                 automation: Optional[Automation] = None, vad_profile: str = "default"):
+        # Repeated commands are answered from the cache instead of another Google round trip.
+        self.backend = backend or CachingRecognizer(SpeechRecognitionBackend("google"),
+                                                    RecognitionCache(path=RECOGNITION_CACHE_PATH))
+        self.capture = capture or get_capture_service()
+        self.endpointer = Endpointer(vad_profile, self.capture.source.frame_duration)
+        self.last_timing: Dict[str, float] = {}
+        self.tracer = tracer or get_tracer()
+        self.last_trace_id: Optional[str] = None
+        self._listening: Optional[Subscription] = None
+        self.auto = automation or Automation(capture=self.capture)
         logging.info("Speech processor initialized")
-        self.COMMAND_DISPATCHER = {
-            "error": lambda cmd: cmd,
-            "sorry": lambda cmd: cmd,
-            "open": lambda cmd: self.auto.execute_task(cmd),
-            "close": lambda cmd: self.auto.execute_task(cmd),
-            "increase volume": lambda cmd: self.auto.execute_task(cmd),
-            "decrease volume": lambda cmd: self.auto.execute_task(cmd),
-            "system status": lambda cmd: self.auto.execute_task(cmd),
-            "start voice typing": lambda cmd: self.auto.execute_task(cmd),
-            "stop voice typing": lambda cmd: self.auto.execute_task(cmd),
-            "skip shorts": lambda cmd: self.auto.execute_task(cmd),
-            "skip next": lambda cmd: self.auto.execute_task(cmd),
-            "exit": lambda cmd: self.auto.execute_task(cmd),
-        }
-
-    def listen(self) -> Optional[str]:
-        """Capture voice command with robust error handling."""
-        with sr.Microphone() as source:
-            logging.info("Listening for command...")
-            try:
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                command = self.recognizer.recognize_google(audio, language="en-US").lower()
-                logging.info(f"Recognized command: {command}")
-                return command
-            except Exception as e:
-                handler = self.ERROR_HANDLERS.get(type(e), lambda: (logging.error(f"Speech recognition failed: {e}"), f"Error: {str(e)}"))
-                log_action, result = handler()
-                return result
+        self.constrained = constrained
+        self.rebuild_grammar()
+        self.auto.add_catalog_listener(self.rebuild_grammar)
 
-    def process_command(self, command: str) -> str:
-        """Process commands, delegating to Automation where applicable."""
-        logging.info(f"Processing command: {command}")
+    def rebuild_grammar(self):
+        """Hand Automation's current grammar to the backend when in constrained mode."""
+        self.grammar = self.auto.grammar
+        self.backend.set_grammar(self.grammar if self.constrained else None)
+
+    def register_command(self, phrase: str, handler: Callable[[Intent], str], aliases: Tuple[str, ...] = (),
+                         slot: Optional[str] = None):
+        """Add a spoken command (with optional aliases and argument slot); the grammar is rebuilt."""
+        phrase = phrase.lower()
+        self.auto.register_action(ActionSpec(phrase, (phrase,) + tuple(aliases),
+                                             lambda auto, intent: handler(intent), slot=slot))
+
+    def set_vad_profile(self, name: str):
+        """Switch endpointing profile (see vad.VAD_PROFILES), keeping the learned noise floor."""
+        profile = VAD_PROFILES[name]
+        gate = self.endpointer.gate
+        gate.margin = profile.margin
+        self.endpointer = Endpointer(profile, self.capture.source.frame_duration, gate=gate)
+        logging.info(f"VAD profile set to {name}")
+
+    def listen(self, on_partial: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """Capture voice command with robust error handling; the command's trace ID is left in last_trace_id."""
+        trace_id = self.last_trace_id = self.tracer.start_trace()
         try:
-            state_key = next((key for key in self.COMMAND_DISPATCHER if key in command.lower()), "default")
-            return self.COMMAND_DISPATCHER.get(state_key, self._execute_command)(command)
+            command = self._listen_phrase(trace_id, on_partial)
+            logging.info(f"Recognized command: {command}")
+            return command
         except Exception as e:
-            logging.error(f"Command processing failed: {command}, Error: {e}")
-            return f"Error processing command: {str(e)}"
+            handler = self.ERROR_HANDLERS.get(type(e), lambda: (logging.error(f"Speech recognition failed: {e}"), f"Error: {str(e)}"))
+            log_action, result = handler()
+            self.tracer.set_kind(trace_id, "no command")
+            self.tracer.finish(trace_id, "error")
+            return result
+        finally:
+            self._listening = None
+
+    def _listen_phrase(self, trace_id: Optional[str] = None,
+                       on_partial: Optional[Callable[[str], None]] = None) -> str:
+        """Capture one phrase until the endpointer ends it; streaming backends may return early on a partial."""
+        streaming = self.backend.streaming
+        preroll = deque(maxlen=self.PREROLL_FRAMES)
+        frames = []
+        ended = False
+        capture_start = time.monotonic()
+        self.endpointer.reset()
+        with self.capture.subscribe("command") as source:
+            self._listening = source
+            logging.info("Listening for command...")
+            if streaming:
+                self.backend.start(source.SAMPLE_RATE)
+            while True:
+                frame = source.get(timeout=source.read_timeout)
+                if frame is None:
+                    if source.closed:
+                        raise ListenCancelled()
+                    break
+                event = self.endpointer.process(frame.data, frame.timestamp)
+                if event == "timeout":
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                if event == "silence":
+                    preroll.append(frame)
+                    continue
+                pending = list(preroll) + [frame] if event == "start" else [frame]
+                preroll.clear()
+                frames.extend(pending)
+                if streaming:
+                    for item in pending:
+                        partial = self.backend.accept(item.data)
+                        if partial is not None and self._is_confident_command(partial, on_partial):
+                            decided = time.monotonic()
+                            self.last_timing = {"speech_end": self.endpointer.speech_end or frame.timestamp,
+                                                "decided": decided, "early": 1.0}
+                            self.tracer.add_span(trace_id, "capture", capture_start, decided)
+                            self.tracer.add_span(trace_id, "recognition", self.last_timing["speech_end"], decided)
+                            logging.info(f"Dispatching early on partial result: {partial.text}")
+                            return partial.text.lower()
+                if event == "end":
+                    ended = True
+                    break
+            sample_rate, sample_width = source.SAMPLE_RATE, source.SAMPLE_WIDTH
+        endpoint = time.monotonic()
+        if not frames:
+            raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+        speech_end = self.endpointer.speech_end or endpoint
+        self.tracer.add_span(trace_id, "capture", capture_start, endpoint)
+        # Endpointing cost is the trailing silence the endpointer waited through before deciding.
+        wait = self.endpointer.decision_delays[-1] if ended else endpoint - speech_end
+        self.tracer.add_span(trace_id, "vad", endpoint - wait, endpoint)
+        with self.tracer.span(trace_id, "recognition"):
+            if streaming:
+                text = self.backend.finish().text
+            else:
+                audio = sr.AudioData(b"".join(item.data for item in frames), sample_rate, sample_width)
+                text = self.backend.recognize(audio)
+        self.last_timing = {"speech_end": speech_end, "decided": time.monotonic(), "early": 0.0}
+        if not text:
+            raise sr.UnknownValueError()
+        return text.lower()
+
+    def cancel_listen(self):
+        """Make a listen() running on another thread return at its next frame."""
+        source = self._listening
+        if source is not None:
+            source.close()
+
+    def _is_confident_command(self, partial: RecognitionResult, on_partial: Optional[Callable[[str], None]]) -> bool:
+        """Return True when a partial hypothesis is stable and names a complete, known command."""
+        if on_partial is not None:
+            on_partial(partial.text)
+        if partial.confidence < self.EARLY_DISPATCH_CONFIDENCE:
+            return False
+        return self.is_complete_command(partial.text)
+
+    def is_complete_command(self, text: str) -> bool:
+        """Check whether text is a dispatchable command with all of its arguments present."""
+        return self.grammar.matches(text)
 
-    def _execute_command(self, command: str) -> str:
-        """Execute non-specific commands via Automation."""
+    def interpret(self, command: str) -> Interpretation:
+        """Decide what a command does without running it; messages from listen() pass straight through.
+
+        This is the one routing path: process_command() and CERPCore.run_command() both start here.
+        """
+        if command.lower().startswith(self.RESULT_PREFIXES):
+            return Interpretation("no command", reply=command, status="error")
+        return self.auto.interpret(command)
+
+    def process_command(self, command: str, trace_id: Optional[str] = None) -> str:
+        """Interpret and run a command on the calling thread; closes the trace if one is given."""
+        logging.info(f"Processing command: {command}")
+        started = time.monotonic()
+        status, kind = "done", "unknown"
+        result = ""
         try:
-            return self.auto.execute_task(command)
+            with self.tracer.span(trace_id, "routing"):
+                interpretation = self.interpret(command)
+            kind = interpretation.kind
+            self.tracer.set_kind(trace_id, kind)
+            if interpretation.reply is not None:
+                status = interpretation.status
+                result = interpretation.reply
+                return result
+            with self.tracer.span(trace_id, "action"):
+                result = self.auto.perform(interpretation)
+            return result
         except Exception as e:
-            logging.error(f"Command execution failed: {command}, Error: {e}")
-            return f"Error executing command: {str(e)}"
+            status = "error"
+            logging.error(f"Command processing failed: {command}, Error: {e}")
+            result = f"Error processing command: {str(e)}"
+            return result
+        finally:
+            # Suggestions are not failures of the command pipeline, so the trace still counts them as done.
+            self.tracer.finish(trace_id, "error" if status == "error" else "done")
+            self.auto.history.record(command, kind, status, result, time.monotonic() - started)
 
 if __name__ == "__main__":
+    configure_logging()
     processor = SpeechProcessor()
     command = processor.listen()
-    print(processor.process_command(command))
\ No newline at end of file
+    print(processor.process_command(command, processor.last_trace_id))
\ No newline at end of file
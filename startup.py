@@ -0,0 +1,76 @@
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+class StartupProfiler:
+    """Times module imports and named init phases from process start until the app is ready."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # name -> (inclusive seconds, self seconds, nesting depth)
+        self.imports: Dict[str, Tuple[float, float, int]] = {}
+        self.phases: List[Tuple[str, float, float]] = []
+        self._original_import = None
+        self._local = threading.local()
+
+    def install(self) -> "StartupProfiler":
+        """Start timing every first-time absolute import."""
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+        return self
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of initialization work."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, started - self.started, time.perf_counter() - started))
+
+    def mark(self, name: str):
+        """Record a point in time (e.g. "window shown") with no duration."""
+        self.phases.append((name, time.perf_counter() - self.started, 0.0))
+
+    def report(self, top: int = 8) -> str:
+        """Direct imports with their total cost, the costliest modules overall, and init phases."""
+        direct = sorted(((name, total) for name, (total, _, depth) in self.imports.items() if depth == 0),
+                        key=lambda item: item[1], reverse=True)
+        heaviest = sorted(((name, own) for name, (_, own, _) in self.imports.items()),
+                          key=lambda item: item[1], reverse=True)[:top]
+        lines = [f"Startup took {1000 * (time.perf_counter() - self.started):.0f} ms"]
+        lines.append(f"  imports: {1000 * sum(total for _, total in direct):.0f} ms")
+        lines.extend(f"    {name}: {1000 * total:.1f} ms" for name, total in direct)
+        lines.append("  heaviest modules (self time):")
+        lines.extend(f"    {name}: {1000 * own:.1f} ms" for name, own in heaviest)
+        lines.append("  phases:")
+        lines.extend(f"    {name}: {1000 * duration:.1f} ms (at {1000 * at:.0f} ms)" if duration
+                     else f"    {name}: at {1000 * at:.0f} ms" for name, at, duration in self.phases)
+        return "\n".join(lines)
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only first-time absolute imports cost anything worth reporting.
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if name not in self.imports:
+                self.imports[name] = (elapsed, elapsed - children, len(stack))
@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional
+import psutil
+
+
+class MetricsSnapshot(NamedTuple):
+    """One sample of system state."""
+    timestamp: float
+    cpu: float
+    memory: float
+    battery: Optional[float]
+    plugged: Optional[bool]
+    internet: bool
+
+
+class MetricsSampler:
+    """Polls system metrics on a background thread into a fixed-size ring buffer."""
+
+    def __init__(self, interval: float = 1.0, capacity: int = 600, slow_every: int = 10,
+                 pause_on_battery: bool = False, battery_check_interval: float = 30.0):
+        self.interval = interval
+        self.slow_every = slow_every
+        self.pause_on_battery = pause_on_battery
+        self.battery_check_interval = battery_check_interval
+        self.samples_taken = 0
+        self.sampler_cpu_seconds = 0.0
+        self._samples = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._paused = threading.Event()
+        self._thread = None
+        self._battery = (None, None)
+        self._internet = False
+
+    def start(self):
+        """Start sampling; the first CPU reading primes psutil so later ones cover a real interval."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        psutil.cpu_percent(interval=None)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cerp-metrics", daemon=True)
+        self._thread.start()
+        logging.info(f"Metrics sampler started at {1 / self.interval:g} Hz.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def pause(self):
+        """Stop polling until resume() (e.g. to save power on battery)."""
+        self._paused.set()
+        logging.info("Metrics sampler paused.")
+
+    def resume(self):
+        self._paused.clear()
+        logging.info("Metrics sampler resumed.")
+
+    @property
+    def paused(self) -> bool:
+        return self._paused.is_set()
+
+    def latest(self) -> MetricsSnapshot:
+        """Return the newest snapshot, sampling once synchronously if none exists yet."""
+        with self._lock:
+            if self._samples:
+                return self._samples[-1]
+        return self.sample(cpu_interval=0.1)
+
+    def window(self, seconds: float) -> Dict[str, float]:
+        """Average, minimum and maximum CPU and memory over the last `seconds`."""
+        cutoff = time.monotonic() - seconds
+        with self._lock:
+            recent: List[MetricsSnapshot] = [s for s in reversed(self._samples) if s.timestamp >= cutoff]
+        if not recent:
+            return {}
+        stats = {"samples": len(recent)}
+        for field in ("cpu", "memory"):
+            values = [getattr(s, field) for s in recent]
+            stats[f"{field}_avg"] = sum(values) / len(values)
+            stats[f"{field}_min"] = min(values)
+            stats[f"{field}_max"] = max(values)
+        return stats
+
+    def overhead(self) -> Dict[str, float]:
+        """CPU seconds spent sampling, in total and per sample."""
+        return {
+            "samples": self.samples_taken,
+            "cpu_seconds": self.sampler_cpu_seconds,
+            "cpu_ms_per_sample": 1000 * self.sampler_cpu_seconds / self.samples_taken if self.samples_taken else 0.0,
+        }
+
+    def sample(self, cpu_interval: Optional[float] = None) -> MetricsSnapshot:
+        """Take one snapshot now; battery and interface state refresh every `slow_every` samples."""
+        started = time.thread_time()
+        if self.samples_taken % self.slow_every == 0:
+            battery = psutil.sensors_battery()
+            self._battery = (battery.percent, battery.power_plugged) if battery else (None, None)
+            self._internet = any(iface.isup for iface in psutil.net_if_stats().values())
+        snapshot = MetricsSnapshot(time.monotonic(), psutil.cpu_percent(interval=cpu_interval),
+                                   psutil.virtual_memory().percent, self._battery[0], self._battery[1],
+                                   self._internet)
+        with self._lock:
+            self._samples.append(snapshot)
+        self.samples_taken += 1
+        self.sampler_cpu_seconds += time.thread_time() - started
+        return snapshot
+
+    def _on_battery(self) -> bool:
+        battery = psutil.sensors_battery()
+        return battery is not None and not battery.power_plugged
+
+    def _run(self):
+        # Wait a full interval first so the first CPU reading is measured against the priming call.
+        while not self._stop.wait(self.interval):
+            if self.pause_on_battery and self._on_battery():
+                self._stop.wait(self.battery_check_interval)
+                continue
+            if self._paused.is_set():
+                continue
+            try:
+                self.sample()
+            except Exception as e:
+                logging.error(f"Metrics sampling failed: {e}")
@@ -0,0 +1,70 @@
+import threading
+import time
+import pytest
+from action_executor import ActionExecutor
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_outcomes():
+    executor = ActionExecutor(workers=1, max_pending=2)
+    assert executor.submit("ok", lambda: "fine").wait(2).status == "done"
+    failed = executor.submit("bad", lambda: 1 / 0).wait(2)
+    assert failed.status == "error" and failed.result.startswith("Error")
+    executor.shutdown()
+
+
+def test_full_queue_rejects(release):
+    executor = ActionExecutor(workers=1, max_pending=2)
+    executor.submit("hang", release.wait)
+    executor.submit("hang", release.wait)
+    assert executor.submit("ok", lambda: "fine").wait(1).status == "rejected"
+    release.set()
+    executor.shutdown(wait=True)
+
+
+def test_timed_out_action_does_not_hold_its_worker(release):
+    executor = ActionExecutor(workers=1)
+    hung = executor.submit("hang", release.wait, timeout=0.1)
+    queued = executor.submit("ok", lambda: "queued", timeout=5.0)
+    assert hung.wait(2).status == "timeout"
+    # The action queued behind the hung one runs on the replacement worker.
+    assert queued.wait(2).result == "queued"
+    assert executor.submit("ok", lambda: "after", timeout=5.0).wait(2).result == "after"
+    assert [action["kind"] for action in executor.stuck()] == ["hang"]
+    release.set()
+    deadline = time.monotonic() + 2
+    while executor.stuck() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert executor.stuck() == []
+    executor.shutdown(wait=True)
+
+
+def test_cancelled_running_action_is_detached(release):
+    executor = ActionExecutor(workers=1)
+    started = threading.Event()
+    hung = executor.submit("hang", lambda: (started.set(), release.wait()), timeout=5.0)
+    assert started.wait(2)
+    assert executor.cancel(hung.action_id)
+    assert hung.wait(1).status == "cancelled"
+    assert executor.submit("ok", lambda: "fine").wait(2).status == "done"
+    assert len(executor.stuck()) == 1
+    executor.shutdown()
+
+
+def test_stuck_workers_are_capped(release):
+    executor = ActionExecutor(workers=1, max_stuck=1)
+    assert executor.submit("hang", release.wait, timeout=0.05).wait(2).status == "timeout"
+    assert executor.submit("hang", release.wait, timeout=0.05).wait(2).status == "timeout"
+    # Past the cap the worker is not replaced, so new work waits until a stuck call returns.
+    waiting = executor.submit("ok", lambda: "late", timeout=5.0)
+    assert len(executor.stuck()) == 2
+    assert waiting.wait(0.2) is None
+    release.set()
+    assert waiting.wait(2).result == "late"
+    executor.shutdown(wait=True)
@@ -0,0 +1,105 @@
+import os
+import pytest
+from catalog import AppCatalog, ScanRoot
+
+DESKTOP = """[Desktop Entry]
+Type=Application
+Name={name}
+Exec={command} %U
+"""
+
+
+def write_desktop(directory, file_name, name, command):
+    with open(os.path.join(directory, file_name), "w", encoding="utf-8") as desktop:
+        desktop.write(DESKTOP.format(name=name, command=command))
+
+
+def write_program(directory, name):
+    path = os.path.join(directory, name)
+    with open(path, "w") as program:
+        program.write("#!/bin/sh\n")
+    os.chmod(path, 0o755)
+
+
+def touch(directory, step):
+    """Give a directory a distinct mtime so the change is seen even on coarse-grained file systems."""
+    mtime = os.stat(directory).st_mtime_ns + step * 1_000_000_000
+    os.utime(directory, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    applications, programs = tmp_path / "applications", tmp_path / "bin"
+    applications.mkdir()
+    programs.mkdir()
+    write_desktop(applications, "gimp.desktop", "GNU Image Manipulation Program", "gimp-2.10")
+    write_desktop(applications, "writer.desktop", "LibreOffice Writer", "libreoffice --writer")
+    for name in ("gimp-2.10", "firefox", "poweroff", "rm"):
+        write_program(programs, name)
+    roots = [ScanRoot(str(applications), "desktop", 1), ScanRoot(str(programs), "path", 0)]
+    return str(applications), str(programs), roots, str(tmp_path / "apps.json")
+
+
+@pytest.mark.skipif(os.name == "nt", reason=".desktop files and $PATH scanning are Linux-only")
+class TestAppCatalog:
+
+    def test_scan_indexes_desktop_entries_and_aliases(self, tree):
+        _, _, roots, index = tree
+        catalog = AppCatalog(index, roots, builtin={})
+        assert catalog.rescan()
+        assert catalog.get("gimp").source == "desktop"
+        assert catalog.get("image manipulation program").name == "GNU Image Manipulation Program"
+        assert catalog.get("writer").target == "libreoffice --writer"
+
+    def test_path_programs_need_the_allowlist_or_a_desktop_entry(self, tree):
+        _, _, roots, index = tree
+        catalog = AppCatalog(index, roots, builtin={})
+        catalog.rescan()
+        assert catalog.get("firefox").source == "path"
+        assert catalog.get("gimp 2 10").source == "path"
+        assert "poweroff" not in catalog and "rm" not in catalog
+        # Programs found on $PATH are never added to the spoken vocabulary.
+        assert "firefox" not in catalog.names()
+
+    def test_rescan_only_lists_changed_directories(self, tree):
+        applications, _, roots, index = tree
+        catalog = AppCatalog(index, roots, builtin={})
+        changes = []
+        catalog.listeners.append(lambda: changes.append(len(catalog)))
+        catalog.rescan()
+        assert catalog.directories_listed == 2
+        assert not catalog.rescan()
+        assert catalog.directories_listed == 2
+        write_desktop(applications, "vlc.desktop", "VLC media player", "/usr/bin/vlc")
+        touch(applications, 1)
+        assert catalog.rescan()
+        assert catalog.directories_listed == 3
+        assert catalog.get("vlc media player").target == "/usr/bin/vlc"
+        assert changes == [len(catalog) - 1, len(catalog)]
+
+    def test_removed_directory_drops_its_applications(self, tree):
+        applications, _, roots, index = tree
+        catalog = AppCatalog(index, roots, builtin={})
+        catalog.rescan()
+        for file_name in os.listdir(applications):
+            os.remove(os.path.join(applications, file_name))
+        os.rmdir(applications)
+        assert catalog.rescan()
+        assert "writer" not in catalog
+
+    def test_saved_index_is_used_without_scanning(self, tree):
+        _, _, roots, index = tree
+        AppCatalog(index, roots, builtin={}).rescan()
+        reloaded = AppCatalog(index, roots, builtin={})
+        assert reloaded.scans == 0
+        assert reloaded.get("writer") is not None
+        assert not reloaded.rescan()
+        assert reloaded.directories_listed == 0
+
+    def test_registered_and_builtin_outrank_scanned(self, tree):
+        _, _, roots, index = tree
+        catalog = AppCatalog(index, roots, builtin={"firefox": "/opt/firefox/firefox"})
+        catalog.rescan()
+        assert catalog.get("firefox").source == "builtin"
+        catalog.add("gimp", "/opt/gimp/bin/gimp")
+        assert catalog.get("gimp").target == "/opt/gimp/bin/gimp"
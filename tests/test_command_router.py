@@ -0,0 +1,80 @@
+import pytest
+from command_router import CommandRouter, CommandSpec, number_phrases, read_number
+
+SPECS = [
+    CommandSpec("open", ("open",), slot="target"),
+    CommandSpec("volume up", ("increase volume", "volume up")),
+    CommandSpec("set volume", ("set volume", "set volume to"), slot="level", slot_type="int"),
+    CommandSpec("search", ("search", "search for"), slot="query"),
+    CommandSpec("exit", ("exit", "quit"), priority=10),
+]
+
+
+@pytest.fixture
+def router():
+    return CommandRouter(SPECS)
+
+
+def test_routes_phrase_and_fills_text_slot(router):
+    intent = router.route("Open Google Chrome")
+    assert intent.name == "open"
+    assert intent.args == {"target": "google chrome"}
+    assert intent.utterance == "Open Google Chrome"
+
+
+def test_alias_and_leading_filler(router):
+    assert router.route("can you volume up please").name == "volume up"
+
+
+def test_longest_phrase_wins(router):
+    intent = router.route("search for cats")
+    assert intent.phrase == "search for"
+    assert intent.args == {"query": "cats"}
+
+
+def test_priority_beats_length(router):
+    assert router.route("quit increase volume").name == "exit"
+
+
+@pytest.mark.parametrize("utterance, level", [
+    ("set volume to 40", 40),
+    ("set volume to seventy five percent", 75),
+    ("set volume fifteen", 15),
+    ("set volume to one hundred", 100),
+    ("set volume", None),
+])
+def test_int_slot(router, utterance, level):
+    assert router.route(utterance).args == {"level": level}
+
+
+def test_unknown_utterance(router):
+    assert router.route("make me a sandwich") is None
+    assert router.route("") is None
+
+
+def test_unknown_slot_type_is_rejected():
+    with pytest.raises(ValueError):
+        CommandRouter([CommandSpec("bad", ("bad",), slot="x", slot_type="float")])
+
+
+def test_phrases_filter_by_slot(router):
+    assert "increase volume" in router.phrases(slotted=False)
+    assert "increase volume" not in router.phrases(slotted=True)
+    assert "open" in router.phrases(slotted=True)
+
+
+@pytest.mark.parametrize("words, expected", [
+    ("seventy five", (75, 2)),
+    ("thirteen apples", (13, 1)),
+    ("one hundred five", (105, 3)),
+    ("42", (42, 1)),
+    ("five six", (5, 1)),
+    ("volume", (None, 0)),
+])
+def test_read_number(words, expected):
+    assert read_number(words.split()) == expected
+
+
+def test_number_phrases_round_trip():
+    phrases = number_phrases(100)
+    assert sorted(read_number(phrase.split())[0] for phrase in phrases) == list(range(101))
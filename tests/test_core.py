@@ -0,0 +1,23 @@
+import threading
+from audio_pipeline import CaptureService
+from benchmark import ScriptedRecognizer, build_fake_automation, synthesize
+from core import CERPCore
+from speech import SpeechProcessor
+from wakeword import CLOUD_NOTICE, RecognizerSpotter, WakeWordDetector
+
+
+def test_cloud_wake_word_fallback_is_reported():
+    capture = CaptureService(synthesize(""))
+    processor = SpeechProcessor(capture=capture, backend=ScriptedRecognizer(), automation=build_fake_automation())
+    core = CERPCore(processor, detector_factory=lambda: WakeWordDetector(RecognizerSpotter()))
+    noticed = threading.Event()
+    core.listeners.append(lambda event: event == ("notice", CLOUD_NOTICE) and noticed.set())
+    core.start()
+    try:
+        core.start_wake_word()
+        assert noticed.wait(5)
+        assert core.notices == [CLOUD_NOTICE]
+    finally:
+        core.stop()
+        processor.auto.shutdown()
+        capture.stop()
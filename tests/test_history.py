@@ -0,0 +1,68 @@
+import pytest
+from history import HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), recent=5)
+    yield store
+    store.close()
+
+
+def fill(store, count, start=1000.0):
+    for index in range(count):
+        store.record(f"command {index}", "open", "done", "ok", timestamp=start + index)
+
+
+def test_pages_are_newest_first_and_contiguous(store):
+    fill(store, 120)
+    first, second = store.page(0, 50), store.page(50, 50)
+    assert [entry.command for entry in first[:2]] == ["command 119", "command 118"]
+    assert [entry.command for entry in second[:1]] == ["command 69"]
+    assert [entry.id for entry in first + second] == list(range(120, 20, -1))
+
+
+def test_last_page_is_short_and_past_the_end_is_empty(store):
+    fill(store, 120)
+    assert len(store.page(100, 50)) == 20
+    assert store.page(120, 50) == []
+    assert HistoryStore(":memory:").page(0, 50) == []
+
+
+def test_recent_is_bounded_and_oldest_first(store):
+    fill(store, 8)
+    assert [entry.command for entry in store.recent()] == [f"command {index}" for index in range(3, 8)]
+    assert [entry.command for entry in store.recent(2)] == ["command 6", "command 7"]
+
+
+def test_reopen_keeps_history(tmp_path):
+    path = str(tmp_path / "history.db")
+    first = HistoryStore(path)
+    fill(first, 10)
+    first.close()
+    reopened = HistoryStore(path)
+    assert len(reopened) == 10
+    assert reopened.page(0, 1)[0].command == "command 9"
+    reopened.close()
+
+
+def test_refresh_sees_rows_written_by_another_process(tmp_path):
+    path = str(tmp_path / "history.db")
+    daemon, gui = HistoryStore(path), HistoryStore(path)
+    fill(daemon, 3)
+    assert len(gui) == 0
+    assert [entry.command for entry in gui.refresh()] == ["command 0", "command 1", "command 2"]
+    assert len(gui) == 3 and gui.page(0, 1)[0].command == "command 2"
+    assert gui.refresh() == []
+    daemon.close()
+    gui.close()
+
+
+def test_error_results_count_as_failures(store):
+    store.record("open notepad", "open", "done", "Opened notepad", timestamp=1000.0)
+    failed = store.record("open foo", "open", "done", "Error: foo not found", timestamp=1001.0)
+    store.record("open notepad", "open", "timeout", "", timestamp=1002.0)
+    assert failed.status == "error"
+    assert [entry.command for entry in store.failures(since=0)] == ["open notepad", "open foo"]
+    assert store.most_used(since=0) == [("open notepad", 2), ("open foo", 1)]
+    assert store.outcomes(since=0) == {"done": 1, "error": 1, "timeout": 1}
@@ -0,0 +1,52 @@
+from intent_resolver import IntentResolver, phonetic_key, strip_filler
+
+PHRASES = ["open notepad", "open calculator", "close notepad", "increase volume", "decrease volume",
+           "set volume", "turn up the volume", "system status", "skip next", "skip shorts"]
+
+
+def test_strip_filler():
+    assert strip_filler("Set the Volume please") == "set volume"
+    # A phrase made only of filler words is kept as it is.
+    assert strip_filler("the a") == "the a"
+
+
+def test_phonetic_key_ignores_spelling():
+    assert phonetic_key("fone") == phonetic_key("phone")
+    assert phonetic_key("kwick") == phonetic_key("quick")
+
+
+def test_exact_match_ignores_case_and_filler():
+    resolver = IntentResolver(PHRASES)
+    assert resolver.resolve("Set the volume").match == ("set volume", 1.0)
+
+
+def test_duplicates_are_indexed_once():
+    resolver = IntentResolver(["open notepad", "Open Notepad", "open the notepad"])
+    assert len(resolver) == 1
+
+
+def test_misspelling_resolves():
+    resolver = IntentResolver(PHRASES)
+    resolution = resolver.resolve("open notpad")
+    assert resolution.match.phrase == "open notepad"
+    assert resolution.suggestions == []
+
+
+def test_ambiguous_query_returns_ranked_suggestions():
+    resolver = IntentResolver(PHRASES)
+    resolution = resolver.resolve("skip")
+    assert resolution.match is None
+    phrases = [match.phrase for match in resolution.suggestions]
+    assert set(phrases[:2]) == {"skip next", "skip shorts"}
+    scores = [match.score for match in resolution.suggestions]
+    assert scores == sorted(scores, reverse=True)
+    assert all(score >= resolver.suggestion_floor for score in scores)
+
+
+def test_unrelated_query_has_no_match_or_suggestions():
+    resolver = IntentResolver(PHRASES)
+    assert resolver.resolve("xyzzy") == (None, [])
+
+
+def test_empty_resolver():
+    assert IntentResolver().resolve("open notepad") == (None, [])
@@ -0,0 +1,115 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import pytest
+from events import ActionResult, CoreEvent
+from ipc import CERPClient, CommandServer, decode_event, encode_event
+
+
+def test_result_event_round_trips_through_json():
+    event = CoreEvent("result", ("open notepad", ActionResult(3, "open", "done", "Opened notepad", 0.25)))
+    assert decode_event(json.loads(json.dumps(encode_event(event)))) == event
+
+
+def test_plain_events_round_trip():
+    for event in (CoreEvent("partial", "open note"), CoreEvent("idle")):
+        assert decode_event(json.loads(json.dumps(encode_event(event)))) == event
+
+
+@pytest.fixture(scope="module")
+def core():
+    from audio_pipeline import CaptureService
+    from benchmark import ScriptedRecognizer, build_fake_automation, synthesize
+    from core import CERPCore
+    from speech import SpeechProcessor
+    capture = CaptureService(synthesize(""))
+    processor = SpeechProcessor(capture=capture, backend=ScriptedRecognizer(), automation=build_fake_automation())
+    core = CERPCore(processor)
+    core.start()
+    yield core
+    core.stop()
+    processor.auto.shutdown()
+    capture.stop()
+
+
+@pytest.fixture
+def server(core):
+    if sys.platform == "win32":
+        address = rf"\\.\pipe\cerp-test-{os.getpid()}-{threading.get_ident()}"
+    else:
+        address = os.path.join(tempfile.mkdtemp(), "cerp.sock")
+    server = CommandServer(core, address)
+    server.start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(server):
+    client = CERPClient(server.address)
+    client.connect()
+    yield client
+    client.close()
+
+
+def test_ping_and_command(client):
+    assert client.request("ping") == "pong"
+    result = client.command("system status")
+    assert isinstance(result, ActionResult)
+    assert result.status == "done"
+
+
+def test_errors_are_reported_per_request(client):
+    with pytest.raises(RuntimeError, match="unknown op"):
+        client.request("nonsense")
+    with pytest.raises(RuntimeError, match="non-empty"):
+        client.request("command", text="  ")
+    with pytest.raises(RuntimeError, match="not allowed"):
+        client.request("shutdown")
+    assert client.request("ping") == "pong"
+
+
+def test_pipelined_responses_match_their_requests(client):
+    futures = [client.send("ping") if index % 2 else client.send("nonsense") for index in range(200)]
+    for index, future in enumerate(futures):
+        if index % 2:
+            assert future.result(10) == "pong"
+        else:
+            assert isinstance(future.exception(10), RuntimeError)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="raw Unix socket framing")
+def test_invalid_json_line_does_not_drop_the_connection(server):
+    with socket.socket(socket.AF_UNIX) as raw:
+        raw.connect(server.address)
+        raw.settimeout(5)
+        raw.sendall(b"not json\n" + json.dumps({"id": 1, "op": "ping"}).encode() + b"\n")
+        replies = raw.makefile("rb")
+        assert json.loads(replies.readline()) == {"id": None, "ok": False, "error": "invalid JSON"}
+        assert json.loads(replies.readline()) == {"id": 1, "ok": True, "result": "pong"}
+
+
+def test_subscribers_receive_events_and_a_disconnect(server):
+    events = []
+    received = threading.Event()
+
+    def on_event(event):
+        events.append(event)
+        if event.name in ("result", "disconnected"):
+            received.set()
+    client = CERPClient(server.address, on_event=on_event)
+    client.connect()
+    client.subscribe()
+    client.command("system status")
+    assert received.wait(5)
+    command, result = next(event.payload for event in events if event.name == "result")
+    assert command == "system status" and isinstance(result, ActionResult)
+    received.clear()
+    server.close()
+    assert received.wait(5)
+    assert events[-1] == CoreEvent("disconnected")
+    assert not client.connected
+    client.close()
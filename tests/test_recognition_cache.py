@@ -0,0 +1,76 @@
+import array
+import json
+import math
+import random
+import speech_recognition as sr
+from recognition_cache import CachingRecognizer, RecognitionCache, fingerprint
+from recognizers import RecognizerBackend
+
+RATE = 16000
+
+
+def pcm(*segments, seed=0):
+    """16-bit PCM from (seconds, tone RMS, noise RMS) segments."""
+    rng = random.Random(seed)
+    samples = array.array("h")
+    for seconds, tone, noise in segments:
+        for i in range(int(seconds * RATE)):
+            value = tone * math.sqrt(2) * math.sin(2 * math.pi * 440 * i / RATE) + rng.gauss(0, noise)
+            samples.append(max(-32768, min(32767, int(value))))
+    return samples.tobytes()
+
+
+class EchoBackend(RecognizerBackend):
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def recognize(self, audio):
+        self.calls += 1
+        return self.text
+
+
+def test_fingerprint_ignores_leading_and_trailing_silence():
+    short = fingerprint(pcm((0.2, 0, 20), (0.6, 3000, 20), (0.2, 0, 20)))
+    long = fingerprint(pcm((0.8, 0, 20), (0.6, 3000, 20), (0.9, 0, 20)))
+    assert short is not None and long is not None
+    assert short.duration == long.duration
+
+
+def test_fingerprint_of_quiet_speech_in_loud_noise_is_none():
+    # Speech at 1300 RMS over 500 RMS noise stays below 3x the noise percentile: nothing counts as voiced.
+    assert fingerprint(pcm((0.3, 0, 500), (0.6, 1300, 500), (0.3, 0, 500))) is None
+
+
+def test_fingerprint_of_steady_signal_is_none():
+    assert fingerprint(pcm((1.0, 2000, 0))) is None
+
+
+def test_caching_recognizer_still_recognizes_unfingerprintable_audio():
+    backend = EchoBackend("open notepad")
+    recognizer = CachingRecognizer(backend, RecognitionCache())
+    audio = sr.AudioData(pcm((0.3, 0, 500), (0.6, 1300, 500), (0.3, 0, 500)), RATE, 2)
+    assert recognizer.recognize(audio) == "open notepad"
+    assert len(recognizer.cache) == 0
+
+
+def test_repeated_utterance_is_answered_from_cache_after_confirmation():
+    backend = EchoBackend("open notepad")
+    recognizer = CachingRecognizer(backend, RecognitionCache())
+    audio = sr.AudioData(pcm((0.2, 0, 20), (0.6, 3000, 20), (0.3, 0, 20)), RATE, 2)
+    for _ in range(3):
+        assert recognizer.recognize(audio) == "open notepad"
+    assert backend.calls == 2
+    assert recognizer.cache.hits == 1
+
+
+def test_store_defers_saving_until_flush(tmp_path):
+    path = tmp_path / "recognition.json"
+    cache = RecognitionCache(path=str(path))
+    cache.SAVE_DELAY = 60.0
+    probe = fingerprint(pcm((0.2, 0, 20), (0.6, 3000, 20), (0.3, 0, 20)))
+    cache.store(probe, "open notepad")
+    assert not path.exists()
+    cache.close()
+    assert [entry["text"] for entry in json.loads(path.read_text())] == ["open notepad"]
+    assert len(RecognitionCache(path=str(path))) == 1
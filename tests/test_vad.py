@@ -0,0 +1,88 @@
+import array
+import pytest
+from vad import VAD_PROFILES, EnergyGate, Endpointer, VadProfile, frame_rms
+
+FRAME = 0.03
+SAMPLES = 480
+
+
+def frame(level):
+    return array.array("h", [level] * SAMPLES).tobytes()
+
+
+QUIET, LOUD = frame(50), frame(3000)
+
+
+def run(endpointer, frames, start=0.0):
+    """Events for consecutive frames, with timestamps counted from `start`."""
+    return [endpointer.process(data, start + index * FRAME) for index, data in enumerate(frames)]
+
+
+def test_frame_rms():
+    assert frame_rms(frame(1000)) == 1000.0
+    assert frame_rms(b"") == 0.0
+
+
+def test_gate_calibrates_noise_floor():
+    gate = EnergyGate(calibration_frames=10)
+    for _ in range(10):
+        gate.process(QUIET)
+    assert gate.noise_floor == 50.0
+    assert gate.threshold == 300.0
+    assert gate.process(LOUD) and gate.voiced
+
+
+def test_phrase_start_and_end():
+    endpointer = Endpointer("default", FRAME)
+    events = run(endpointer, [QUIET] * 30 + [LOUD] * 20 + [QUIET] * 20)
+    # min_speech is three frames, hangover twelve.
+    assert events[:32] == ["silence"] * 32
+    assert events[32] == "start"
+    assert events[33:61] == ["speech"] * 28
+    assert events[61] == "end"
+    assert endpointer.speech_start == pytest.approx(30 * FRAME)
+    assert endpointer.speech_end == pytest.approx(50 * FRAME)
+    assert endpointer.decision_delays == [pytest.approx(12 * FRAME)]
+
+
+def test_short_click_does_not_start_a_phrase():
+    endpointer = Endpointer("default", FRAME)
+    events = run(endpointer, [QUIET] * 30 + [LOUD] * 2 + [QUIET] * 10)
+    assert set(events) == {"silence"}
+
+
+def test_timeout_without_speech():
+    endpointer = Endpointer("fast", FRAME)
+    events = run(endpointer, [QUIET] * 200)
+    limit = round(VAD_PROFILES["fast"].start_timeout / FRAME)
+    assert events[limit - 2] == "silence"
+    assert events[limit - 1] == "timeout"
+
+
+def test_long_phrase_is_cut_at_max_phrase():
+    # A short limit: a steady tone held for seconds would eventually be absorbed into the noise floor.
+    profile = VadProfile("short", hangover=0.3, min_speech=0.06, start_timeout=5.0, max_phrase=1.5)
+    events = run(Endpointer(profile, FRAME), [QUIET] * 30 + [LOUD] * 80)
+    start, end = events.index("start"), events.index("end")
+    # The phrase began on frame 30 and is cut on its 50th frame (1.5 s).
+    assert end == 30 + 50 - 1
+    assert set(events[start + 1:end]) == {"speech"}
+
+
+def test_slow_profile_waits_through_pauses():
+    paused = [QUIET] * 30 + [LOUD] * 10 + [QUIET] * 20 + [LOUD] * 10 + [QUIET] * 40
+    default_events = run(Endpointer("default", FRAME), paused)
+    slow_events = run(Endpointer("slow", FRAME), paused)
+    # Default ends the first half at the pause and hears the second half as a new phrase.
+    assert default_events.count("end") == 2 and default_events.index("end") < 60
+    assert slow_events.count("end") == 1 and slow_events.index("end") > 70
+
+
+def test_reset_keeps_noise_floor():
+    endpointer = Endpointer("default", FRAME)
+    run(endpointer, [QUIET] * 30 + [LOUD] * 10 + [QUIET] * 20)
+    floor = endpointer.gate.noise_floor
+    endpointer.reset()
+    assert not endpointer.in_phrase and endpointer.speech_start is None
+    assert endpointer.gate.noise_floor == floor
+    assert run(endpointer, [LOUD] * 3)[-1] == "start"
@@ -0,0 +1,71 @@
+import pytest
+from volume import FakeVolumeBackend, VolumeController
+
+
+class RecordingBackend(FakeVolumeBackend):
+    def __init__(self, level=0.5, write_delay=0.0, fail=False):
+        super().__init__(level, write_delay)
+        self.history = []
+        self.fail = fail
+        self.invalidated = 0
+
+    def set(self, level):
+        if self.fail:
+            raise OSError("device gone")
+        super().set(level)
+        self.history.append(level)
+
+    def invalidate(self):
+        self.invalidated += 1
+
+
+def test_burst_of_steps_is_coalesced():
+    backend = RecordingBackend(0.5, write_delay=0.005)
+    controller = VolumeController(backend)
+    for _ in range(40):
+        controller.step(0.01)
+    assert controller.flush()
+    assert backend.level == pytest.approx(0.9)
+    assert controller.stats()["requests"] == 40
+    assert backend.writes <= 3
+    assert backend.history[-1] == pytest.approx(0.9)
+
+
+def test_levels_are_clamped():
+    controller = VolumeController(RecordingBackend(0.5))
+    assert controller.step(0.8) == 1.0
+    assert controller.set(-0.3) == 0.0
+    assert controller.flush()
+    assert controller.level == 0.0
+
+
+def test_ramp_writes_monotonic_steps():
+    backend = RecordingBackend(0.8)
+    controller = VolumeController(backend, ramp_step_interval=0.01)
+    controller.level  # read the device first so the ramp knows where it starts
+    controller.set(0.2, ramp=0.1)
+    assert controller.flush()
+    assert len(backend.history) == 10
+    assert backend.history == sorted(backend.history, reverse=True)
+    assert backend.history[-1] == pytest.approx(0.2)
+
+
+def test_level_is_reread_from_device_when_stale():
+    backend = RecordingBackend(0.5)
+    controller = VolumeController(backend, resync_after=0.0)
+    assert controller.level == 0.5
+    # Hardware keys changed the volume behind the controller's back.
+    backend.level = 0.3
+    assert controller.step(0.1) == pytest.approx(0.4)
+    assert controller.flush()
+
+
+def test_failed_write_drops_device_handle():
+    backend = RecordingBackend(0.5, fail=True)
+    controller = VolumeController(backend)
+    controller.set(0.7)
+    assert controller.flush()
+    assert backend.invalidated == 1
+    backend.fail = False
+    # The next read goes back to the device instead of trusting the failed target.
+    assert controller.level == 0.5
@@ -0,0 +1,172 @@
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+STAGES = ("capture", "vad", "recognition", "routing", "action")
+PERCENTILES = (50, 95, 99)
+
+
+class Span(NamedTuple):
+    """One timed stage of a command, in time.monotonic() seconds."""
+    stage: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Trace:
+    """All spans recorded for one spoken command, from capture to action completion."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.kind = "unknown"
+        self.status = "open"
+        self.spans: List[Span] = []
+
+    @property
+    def total(self) -> float:
+        """Wall time from the first span's start to the last span's end."""
+        if not self.spans:
+            return 0.0
+        return max(span.end for span in self.spans) - min(span.start for span in self.spans)
+
+    def to_dict(self) -> Dict:
+        started = min((span.start for span in self.spans), default=0.0)
+        return {
+            "id": self.trace_id,
+            "kind": self.kind,
+            "status": self.status,
+            "total_ms": round(1000 * self.total, 2),
+            "spans": [{"stage": span.stage, "offset_ms": round(1000 * (span.start - started), 2),
+                       "duration_ms": round(1000 * span.duration, 2)} for span in self.spans],
+        }
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(durations: Iterable[float]) -> Dict[str, float]:
+    values = sorted(durations)
+    summary = {"count": len(values)}
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = 1000 * percentile(values, p)
+    return summary
+
+
+class Tracer:
+    """Stamps commands with IDs and keeps their finished traces in a fixed-size ring buffer."""
+
+    def __init__(self, capacity: int = 500):
+        self._ids = itertools.count(1)
+        self._prefix = f"{int(time.time()):x}"
+        self._active: Dict[str, Trace] = {}
+        self._finished = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def start_trace(self) -> str:
+        """Open a trace for a new command and return its ID."""
+        trace_id = f"{self._prefix}-{next(self._ids)}"
+        with self._lock:
+            self._active[trace_id] = Trace(trace_id)
+        return trace_id
+
+    def add_span(self, trace_id: Optional[str], stage: str, start: float, end: float):
+        """Record a stage whose start and end were measured elsewhere; unknown IDs are ignored."""
+        with self._lock:
+            trace = self._active.get(trace_id)
+            if trace is not None:
+                trace.spans.append(Span(stage, start, end))
+
+    @contextmanager
+    def span(self, trace_id: Optional[str], stage: str):
+        """Time the enclosed block as one stage of the trace."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_span(trace_id, stage, started, time.monotonic())
+
+    def set_kind(self, trace_id: Optional[str], kind: str):
+        with self._lock:
+            trace = self._active.get(trace_id)
+            if trace is not None:
+                trace.kind = kind
+
+    def finish(self, trace_id: Optional[str], status: str = "done"):
+        """Close the trace and move it to the ring buffer."""
+        with self._lock:
+            trace = self._active.pop(trace_id, None)
+            if trace is None:
+                return
+            trace.status = status
+            self._finished.append(trace)
+        logging.info(f"Trace {trace.trace_id} ({trace.kind}, {status}): "
+                     + ", ".join(f"{span.stage} {1000 * span.duration:.0f} ms" for span in trace.spans))
+
+    def traces(self) -> List[Trace]:
+        with self._lock:
+            return list(self._finished)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """p50/p95/p99 per stage, and of total latency per command type."""
+        traces = self.traces()
+        stages: Dict[str, List[float]] = {}
+        kinds: Dict[str, List[float]] = {}
+        for trace in traces:
+            for span in trace.spans:
+                stages.setdefault(span.stage, []).append(span.duration)
+            kinds.setdefault(trace.kind, []).append(trace.total)
+        order = {stage: index for index, stage in enumerate(STAGES)}
+        return {
+            "stages": {stage: summarize(stages[stage]) for stage in sorted(stages, key=lambda s: order.get(s, len(order)))},
+            "commands": {kind: summarize(values) for kind, values in sorted(kinds.items())},
+        }
+
+    def format_summary(self) -> str:
+        """Plain-text percentile table for the GUI and logs."""
+        summary = self.summary()
+        if not summary["commands"]:
+            return "No traced commands yet."
+        lines = [f"{'':<20}{'n':>5}" + "".join(f"{f'p{p}':>10}" for p in PERCENTILES)]
+        for section, rows in (("Stage", summary["stages"]), ("Command", summary["commands"])):
+            lines.append(section)
+            for name, row in rows.items():
+                lines.append(f"  {name:<18}{row['count']:>5}"
+                             + "".join(f"{row[f'p{p}_ms']:>8.0f}ms" for p in PERCENTILES))
+        return "\n".join(lines)
+
+    def dump(self, path: str = "logs/traces.jsonl") -> str:
+        """Write every buffered trace as one JSON object per line."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as output:
+            for trace in self.traces():
+                output.write(json.dumps(trace.to_dict()) + "\n")
+        return path
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
@@ -0,0 +1,180 @@
+import array
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional, Union
+
+
+def frame_rms(data: bytes) -> float:
+    """Root-mean-square amplitude of a 16-bit little-endian PCM frame."""
+    samples = array.array("h", data)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class EnergyGate:
+    """Cheap energy gate whose noise floor keeps adapting, deciding whether a frame is worth deeper analysis."""
+
+    # Per-frame smoothing of the noise floor: quick to follow quieter rooms, slow to follow louder ones,
+    # and slower still during speech so a long phrase is not absorbed into the floor.
+    FALL_RATE = 0.2
+    RISE_RATE = 0.02
+    SPEECH_RISE_RATE = 0.005
+
+    def __init__(self, threshold: float = 300.0, calibration_frames: int = 30, margin: float = 2.5,
+                 hangover_frames: int = 8):
+        self.min_threshold = threshold
+        self.threshold = threshold
+        self.calibration_frames = calibration_frames
+        self.margin = margin
+        self.hangover_frames = hangover_frames
+        self.voiced = False
+        self.noise_floor: Optional[float] = None
+        self._calibration = []
+        self._hangover = 0
+
+    def process(self, data: bytes) -> bool:
+        """Return True while the frame is speech or within the hangover after speech."""
+        energy = frame_rms(data)
+        if len(self._calibration) < self.calibration_frames:
+            # Until calibrated, the floor is the lower quartile heard so far, so speech in the first
+            # frames neither inflates it nor goes unheard.
+            self._calibration.append(energy)
+            self.noise_floor = sorted(self._calibration)[len(self._calibration) // 4]
+            self._update_threshold()
+            self.voiced = energy >= self.threshold
+        else:
+            self.voiced = energy >= self.threshold
+            if self.voiced:
+                self.noise_floor += self.SPEECH_RISE_RATE * (energy - self.noise_floor)
+            else:
+                rate = self.FALL_RATE if energy < self.noise_floor else self.RISE_RATE
+                self.noise_floor += rate * (energy - self.noise_floor)
+            self._update_threshold()
+        if self.voiced:
+            self._hangover = self.hangover_frames
+            return True
+        if self._hangover > 0:
+            self._hangover -= 1
+            return True
+        return False
+
+    def _update_threshold(self):
+        self.threshold = max(self.min_threshold, self.noise_floor * self.margin)
+
+    def reset(self):
+        self.voiced = False
+        self._hangover = 0
+
+    def recalibrate(self):
+        """Forget the noise floor and measure it again from the next frames."""
+        self.reset()
+        self.noise_floor = None
+        self.threshold = self.min_threshold
+        self._calibration = []
+
+
+class VadProfile(NamedTuple):
+    """Endpointing parameters, in seconds of audio."""
+    name: str
+    hangover: float          # silence that ends a phrase
+    min_speech: float        # voiced audio needed before a phrase counts as started
+    start_timeout: float     # give up if no phrase starts within this time
+    max_phrase: float        # cut phrases longer than this
+    margin: float = 2.5      # speech threshold as a multiple of the noise floor
+
+
+VAD_PROFILES = {
+    "fast": VadProfile("fast", hangover=0.2, min_speech=0.06, start_timeout=5.0, max_phrase=6.0),
+    "default": VadProfile("default", hangover=0.35, min_speech=0.09, start_timeout=5.0, max_phrase=8.0),
+    # Slow speakers pause between words and often speak more softly.
+    "slow": VadProfile("slow", hangover=1.0, min_speech=0.09, start_timeout=8.0, max_phrase=15.0, margin=2.0),
+    # For speech with long interruptions (stutter, breathing support, word finding).
+    "interrupted": VadProfile("interrupted", hangover=1.6, min_speech=0.12, start_timeout=10.0,
+                              max_phrase=20.0, margin=2.0),
+}
+
+
+class Endpointer:
+    """Phrase endpointing on top of EnergyGate: waits for speech, then ends the phrase after the profile's hangover.
+
+    process() returns one event per frame: "silence" before a phrase, "start" on the frame that confirms one,
+    "speech" inside it, "end" when it finishes, and "timeout" if none started in time.
+    """
+
+    def __init__(self, profile: Union[str, VadProfile] = "default", frame_duration: float = 0.03,
+                 gate: Optional[EnergyGate] = None):
+        self.profile = VAD_PROFILES[profile] if isinstance(profile, str) else profile
+        self.frame_duration = frame_duration
+        self.gate = gate or EnergyGate(margin=self.profile.margin)
+        self.decision_delays: List[float] = []
+        self.frame_seconds = 0.0
+        self.frames = 0
+        self.reset()
+
+    def reset(self):
+        """Start waiting for a new phrase; the gate keeps its noise floor."""
+        self.gate.reset()
+        self.in_phrase = False
+        self.speech_start: Optional[float] = None
+        self.speech_end: Optional[float] = None
+        self._waited = 0
+        self._voiced_run = 0
+        self._silence_run = 0
+        self._phrase_frames = 0
+
+    def _frames(self, seconds: float) -> int:
+        return max(1, int(round(seconds / self.frame_duration)))
+
+    def process(self, data: bytes, timestamp: Optional[float] = None) -> str:
+        """Classify one frame; `timestamp` (start of frame) is used for speech_start/speech_end."""
+        started = time.perf_counter()
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self.gate.process(data)
+        voiced = self.gate.voiced
+        event = self._advance(voiced, timestamp)
+        self.frame_seconds += time.perf_counter() - started
+        self.frames += 1
+        return event
+
+    def _advance(self, voiced: bool, timestamp: float) -> str:
+        profile = self.profile
+        if not self.in_phrase:
+            self._waited += 1
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self._frames(profile.min_speech):
+                self.in_phrase = True
+                self.speech_start = timestamp - (self._voiced_run - 1) * self.frame_duration
+                self.speech_end = timestamp + self.frame_duration
+                self._phrase_frames = self._voiced_run
+                self._silence_run = 0
+                return "start"
+            if self._waited >= self._frames(profile.start_timeout):
+                return "timeout"
+            return "silence"
+        self._phrase_frames += 1
+        if voiced:
+            self._silence_run = 0
+            self.speech_end = timestamp + self.frame_duration
+        else:
+            self._silence_run += 1
+        if self._silence_run >= self._frames(profile.hangover) or self._phrase_frames >= self._frames(profile.max_phrase):
+            # Audio between the last voiced frame and the decision (the silence the user waited through).
+            self.decision_delays.append(self._silence_run * self.frame_duration)
+            self.in_phrase = False
+            self._waited = self._voiced_run = 0
+            return "end"
+        return "speech"
+
+    def stats(self) -> Dict[str, float]:
+        """Endpoint count, mean/max delay from end of speech to decision (ms), and CPU per frame (us)."""
+        delays = self.decision_delays
+        return {
+            "profile": self.profile.name,
+            "endpoints": len(delays),
+            "decision_ms_mean": 1000 * sum(delays) / len(delays) if delays else 0.0,
+            "decision_ms_max": 1000 * max(delays) if delays else 0.0,
+            "frame_us": 1e6 * self.frame_seconds / self.frames if self.frames else 0.0,
+            "noise_floor": self.gate.noise_floor or 0.0,
+            "threshold": self.gate.threshold,
+        }
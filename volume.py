@@ -0,0 +1,213 @@
+import logging
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+
+class VolumeBackend:
+    """Reads and writes the master output volume as a scalar between 0.0 and 1.0."""
+
+    def get(self) -> float:
+        raise NotImplementedError
+
+    def set(self, level: float):
+        raise NotImplementedError
+
+    def invalidate(self):
+        """Drop any cached device handle so the next call reconnects."""
+
+
+class PycawBackend(VolumeBackend):
+    """Windows endpoint volume via pycaw; the COM interface is cached until it fails."""
+
+    def __init__(self):
+        self._volume = None
+
+    def _endpoint(self):
+        if self._volume is None:
+            from comtypes import CLSCTX_ALL
+            from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+            devices = AudioUtilities.GetSpeakers()
+            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+            self._volume = interface.QueryInterface(IAudioEndpointVolume)
+            logging.info("Audio endpoint interface acquired.")
+        return self._volume
+
+    def _call(self, method: str, *args):
+        # A stale interface (default device unplugged or switched) raises; rebuild once and retry.
+        try:
+            return getattr(self._endpoint(), method)(*args)
+        except Exception as e:
+            logging.warning(f"Audio endpoint call failed, reconnecting: {e}")
+            self.invalidate()
+            return getattr(self._endpoint(), method)(*args)
+
+    def get(self) -> float:
+        return self._call("GetMasterVolumeLevelScalar")
+
+    def set(self, level: float):
+        self._call("SetMasterVolumeLevelScalar", level, None)
+
+    def invalidate(self):
+        self._volume = None
+
+
+class PulseBackend(VolumeBackend):
+    """Linux default sink volume through `pactl` (PulseAudio or PipeWire)."""
+
+    def get(self) -> float:
+        output = subprocess.run(["pactl", "get-sink-volume", "@DEFAULT_SINK@"], capture_output=True,
+                                text=True, check=True).stdout
+        match = re.search(r"(\d+)%", output)
+        return int(match.group(1)) / 100 if match else 0.0
+
+    def set(self, level: float):
+        subprocess.run(["pactl", "set-sink-volume", "@DEFAULT_SINK@", f"{round(level * 100)}%"], check=True)
+
+
+class FakeVolumeBackend(VolumeBackend):
+    """In-memory backend for tests and benchmarks, with an optional simulated write cost."""
+
+    def __init__(self, level: float = 0.5, write_delay: float = 0.0):
+        self.level = level
+        self.write_delay = write_delay
+        self.writes = 0
+
+    def get(self) -> float:
+        return self.level
+
+    def set(self, level: float):
+        if self.write_delay:
+            time.sleep(self.write_delay)
+        self.level = level
+        self.writes += 1
+
+
+def build_volume_backend() -> VolumeBackend:
+    """Pick pycaw on Windows, pactl where available, otherwise an in-memory fake."""
+    if sys.platform == "win32":
+        return PycawBackend()
+    if shutil.which("pactl"):
+        return PulseBackend()
+    logging.warning("No system volume backend available, using in-memory volume.")
+    return FakeVolumeBackend()
+
+
+class VolumeController:
+    """Absolute, relative and ramped volume changes, coalescing bursts into one final write."""
+
+    def __init__(self, backend: Optional[VolumeBackend] = None, coalesce_window: float = 0.03,
+                 ramp_step_interval: float = 0.02, resync_after: float = 2.0):
+        self.backend = backend or build_volume_backend()
+        self.resync_after = resync_after
+        self.coalesce_window = coalesce_window
+        self.ramp_step_interval = ramp_step_interval
+        self.requests = 0
+        self.writes = 0
+        self._level: Optional[float] = None
+        self._synced_at = 0.0
+        self._target: Optional[float] = None
+        self._ramp_duration = 0.0
+        self._lock = threading.Condition()
+        self._writing = False
+
+    @property
+    def level(self) -> float:
+        """Most recent requested level, re-read from the device when idle (hardware keys change it too)."""
+        with self._lock:
+            return self._current()
+
+    def set(self, level: float, ramp: float = 0.0) -> float:
+        """Request an absolute level, optionally reached smoothly over `ramp` seconds."""
+        with self._lock:
+            return self._request(level, ramp)
+
+    def step(self, delta: float, ramp: float = 0.0) -> float:
+        """Request a relative change; steps issued in a burst accumulate on the pending target."""
+        with self._lock:
+            return self._request(self._current() + delta, ramp)
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until the pending target has been written; returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._target is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "writes": self.writes}
+
+    def _current(self) -> float:
+        if self._target is not None:
+            return self._target
+        if self._level is None or time.monotonic() - self._synced_at > self.resync_after:
+            self._level = self.backend.get()
+            self._synced_at = time.monotonic()
+        return self._level
+
+    def _request(self, level: float, ramp: float) -> float:
+        level = max(0.0, min(1.0, level))
+        self.requests += 1
+        self._target = level
+        self._ramp_duration = max(self._ramp_duration, ramp)
+        if not self._writing:
+            self._writing = True
+            threading.Thread(target=self._write_loop, name="cerp-volume", daemon=True).start()
+        self._lock.notify_all()
+        return level
+
+    def _write_loop(self):
+        while True:
+            # Let a burst of requests settle, then write only the latest target.
+            time.sleep(self.coalesce_window)
+            with self._lock:
+                target, ramp = self._target, self._ramp_duration
+                start = self._level if self._level is not None else target
+                self._ramp_duration = 0.0
+            if target is None:
+                with self._lock:
+                    self._writing = False
+                return
+            written = target
+            try:
+                steps = max(1, int(ramp / self.ramp_step_interval)) if ramp else 1
+                for index in range(1, steps + 1):
+                    self.backend.set(start + (target - start) * index / steps)
+                    self.writes += 1
+                    if index < steps:
+                        time.sleep(self.ramp_step_interval)
+            except Exception as e:
+                logging.error(f"Volume write failed: {e}")
+                self.backend.invalidate()
+                written = None
+            with self._lock:
+                self._level = written
+                self._synced_at = time.monotonic()
+                if self._target == target:
+                    self._target = None
+                    self._writing = False
+                    self._lock.notify_all()
+                    return
+
+
+if __name__ == "__main__":
+    backend = FakeVolumeBackend(level=0.5, write_delay=0.005)
+    controller = VolumeController(backend)
+    started = time.perf_counter()
+    for _ in range(100):
+        controller.step(0.01)
+    controller.flush()
+    elapsed = time.perf_counter() - started
+    print(f"100 step requests -> {backend.writes} device writes, final level {backend.level:.2f}, "
+          f"{elapsed * 1000:.1f} ms")
+    controller.set(0.2, ramp=0.3)
+    controller.flush()
+    print(f"ramp to 0.20 -> {backend.writes} device writes in total, final level {backend.level:.2f}")
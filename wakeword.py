@@ -0,0 +1,372 @@
+import array
+import glob
+import json
+import logging
+import math
+import os
+import sys
+import time
+import wave
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import speech_recognition as sr
+from audio_pipeline import AudioFrame, CaptureService, Subscription, WavFileSource, get_capture_service
+from vad import EnergyGate, Endpointer
+
+DEFAULT_TEMPLATE_DIR = "wake_templates"
+
+BAND_FREQUENCIES = [250, 350, 500, 650, 850, 1100, 1400, 1800, 2300, 2900, 3500]
+
+
+def band_energies(data: bytes, sample_rate: int = 16000) -> List[float]:
+    """Mean-normalised log energies of a PCM frame at a fixed set of bands (Goertzel)."""
+    samples = array.array("h", data)
+    # Halve the rate by averaging sample pairs; the bands of interest all sit below 4 kHz.
+    decimated = [(samples[i] + samples[i + 1]) * 0.5 for i in range(0, len(samples) - 1, 2)]
+    rate = sample_rate / 2
+    energies = []
+    for frequency in BAND_FREQUENCIES:
+        coefficient = 2 * math.cos(2 * math.pi * frequency / rate)
+        s_prev = s_prev2 = 0.0
+        for sample in decimated:
+            s = sample + coefficient * s_prev - s_prev2
+            s_prev2, s_prev = s_prev, s
+        power = s_prev2 * s_prev2 + s_prev * s_prev - coefficient * s_prev * s_prev2
+        energies.append(math.log(power + 1.0))
+    mean = sum(energies) / len(energies)
+    return [e - mean for e in energies]
+
+
+def dtw_distance(a: List[List[float]], b: List[List[float]]) -> float:
+    """Length-normalised dynamic time warping distance between two feature sequences."""
+    n, m = len(a), len(b)
+    if not n or not m:
+        return math.inf
+    previous = [math.inf] * (m + 1)
+    previous[0] = 0.0
+    for i in range(1, n + 1):
+        current = [math.inf] * (m + 1)
+        row = a[i - 1]
+        for j in range(1, m + 1):
+            cost = math.sqrt(sum((x - y) ** 2 for x, y in zip(row, b[j - 1])))
+            current[j] = cost + min(previous[j], current[j - 1], previous[j - 1])
+        previous = current
+    return previous[m] / (n + m)
+
+
+class KeywordSpotter:
+    """Base class for wake-word engines fed with gated audio frames."""
+
+    # True if the engine sends audio off the machine.
+    cloud = False
+
+    def accept(self, data: bytes, speech: bool) -> bool:
+        """Consume one frame; return True when the keyword has just been detected."""
+        raise NotImplementedError
+
+    def reset(self):
+        """Discard any partially accumulated utterance."""
+
+
+class _SegmentSpotter(KeywordSpotter):
+    """Collects a gated speech segment and scores it once the gate closes."""
+
+    def __init__(self, sample_rate: int = 16000, max_segment_frames: int = 70):
+        self.sample_rate = sample_rate
+        self.max_segment_frames = max_segment_frames
+        self._segment = []
+
+    def accept(self, data: bytes, speech: bool) -> bool:
+        if speech:
+            self._segment.append(self._frame_features(data))
+            if len(self._segment) < self.max_segment_frames:
+                return False
+        if not self._segment:
+            return False
+        segment, self._segment = self._segment, []
+        return self._score(segment)
+
+    def reset(self):
+        self._segment = []
+
+    def _frame_features(self, data: bytes):
+        return data
+
+    def _score(self, segment: list) -> bool:
+        raise NotImplementedError
+
+
+class TemplateSpotter(_SegmentSpotter):
+    """Local keyword spotter matching band-energy templates with DTW."""
+
+    def __init__(self, templates: Optional[List[List[List[float]]]] = None, threshold: float = 4.0,
+                 sample_rate: int = 16000, max_segment_frames: int = 70):
+        super().__init__(sample_rate=sample_rate, max_segment_frames=max_segment_frames)
+        self.templates = templates or []
+        self.threshold = threshold
+        self.last_distance = math.inf
+
+    @classmethod
+    def from_wav_files(cls, paths: List[str], **kwargs) -> "TemplateSpotter":
+        """Build a spotter from WAV recordings of the wake word."""
+        spotter = cls(**kwargs)
+        for path in paths:
+            spotter.enroll_wav(path)
+        return spotter
+
+    def enroll_wav(self, path: str):
+        """Add the voiced part of a WAV recording as a template."""
+        source = WavFileSource(path)
+        gate = EnergyGate(calibration_frames=5)
+        source.open()
+        try:
+            template = []
+            while True:
+                data = source.read()
+                if data is None:
+                    break
+                if gate.process(data):
+                    template.append(band_energies(data, source.sample_rate))
+        finally:
+            source.close()
+        if template:
+            self.templates.append(template)
+            logging.info(f"Enrolled wake-word template from {path} ({len(template)} frames)")
+
+    def _frame_features(self, data: bytes):
+        return band_energies(data, self.sample_rate)
+
+    def _score(self, segment: list) -> bool:
+        best = math.inf
+        for template in self.templates:
+            # Skip templates whose length is wildly different; DTW cost is quadratic.
+            if not 0.5 <= len(segment) / len(template) <= 2.0:
+                continue
+            best = min(best, dtw_distance(segment, template))
+        self.last_distance = best
+        return best <= self.threshold
+
+
+class RecognizerSpotter(_SegmentSpotter):
+    """Fallback that transcribes gated speech segments only, never idle audio."""
+
+    cloud = True
+
+    def __init__(self, keyword: str = "hello", sample_rate: int = 16000, max_segment_frames: int = 100):
+        super().__init__(sample_rate=sample_rate, max_segment_frames=max_segment_frames)
+        self.keyword = keyword
+        self.recognizer = sr.Recognizer()
+
+    def _score(self, segment: list) -> bool:
+        audio = sr.AudioData(b"".join(segment), self.sample_rate, 2)
+        try:
+            text = self.recognizer.recognize_google(audio, language="en-US").lower()
+        except sr.UnknownValueError:
+            return False
+        except sr.RequestError as e:
+            logging.error(f"Wake-word recognition request failed: {e}")
+            return False
+        return self.keyword in text
+
+
+class PorcupineSpotter(KeywordSpotter):
+    """Optional Picovoice Porcupine backend (requires `pvporcupine`)."""
+
+    def __init__(self, access_key: str, keywords: Optional[List[str]] = None,
+                 keyword_paths: Optional[List[str]] = None):
+        import pvporcupine
+        self._porcupine = pvporcupine.create(access_key=access_key, keywords=keywords, keyword_paths=keyword_paths)
+        self._pending = array.array("h")
+
+    def accept(self, data: bytes, speech: bool) -> bool:
+        self._pending.frombytes(data)
+        detected = False
+        length = self._porcupine.frame_length
+        while len(self._pending) >= length:
+            chunk, self._pending = self._pending[:length], self._pending[length:]
+            if self._porcupine.process(chunk) >= 0:
+                detected = True
+        return detected
+
+    def reset(self):
+        self._pending = array.array("h")
+
+
+class VoskSpotter(KeywordSpotter):
+    """Optional Vosk backend decoding against a one-word grammar (requires `vosk`)."""
+
+    def __init__(self, model_path: str, keyword: str = "hello", sample_rate: int = 16000):
+        from vosk import KaldiRecognizer, Model
+        self.keyword = keyword
+        self._recognizer = KaldiRecognizer(Model(model_path), sample_rate, json.dumps([keyword, "[unk]"]))
+
+    def accept(self, data: bytes, speech: bool) -> bool:
+        if not speech:
+            return False
+        if self._recognizer.AcceptWaveform(data):
+            text = json.loads(self._recognizer.Result()).get("text", "")
+        else:
+            text = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        if self.keyword in text.split():
+            self._recognizer.Reset()
+            return True
+        return False
+
+    def reset(self):
+        self._recognizer.Reset()
+
+
+class WakeWordDetector:
+    """Runs an energy gate then a keyword spotter over frames, with latency and CPU metrics."""
+
+    def __init__(self, spotter: KeywordSpotter, gate: Optional[EnergyGate] = None, frame_duration: float = 0.03):
+        self.spotter = spotter
+        self.gate = gate or EnergyGate()
+        self.frame_duration = frame_duration
+        self.frames = 0
+        self.gated_frames = 0
+        self.cpu_seconds = 0.0
+        self.latencies: List[float] = []
+        self._last_speech_at = 0.0
+        self._in_segment = False
+
+    def process(self, frame: AudioFrame) -> bool:
+        """Feed one frame; return True when the wake word was detected."""
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        self.frames += 1
+        speech = self.gate.process(frame.data)
+        if self.gate.voiced:
+            self._last_speech_at = frame.timestamp + self.frame_duration
+        detected = False
+        if speech or self._in_segment:
+            self.gated_frames += 1
+            detected = self.spotter.accept(frame.data, speech)
+            self._in_segment = speech
+        self.cpu_seconds += time.thread_time() - cpu_started
+        if detected:
+            waited = frame.timestamp + self.frame_duration - self._last_speech_at
+            self.latencies.append(max(0.0, waited) + time.perf_counter() - started)
+            self._in_segment = False
+            self.spotter.reset()
+        return detected
+
+    def run(self, subscription: Subscription, on_detect: Callable[[], None], should_continue: Callable[[], bool]):
+        """Consume frames from a capture subscription until told to stop."""
+        while should_continue():
+            frame = subscription.get(timeout=0.5)
+            if frame is None:
+                if subscription.closed:
+                    break
+                continue
+            if self.process(frame):
+                logging.info("Detected wake word.")
+                on_detect()
+
+    def metrics(self) -> Dict[str, float]:
+        """Detection latency and CPU cost per second of processed audio."""
+        audio_seconds = self.frames * self.frame_duration
+        return {
+            "frames": self.frames,
+            "gated_ratio": self.gated_frames / self.frames if self.frames else 0.0,
+            "detections": len(self.latencies),
+            "latency_mean_ms": 1000 * sum(self.latencies) / len(self.latencies) if self.latencies else 0.0,
+            "latency_max_ms": 1000 * max(self.latencies) if self.latencies else 0.0,
+            "cpu_per_second": self.cpu_seconds / audio_seconds if audio_seconds else 0.0,
+        }
+
+
+CLOUD_NOTICE = ("Without wake-word templates, speech is sent to Google to listen for the wake word. "
+                "Run 'python wakeword.py --enroll' to detect it on this computer.")
+
+
+def build_wake_word_detector(template_dir: str = DEFAULT_TEMPLATE_DIR, keyword: str = "hello") -> WakeWordDetector:
+    """Prefer local templates in `template_dir`; fall back to transcribing gated segments."""
+    paths = sorted(glob.glob(os.path.join(template_dir, "*.wav")))
+    if paths:
+        logging.info(f"Using local wake-word templates from {template_dir}")
+        return WakeWordDetector(TemplateSpotter.from_wav_files(paths))
+    logging.warning(f"No wake-word templates in {template_dir}/: {CLOUD_NOTICE}")
+    return WakeWordDetector(RecognizerSpotter(keyword=keyword))
+
+
+def record_templates(count: int = 3, template_dir: str = DEFAULT_TEMPLATE_DIR,
+                     capture: Optional[CaptureService] = None, preroll_frames: int = 5) -> List[str]:
+    """Record `count` utterances of the wake word from the microphone as WAV templates; returns their paths."""
+    capture = capture or get_capture_service()
+    os.makedirs(template_dir, exist_ok=True)
+    endpointer = Endpointer("default", capture.source.frame_duration)
+    paths = []
+    with capture.subscribe("enroll") as source:
+        while len(paths) < count:
+            print(f"Say the wake word ({len(paths) + 1}/{count})...")
+            endpointer.reset()
+            preroll = deque(maxlen=preroll_frames)
+            frames = []
+            while True:
+                frame = source.get(timeout=source.read_timeout)
+                if frame is None:
+                    if source.closed:
+                        return paths
+                    continue
+                event = endpointer.process(frame.data, frame.timestamp)
+                if event == "timeout":
+                    endpointer.reset()
+                elif event == "silence":
+                    preroll.append(frame.data)
+                elif event == "start":
+                    frames = list(preroll) + [frame.data]
+                elif event == "speech":
+                    frames.append(frame.data)
+                else:
+                    break
+            path = os.path.join(template_dir, f"template_{int(time.time())}_{len(paths)}.wav")
+            with wave.open(path, "wb") as output:
+                output.setnchannels(1)
+                output.setsampwidth(source.SAMPLE_WIDTH)
+                output.setframerate(source.SAMPLE_RATE)
+                output.writeframes(b"".join(frames))
+            logging.info(f"Recorded wake-word template {path}")
+            paths.append(path)
+    return paths
+
+
+def benchmark(template_paths: List[str], recording_paths: List[str]):
+    """Replay recordings through a template detector and print detections and cost."""
+    spotter = TemplateSpotter.from_wav_files(template_paths)
+    for path in recording_paths:
+        source = WavFileSource(path)
+        detector = WakeWordDetector(spotter, frame_duration=source.frame_duration)
+        source.open()
+        index = 0
+        try:
+            while True:
+                data = source.read()
+                if data is None:
+                    break
+                detector.process(AudioFrame(index, index * source.frame_duration, data))
+                index += 1
+        finally:
+            source.close()
+        print(f"{path}: {json.dumps(detector.metrics())}")
+
+
+if __name__ == "__main__":
+    # Usage: python wakeword.py --enroll [COUNT]
+    #        python wakeword.py template1.wav [template2.wav ...] -- recording1.wav [...]
+    if sys.argv[1:2] == ["--enroll"]:
+        from logging_config import configure_logging
+        configure_logging()
+        capture = get_capture_service()
+        try:
+            recorded = record_templates(int(sys.argv[2]) if len(sys.argv) > 2 else 3, capture=capture)
+        finally:
+            capture.stop()
+        print(f"Recorded {len(recorded)} templates in {DEFAULT_TEMPLATE_DIR}/")
+        sys.exit(0)
+    if "--" not in sys.argv:
+        print("Usage: python wakeword.py --enroll [COUNT]\n"
+              "       python wakeword.py TEMPLATE.wav ... -- RECORDING.wav ...")
+        sys.exit(1)
+    split = sys.argv.index("--")
+    benchmark(sys.argv[1:split], sys.argv[split + 1:])